@@ -0,0 +1,204 @@
+'''iterative deepening driver with time management'''
+from ..game import Game
+from ..exceptions import SearchAbortedError
+from .negamax import Negamax, SearchResult, SearchConfig, INFINITY, MATE_BOUND
+from .transposition import TranspositionTable
+from .stats import SearchStats
+from typing import Optional, List, Callable, Tuple
+from dataclasses import dataclass, field
+import threading
+import time
+
+MAX_DEPTH = 64
+'''deepest iteration started when no depth limit is given'''
+
+DEFAULT_MOVES_TO_GO = 30
+'''moves assumed to remain until the next time control'''
+
+MOVE_OVERHEAD = 50
+'''milliseconds kept in reserve for communication lag'''
+
+MAX_ASPIRATION_WINDOW = 800
+'''aspiration windows wider than this are opened up completely'''
+
+@dataclass
+class SearchLimits:
+    '''limits of a search. Times are in milliseconds, as in UCI'''
+    depth: Optional[int] = None
+    '''maximum depth in plies'''
+
+    movetime: Optional[int] = None
+    '''search exactly this long'''
+
+    wtime: Optional[int] = None
+    '''white's remaining clock time'''
+
+    btime: Optional[int] = None
+    '''black's remaining clock time'''
+
+    winc: int = 0
+    '''white's increment per move'''
+
+    binc: int = 0
+    '''black's increment per move'''
+
+    movestogo: Optional[int] = None
+    '''moves until the next time control, None for sudden death'''
+
+    nodes: Optional[int] = None
+    '''maximum number of nodes'''
+
+    infinite: bool = False
+    '''search until stopped'''
+
+@dataclass
+class SearchInfo:
+    '''progress report sent after every completed iteration'''
+    depth: int
+    score: int
+    nodes: int
+    '''main search and quiescence nodes'''
+
+    nps: int
+    time: int
+    '''milliseconds since the search started'''
+
+    pv: List = field(default_factory=list)
+
+def allocate_time(limits:SearchLimits,piece_color:bool) -> Tuple[Optional[float],Optional[float]]:
+    '''
+    return (soft,hard) time limits in seconds for <piece_color>. No new
+    iteration is started after the soft limit, the search is aborted at the
+    hard limit. Either is None when unlimited.
+    '''
+    if limits.infinite:
+        return None,None
+    if limits.movetime is not None:
+        return limits.movetime / 1000, limits.movetime / 1000
+    remaining = limits.wtime if piece_color else limits.btime
+    if remaining is None:
+        return None,None
+    increment = limits.winc if piece_color else limits.binc
+    moves_to_go = limits.movestogo or DEFAULT_MOVES_TO_GO
+    usable = max(remaining - MOVE_OVERHEAD,0)
+    soft = min(usable / moves_to_go + increment * 0.75,usable)
+    hard = min(soft * 4,usable / 2 + increment * 0.75,usable)
+    return soft / 1000, max(hard,soft) / 1000
+
+class IterativeDeepening:
+    '''
+    search depth 1, 2, 3... with a Negamax until a limit is reached and return
+    the result of the last completed iteration. The first iteration always
+    completes, so a best move is available whenever the position has one.
+    <start_depth> skips the shallowest iterations.
+
+    <stop_event> may be set from another thread to end the search early.
+    <callback> is called with a SearchInfo after each completed iteration.
+    '''
+    def __init__(
+        self,
+        game:Game,
+        limits:Optional[SearchLimits]=None,
+        stop_event:Optional[threading.Event]=None,
+        callback:Optional[Callable[[SearchInfo],None]]=None,
+        config:Optional[SearchConfig]=None,
+        start_depth:int=1,
+        tt:Optional[TranspositionTable]=None
+    ):
+        self.game = game
+        self.limits = limits if limits is not None else SearchLimits()
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.callback = callback
+        self.negamax = Negamax(game,config=config,tt=tt)
+        self.start_depth = start_depth
+        self.nodes = 0
+        self.qnodes = 0
+        self.stats: Optional[SearchStats] = None
+        '''statistics of all iterations if config.collect_stats is set'''
+
+    def stop(self) -> None:
+        '''ask a running search to stop. Safe to call from any thread'''
+        self.stop_event.set()
+
+    def search(self) -> SearchResult:
+        '''run the iterative deepening loop'''
+        start = time.monotonic()
+        soft,hard = allocate_time(self.limits,self.game._current_player)
+        max_depth = self.limits.depth or MAX_DEPTH
+        self.nodes = 0
+        self.qnodes = 0
+        if self.negamax.config.collect_stats:
+            self.stats = SearchStats()
+        self.negamax.tt.new_search()
+        result = None
+
+        for depth in range(min(self.start_depth,max_depth),max_depth + 1):
+            if result is not None:
+                # limits only apply once there is a move to fall back on
+                self.negamax.stop_event = self.stop_event
+                self.negamax.deadline = None if hard is None else start + hard
+            try:
+                iteration = self._search_depth(depth,result)
+            except SearchAbortedError:
+                self.nodes += self.negamax.nodes
+                self.qnodes += self.negamax.qnodes
+                if self.stats is not None:
+                    self.stats.merge(self.negamax.stats)
+                break
+            result = iteration
+            total = self.nodes + self.qnodes
+
+            elapsed = time.monotonic() - start
+            if self.callback is not None:
+                self.callback(SearchInfo(
+                    depth=depth,
+                    score=result.score,
+                    nodes=total,
+                    nps=int(total / elapsed) if elapsed > 0 else 0,
+                    time=int(elapsed * 1000),
+                    pv=list(result.pv)
+                ))
+            if result.best_move is None:
+                break
+            if self.stop_event.is_set():
+                break
+            if soft is not None and elapsed >= soft:
+                break
+            if self.limits.nodes is not None and total >= self.limits.nodes:
+                break
+
+        result.nodes = self.nodes
+        result.qnodes = self.qnodes
+        result.stats = self.stats
+        return result
+
+    def _search_depth(self,depth:int,previous:Optional[SearchResult]) -> SearchResult:
+        '''
+        search one iteration. With aspiration windows enabled the search starts
+        in a narrow window around the previous score and widens it on the
+        failing side until the score falls inside.
+        '''
+        config = self.negamax.config
+        window = config.aspiration_window
+        alpha,beta = -INFINITY,INFINITY
+        if (
+            config.aspiration_windows and previous is not None and
+            abs(previous.score) < MATE_BOUND
+        ):
+            alpha,beta = previous.score - window,previous.score + window
+        while True:
+            if previous is not None and self.limits.nodes is not None:
+                self.negamax.node_limit = \
+                    self.limits.nodes - self.nodes - self.qnodes
+            iteration = self.negamax.search(depth,alpha,beta)
+            self.nodes += iteration.nodes
+            self.qnodes += iteration.qnodes
+            if self.stats is not None:
+                self.stats.merge(iteration.stats)
+            window *= 2
+            if iteration.score <= alpha:
+                alpha = -INFINITY if window > MAX_ASPIRATION_WINDOW else iteration.score - window
+            elif iteration.score >= beta:
+                beta = INFINITY if window > MAX_ASPIRATION_WINDOW else iteration.score + window
+            else:
+                return iteration
@@ -1,40 +1,498 @@
-from .game import Game
-from .board import Board
-from .move import Move
-from typing import Optional, List, Tuple, Dict
+'''depth-first alpha-beta negamax search'''
+from ..game import Game
+from ..board import Board
+from ..move import Move
+from .. import core
+from ..evaluation import evaluate
+from ..exceptions import SearchAbortedError
+from .transposition import TranspositionTable, Bound
+from .ordering import MoveOrderer, pick_moves, mvv_lva, see_loss
+from .stats import SearchStats, InstrumentedBoard
+from typing import Optional, List
 from dataclasses import dataclass, field
-from treelib import Node, Tree
-from copy import deepcopy
+import threading
+import time
+
+MATE_SCORE = 100000
+'''score of a checkmate at the root. Mates further away score closer to 0'''
+
+MATE_BOUND = MATE_SCORE - 1000
+'''scores beyond +-MATE_BOUND are mate scores'''
+
+INFINITY = 1000000
+'''bound larger than any reachable score'''
+
+def _score_to_tt(score:int,ply:int) -> int:
+    '''make mate scores relative to the current node before storing them'''
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+def _score_from_tt(score:int,ply:int) -> int:
+    '''make stored mate scores relative to the root again'''
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+@dataclass
+class SearchConfig:
+    '''tunable search settings'''
+    hash_mb: float = 16
+    '''transposition table size in megabytes'''
+
+    move_ordering: bool = True
+    '''order moves by TT move, MVV-LVA, killers and history'''
+
+    quiescence: bool = True
+    '''resolve captures and promotions at the leaves instead of evaluating'''
+
+    delta_margin: int = 200
+    '''quiescence skips captures that can't lift the score within this of alpha'''
+
+    see_pruning: bool = True
+    '''quiescence skips captures that lose material by static exchange evaluation'''
+
+    null_move: bool = True
+    '''try passing the move and prune if the opponent still can't reach beta'''
+
+    null_move_reduction: int = 2
+    '''extra depth reduction (R) of the null move search'''
+
+    late_move_reductions: bool = True
+    '''search late quiet moves shallower, re-searching those that raise alpha'''
+
+    lmr_min_depth: int = 3
+    lmr_min_moves: int = 3
+    '''number of moves searched at full depth before reducing'''
+
+    futility_pruning: bool = True
+    '''skip quiet moves near the leaves when the static eval is far below alpha'''
+
+    futility_margin: int = 150
+    '''futility margin per ply of remaining depth'''
+
+    reverse_futility_pruning: bool = True
+    '''return early near the leaves when the static eval is far above beta'''
+
+    reverse_futility_margin: int = 120
+    '''reverse futility margin per ply of remaining depth'''
+
+    futility_max_depth: int = 3
+    '''deepest remaining depth at which (reverse) futility pruning applies'''
+
+    pvs: bool = True
+    '''principal variation search: null windows for all but the first move'''
+
+    aspiration_windows: bool = True
+    '''search each iteration in a window around the previous score'''
+
+    aspiration_window: int = 50
+    '''initial half-width of the aspiration window in centipawns'''
+
+    tablebase_dir: Optional[str] = None
+    '''directory of endgame tablebases probed below the root, see tablebase'''
+
+    collect_stats: bool = False
+    '''count and time the work of each search, see SearchResult.stats'''
 
 @dataclass
-class GameState:
-    game: Game
-    '''the current Game instance'''
+class SearchResult:
+    best_move: Optional[Move]
+    '''best move found at the root, None if there are no legal moves'''
+
+    score: int
+    '''score in centipawns from the perspective of the side to move'''
+
+    pv: List[Move] = field(default_factory=list)
+    '''principal variation, starting with best_move'''
+
+    depth: int = 0
+    '''depth (in plies) of the completed search'''
+
+    nodes: int = 0
+    '''number of nodes visited by the main search'''
+
+    qnodes: int = 0
+    '''number of nodes visited by the quiescence search'''
 
-    evaluation: int
-    '''numerical score which evaluates position (e.g., material advantage)'''
+    stats: Optional[SearchStats] = None
+    '''statistics of the search if config.collect_stats is set'''
 
 class Negamax:
-    def __init__(self,game:Game,depth:int):
+    '''
+    alpha-beta negamax search. Moves are made and taken back on a single
+    Board with push()/pop(), so memory grows with the search depth rather than
+    with the size of the tree.
+
+    A transposition table <tt> may be shared with other searches, otherwise
+    one of config.hash_mb is created.
+
+    The search raises SearchAbortedError once <stop_event> is set, the
+    monotonic clock passes <deadline> or more than <node_limit> nodes have
+    been visited.
+    '''
+    def __init__(
+        self,game:Game,depth:int=4,config:Optional[SearchConfig]=None,
+        tt:Optional[TranspositionTable]=None
+    ):
         self.max_depth = depth
-        self.initial_state = GameState(
-            deepcopy(game),
-            game.get_material_advantage(),
+        self.config = config if config is not None else SearchConfig()
+        self.tt = tt if tt is not None else TranspositionTable(self.config.hash_mb)
+        self.ordering = MoveOrderer()
+        self.game = game
+        self.stats: Optional[SearchStats] = None
+        if self.config.collect_stats:
+            # instrumented versions of what the search calls, so a search
+            # without statistics runs the plain ones
+            self._evaluate = self._timed_evaluate
+            self._tt_probe = self._counted_tt_probe
+            self._tt_store = self._timed_tt_store
+            self._score_moves = self._timed_score_moves
+        else:
+            self._evaluate = evaluate
+            self._tt_probe = self.tt.probe
+            self._tt_store = self.tt.store
+            self._score_moves = self.ordering.score_moves
+        self.board = self._new_board()
+        self.color = game._current_player
+        self.nodes = 0
+        self.qnodes = 0
+        self._pv = []
+        self.stop_event: Optional[threading.Event] = None
+        self.deadline: Optional[float] = None
+        self.node_limit: Optional[int] = None
+        self._limited = False
+        self.tablebases = None
+        if self.config.tablebase_dir is not None:
+            # builds its square maps and rays on import: only load when used
+            from ..tablebase import open_tablebases
+            self.tablebases = open_tablebases(self.config.tablebase_dir)
+
+    def search(
+        self,depth:Optional[int]=None,alpha:int=-INFINITY,beta:int=INFINITY
+    ) -> SearchResult:
+        '''
+        search the root position to <depth> plies (default max_depth) within
+        the window (<alpha>,<beta>). If the score falls outside the window it
+        is only a bound, and best_move may be None after failing low.
+        '''
+        if depth is None:
+            depth = self.max_depth
+        self.nodes = 0
+        self.qnodes = 0
+        if self.config.collect_stats:
+            self.stats = SearchStats()
+            self.board.stats = self.stats
+            start = time.perf_counter()
+        self._pv = [[] for _ in range(depth + 1)]
+        self._limited = (
+            self.stop_event is not None or
+            self.deadline is not None or
+            self.node_limit is not None
+        )
+        try:
+            score = self._negamax(depth,0,alpha,beta,self.color)
+        except SearchAbortedError:
+            # the board is left mid-line, so start over from the game
+            self.board = self._new_board()
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.nodes = self.nodes
+                self.stats.qnodes = self.qnodes
+                self.stats.seconds = time.perf_counter() - start
+        pv = self._extend_pv(self._pv[0],depth)
+        return SearchResult(
+            best_move=pv[0] if pv else None,
+            score=score,
+            pv=pv,
+            depth=depth,
+            nodes=self.nodes,
+            qnodes=self.qnodes,
+            stats=self.stats
+        )
+
+    def _new_board(self) -> Board:
+        '''a copy of the game's board to search on'''
+        if not(self.config.collect_stats):
+            return Board.copy(self.game.current_board)
+        board = InstrumentedBoard.copy(self.game.current_board)
+        board.stats = self.stats
+        return board
+
+    # instrumented calls used when collecting statistics
+    def _timed_evaluate(self,board:Board,piece_color:bool) -> int:
+        return self.stats.timed('evaluation',evaluate,board,piece_color)
+
+    def _counted_tt_probe(self,key:int):
+        self.stats.tt_probes += 1
+        entry = self.stats.timed('tt',self.tt.probe,key)
+        if entry is not None:
+            self.stats.tt_hits += 1
+        return entry
+
+    def _timed_tt_store(self,*args) -> None:
+        self.stats.timed('tt',self.tt.store,*args)
+
+    def _timed_score_moves(self,*args) -> List[int]:
+        return self.stats.timed('ordering',self.ordering.score_moves,*args)
+
+    def _extend_pv(self,pv:List[Move],depth:int) -> List[Move]:
+        '''
+        complete a principal variation cut short by transposition table hits
+        by following the stored best moves
+        '''
+        pv = list(pv)
+        color = self.color
+        for move in pv:
+            self.board.push(move)
+            color = not(color)
+        seen = set()
+        while len(pv) < depth:
+            key = self.board.get_zobrist_hash(color)
+            entry = self.tt.probe(key)
+            if entry is None or entry.move == 0 or key in seen:
+                break
+            seen.add(key)
+            move = None
+            for m in self._generate_moves(color):
+                if m.get_code() == entry.move:
+                    self.board.push(m)
+                    if self.board.is_check(color):
+                        self.board.pop()
+                    else:
+                        move = m
+                    break
+            if move is None:
+                break
+            pv.append(move)
+            color = not(color)
+        for _ in pv:
+            self.board.pop()
+        return pv
+
+    def _generate_moves(self,piece_color:bool) -> List[Move]:
+        '''pseudolegal moves plus legal castling moves'''
+        moves = self.board.get_pseudolegal_moves(piece_color)
+        moves.extend(self.board.get_castling_moves(piece_color))
+        return moves
+
+    def _check_limits(self) -> None:
+        '''raise SearchAbortedError if the search has to stop'''
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchAbortedError
+        if (
+            self.node_limit is not None and
+            self.nodes + self.qnodes > self.node_limit
+        ):
+            raise SearchAbortedError
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchAbortedError
+
+    def _has_non_pawn_material(self,piece_color:bool) -> bool:
+        '''False in king and pawn endings, where passing may be the best move'''
+        pieces = self.board.squaresets[piece_color] & ~(
+            self.board.squaresets['PAWN'] | self.board.squaresets['KING']
+        )
+        return pieces.any()
 
+    def _negamax(
+        self,depth:int,ply:int,alpha:int,beta:int,piece_color:bool,
+        null_allowed:bool=True
+    ) -> int:
+        '''return the score of the current position for <piece_color>'''
+        self._pv[ply] = []
+        if depth == 0 and self.config.quiescence:
+            return self._quiescence(ply,alpha,beta,piece_color)
+        self.nodes += 1
+        if self._limited:
+            self._check_limits()
+        if depth == 0:
+            return self._evaluate(self.board,piece_color)
+        if (
+            self.tablebases is not None and ply > 0 and
+            self.board.squaresets['OCCUPIED'].count() <= self.tablebases.max_pieces
+        ):
+            dtm = self.tablebases.probe(self.board,piece_color)
+            if dtm is not None:
+                if dtm == 0:
+                    return 0
+                # mate <dtm> plies from here
+                return MATE_SCORE - ply - dtm if dtm > 0 else -MATE_SCORE + ply - dtm
+
+        key = self.board.get_zobrist_hash(piece_color)
+        entry = self._tt_probe(key)
+        tt_move = 0 if entry is None else entry.move
+        pv_node = beta - alpha > 1
+        if entry is not None and ply > 0 and not(pv_node) and entry.depth >= depth:
+            score = _score_from_tt(entry.score,ply)
+            if (
+                entry.bound == Bound.EXACT or
+                (entry.bound == Bound.LOWER and score >= beta) or
+                (entry.bound == Bound.UPPER and score <= alpha)
+            ):
+                if self.stats is not None:
+                    self.stats.tt_cutoffs += 1
+                return score
+
+        config = self.config
+        in_check = self.board.is_check(piece_color)
+        selective = ply > 0 and not(in_check) and abs(beta) < MATE_BOUND
+        static_eval = self._evaluate(self.board,piece_color) if selective else 0
+
+        # reverse futility pruning: too far above beta to fall back below it
+        if (
+            selective and config.reverse_futility_pruning and
+            depth <= config.futility_max_depth and
+            static_eval - config.reverse_futility_margin * depth >= beta
+        ):
+            return static_eval - config.reverse_futility_margin * depth
+
+        # null move pruning: even passing keeps the score above beta
+        if (
+            selective and config.null_move and null_allowed and depth >= 3 and
+            static_eval >= beta and self._has_non_pawn_material(piece_color)
+        ):
+            self.board.push_null()
+            score = -self._negamax(
+                max(depth - 1 - config.null_move_reduction,0),ply + 1,
+                -beta,-beta + 1,not(piece_color),False
+            )
+            self.board.pop()
+            if score >= beta:
+                return beta
+
+        futile = (
+            selective and config.futility_pruning and
+            depth <= config.futility_max_depth and
+            static_eval + config.futility_margin * depth <= alpha
         )
-        self.tree = Tree()
-        self.root = Node(0,0,data=GameState(game,game.get_material_advantage()))
-        self.tree.add_node(self.root)
-        self.create_children(self.root,1)
-
-    def create_children(self,node,i):
-        if i > self.max_depth:
-            return
-        legal_moves = node.data.game.current_board.get_legal_moves(node.data.game._current_player)
-        for move,board in legal_moves:
-            game = deepcopy(node.data.game)
-            game._post_move_update(move,board)
-            gamestate = GameState(game,game.get_material_advantage())
-            n = Node(data=gamestate)
-            self.tree.add_node(n,parent=node)
-            self.create_children(n,i+1)
+
+        alpha_original = alpha
+        best = -INFINITY
+        best_move = None
+        has_legal_move = False
+        n_searched = 0
+        moves = self._generate_moves(piece_color)
+        if config.move_ordering:
+            scores = self._score_moves(self.board,moves,tt_move,ply)
+            moves = pick_moves(moves,scores)
+        for move in moves:
+            quiet = move.move_type != 'attack' and move.promotion is None
+            self.board.push(move)
+            if self.board.is_check(piece_color):
+                self.board.pop()
+                continue
+            gives_check = None
+            if futile and quiet and has_legal_move:
+                gives_check = self.board.is_check(not(piece_color))
+                if not(gives_check):
+                    self.board.pop()
+                    continue
+            has_legal_move = True
+            n_searched += 1
+
+            reduction = 0
+            if (
+                config.late_move_reductions and quiet and not(in_check) and
+                depth >= config.lmr_min_depth and n_searched > config.lmr_min_moves
+            ):
+                if gives_check is None:
+                    gives_check = self.board.is_check(not(piece_color))
+                if not(gives_check):
+                    reduction = 1 if n_searched <= 2 * config.lmr_min_moves else 2
+            opponent = not(piece_color)
+            if n_searched == 1 or not(config.pvs or reduction):
+                score = -self._negamax(depth - 1,ply + 1,-beta,-alpha,opponent)
+            else:
+                # null window search: only prove the move is no better than alpha
+                score = -self._negamax(
+                    depth - 1 - reduction,ply + 1,-alpha - 1,-alpha,opponent
+                )
+                if score > alpha and reduction:
+                    # the reduced search was wrong about this move
+                    score = -self._negamax(
+                        depth - 1,ply + 1,-alpha - 1,-alpha,opponent
+                    )
+                if score > alpha and score < beta:
+                    score = -self._negamax(depth - 1,ply + 1,-beta,-alpha,opponent)
+            self.board.pop()
+
+            if score > best:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                self._pv[ply] = [move] + self._pv[ply + 1]
+            if alpha >= beta:
+                if self.stats is not None:
+                    self.stats.add_cutoff(n_searched - 1)
+                if move.move_type != 'attack' and move.promotion is None:
+                    self.ordering.update(move,depth,ply)
+                break
+
+        if not(has_legal_move):
+            if in_check:
+                best = -MATE_SCORE + ply
+            else:
+                best = 0
+
+        if best <= alpha_original:
+            bound = Bound.UPPER
+        elif best >= beta:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        self._tt_store(
+            key,depth,_score_to_tt(best,ply),bound,
+            best_move.get_code() if best_move is not None else 0
+        )
+        return best
+
+    def _quiescence(self,ply:int,alpha:int,beta:int,piece_color:bool) -> int:
+        '''
+        search captures and promotions only until the position is quiet. The
+        side to move may always stand pat on the static evaluation.
+        '''
+        self.qnodes += 1
+        if self._limited:
+            self._check_limits()
+
+        best = self._evaluate(self.board,piece_color)
+        if best >= beta:
+            return best
+        if best > alpha:
+            alpha = best
+
+        moves = [
+            m for m in self.board.get_pseudolegal_moves(piece_color)
+            if m.move_type == 'attack' or m.promotion is not None
+        ]
+        scores = [mvv_lva(self.board,m) for m in moves]
+        for move in pick_moves(moves,scores):
+            if move.promotion is None:
+                # delta pruning: even winning the victim outright won't reach alpha
+                victim = self.board.get_piece_name_at_index(move.to_square.index(1))
+                gain = 100 * core.PIECE_MATERIAL_POINTS[victim or 'PAWN']
+                if best + gain + self.config.delta_margin <= alpha:
+                    continue
+                if self.config.see_pruning and see_loss(self.board,move) < 0:
+                    continue
+            self.board.push(move)
+            if self.board.is_check(piece_color):
+                self.board.pop()
+                continue
+            score = -self._quiescence(ply + 1,-beta,-alpha,not(piece_color))
+            self.board.pop()
+
+            if score > best:
+                best = score
+            if score >= beta:
+                break
+            if score > alpha:
+                alpha = score
+        return best
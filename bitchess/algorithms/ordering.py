@@ -0,0 +1,118 @@
+'''move ordering heuristics for the alpha-beta search'''
+from ..board import Board, SEE_VALUES
+from ..move import Move
+from .. import core
+from typing import List, Iterator
+from array import array
+
+MAX_PLY = 128
+'''deepest ply with killer slots'''
+
+TT_MOVE_SCORE = 1000000
+CAPTURE_SCORE = 100000
+KILLER_SCORES = (90000,80000)
+HISTORY_LIMIT = 50000
+'''history scores are halved once one reaches this, keeping them below killers'''
+
+def mvv_lva(board:Board,move:Move) -> int:
+    '''
+    most valuable victim / least valuable attacker score of a capture or
+    promotion, 0 for quiet moves
+    '''
+    score = 0
+    if move.move_type == 'attack':
+        victim = board.get_piece_name_at_index(move.to_square.index(1))
+        if victim is None: # en passant
+            victim = 'PAWN'
+        score += 10 * core.PIECE_MATERIAL_POINTS[victim] - \
+            core.PIECE_MATERIAL_POINTS[move.piece_type] + 10
+    if move.promotion is not None:
+        score += 10 * core.PIECE_MATERIAL_POINTS[move.promotion]
+    return score
+
+def see_loss(board:Board,move:Move) -> int:
+    '''
+    static exchange score of a capture that loses material, 0 for any other
+    move. A capture of a piece worth at least the capturer can't lose, so
+    the exchange is only resolved for the rest.
+    '''
+    if move.move_type != 'attack' or move.promotion is not None:
+        return 0
+    victim = board.get_piece_name_at_index(move.to_square.index(1)) or 'PAWN'
+    if SEE_VALUES[victim] >= SEE_VALUES[move.piece_type]:
+        return 0
+    return min(board.see(move),0)
+
+def pick_moves(moves:List[Move],scores:List[int]) -> Iterator[Move]:
+    '''
+    yield <moves> from highest to lowest score. Each step selects the best of
+    the remaining moves, so a cutoff early on leaves the rest unsorted.
+    <moves> and <scores> are reordered in place.
+    '''
+    n = len(moves)
+    for i in range(n):
+        best = i
+        for j in range(i + 1,n):
+            if scores[j] > scores[best]:
+                best = j
+        if best != i:
+            moves[i],moves[best] = moves[best],moves[i]
+            scores[i],scores[best] = scores[best],scores[i]
+        yield moves[i]
+
+class MoveOrderer:
+    '''
+    scores moves for the search: transposition table move first, then
+    captures by MVV-LVA, then the two killer moves of the ply, then quiet moves
+    by their butterfly history score, then captures that lose material by
+    static exchange evaluation, least losing first.
+    '''
+    def __init__(self):
+        self.killers = [[0,0] for _ in range(MAX_PLY)]
+        '''move codes of quiet moves that caused a cutoff, per ply'''
+        self.history = array('i',[0]) * (2 * 64 * 64)
+        '''cutoff scores indexed by [color][from][to]'''
+
+    def clear(self) -> None:
+        '''forget killers and history'''
+        self.killers = [[0,0] for _ in range(MAX_PLY)]
+        self.history = array('i',[0]) * (2 * 64 * 64)
+
+    def score_moves(
+        self,board:Board,moves:List[Move],tt_move:int,ply:int
+    ) -> List[int]:
+        '''return ordering scores for <moves>, higher is searched first'''
+        killers = self.killers[ply] if ply < MAX_PLY else (0,0)
+        scores = []
+        for move in moves:
+            code = move.get_code()
+            if code == tt_move:
+                scores.append(TT_MOVE_SCORE)
+            elif move.move_type == 'attack' or move.promotion is not None:
+                loss = see_loss(board,move)
+                scores.append(loss if loss < 0 else CAPTURE_SCORE + mvv_lva(board,move))
+            elif code == killers[0]:
+                scores.append(KILLER_SCORES[0])
+            elif code == killers[1]:
+                scores.append(KILLER_SCORES[1])
+            else:
+                scores.append(self.history[self._history_index(move,code)])
+        return scores
+
+    def update(self,move:Move,depth:int,ply:int) -> None:
+        '''record a quiet move that caused a beta cutoff'''
+        code = move.get_code()
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != code:
+                killers[1] = killers[0]
+                killers[0] = code
+        i = self._history_index(move,code)
+        self.history[i] += depth * depth
+        if self.history[i] >= HISTORY_LIMIT:
+            for j in range(len(self.history)):
+                self.history[j] //= 2
+
+    @staticmethod
+    def _history_index(move:Move,code:int) -> int:
+        return (move.piece_color << 12) | (code & 0xFFF)
@@ -0,0 +1,110 @@
+'''root-splitting parallel search over a process pool'''
+from ..game import Game
+from .negamax import Negamax, SearchResult, SearchConfig, INFINITY, MATE_BOUND
+from .ordering import MoveOrderer, pick_moves
+from .transposition import TranspositionTable
+from .smp import moves_from_uci
+from typing import Optional
+import multiprocessing as mp
+
+# per-process state of pool workers, set by _init_worker
+_alpha = None
+_config = None
+_tt = None
+
+def _init_worker(alpha,config):
+    global _alpha,_config,_tt
+    _alpha = alpha
+    _config = config
+    _tt = TranspositionTable(config.hash_mb)
+
+def _search_root_move(task):
+    '''
+    search one root move. The window's lower bound is the best score any
+    worker has found so far, which is raised when this move beats it.
+    Returns (uci,score,exact,pv,nodes,qnodes), where score is only an upper
+    bound unless exact.
+    '''
+    fen,uci,depth = task
+    game = Game(fen=fen)
+    game.play_uci_move(uci)
+    alpha = _alpha.value
+    negamax = Negamax(game,config=_config,tt=_tt)
+    child = negamax.search(depth - 1,-INFINITY,-alpha)
+    score = -child.score
+    # mate scores count plies from the root move's position
+    if score >= MATE_BOUND:
+        score -= 1
+    elif score <= -MATE_BOUND:
+        score += 1
+    exact = score > alpha
+    if exact:
+        with _alpha.get_lock():
+            if score > _alpha.value:
+                _alpha.value = score
+    return (
+        uci,score,exact,[m.get_uci() for m in child.pv],child.nodes,child.qnodes
+    )
+
+class RootSplitSearch:
+    '''
+    fixed-depth search that splits the root moves across a process pool. Each
+    worker searches whole subtrees with its own transposition table and
+    shares only the root alpha bound. Tasks carry the position as a FEN
+    string and the root move as UCI, never Game objects.
+    '''
+    def __init__(self,n_workers:Optional[int]=None,config:Optional[SearchConfig]=None):
+        self.config = config if config is not None else SearchConfig()
+        self.alpha = mp.Value('i',-INFINITY)
+        self.pool = mp.Pool(
+            n_workers,initializer=_init_worker,initargs=(self.alpha,self.config)
+        )
+        self.nodes = 0
+        self.qnodes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def close(self) -> None:
+        '''shut down the pool'''
+        self.pool.close()
+        self.pool.join()
+
+    def search(self,game:Game,depth:int) -> SearchResult:
+        '''search <game> to <depth> plies and merge the workers' results'''
+        board = game.current_board
+        color = game._current_player
+        legal = [move for move,_ in board.get_legal_moves(color)]
+        if not(legal):
+            return Negamax(game,config=self.config).search(1)
+        # likely best moves first, so the shared bound tightens early
+        scores = MoveOrderer().score_moves(board,legal,0,0)
+        fen = game.get_fen()
+        tasks = [(fen,m.get_uci(),depth) for m in pick_moves(legal,scores)]
+
+        self.alpha.value = -INFINITY
+        self.nodes = self.qnodes = 0
+        best = None
+        for result in self.pool.imap_unordered(_search_root_move,tasks):
+            uci,score,exact,pv,nodes,qnodes = result
+            self.nodes += nodes
+            self.qnodes += qnodes
+            if (
+                best is None or score > best[1] or
+                (score == best[1] and exact and not(best[2]))
+            ):
+                best = result
+
+        uci,score,_,pv,_,_ = best
+        pv = moves_from_uci(board,color,[uci] + pv)
+        return SearchResult(
+            best_move=pv[0],
+            score=score,
+            pv=pv,
+            depth=depth,
+            nodes=self.nodes,
+            qnodes=self.qnodes
+        )
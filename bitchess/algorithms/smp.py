@@ -0,0 +1,147 @@
+'''lazy SMP: parallel search in several processes sharing one transposition table'''
+from ..game import Game
+from ..board import Board
+from ..move import Move
+from .negamax import SearchResult, SearchConfig
+from .deepening import IterativeDeepening, SearchLimits, SearchInfo
+from .transposition import TranspositionTable
+from typing import Optional, List, Callable
+import multiprocessing as mp
+
+def moves_from_uci(board:Board,piece_color:bool,ucis:List[str]) -> List[Move]:
+    '''
+    convert a line of long algebraic moves starting with <piece_color> to
+    Move objects, stopping at the first move that isn't legal
+    '''
+    moves = []
+    for uci in ucis:
+        move = board.get_move_from_uci(uci,piece_color)
+        if move is None:
+            break
+        board.push(move)
+        moves.append(move)
+        piece_color = not(piece_color)
+    for _ in moves:
+        board.pop()
+    return moves
+
+def _helper_main(worker_id,shm_name,config,conn,stop_event):
+    '''
+    helper process: attach to the shared table, then search each (fen,limits)
+    task until told to stop, sending back a compact summary of the result
+    '''
+    tt = TranspositionTable.attach(shm_name,config.hash_mb)
+    try:
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            fen,limits = task
+            search = IterativeDeepening(
+                Game(fen=fen),limits,stop_event,config=config,tt=tt,
+                # helpers skip ahead so they don't all search the same depth
+                start_depth=1 + worker_id % 2
+            )
+            try:
+                result = search.search()
+            except Exception:
+                # the main search doesn't depend on helpers; report nothing
+                conn.send((0,0,[],search.nodes,search.qnodes))
+                continue
+            conn.send((
+                result.depth,result.score,[m.get_uci() for m in result.pv],
+                search.nodes,search.qnodes
+            ))
+    finally:
+        tt.close()
+
+class LazySMP:
+    '''
+    lazy SMP search. The calling process runs the main iterative deepening
+    search while <n_workers> - 1 helper processes search the same position,
+    all reading and writing one transposition table in shared memory. The
+    helpers fill the table with results the main search then finds, and stop
+    when the main search finishes.
+
+    Helper processes are started once and reused across searches; call close()
+    (or use the object as a context manager) to shut them down.
+    '''
+    def __init__(self,n_workers:int=2,config:Optional[SearchConfig]=None):
+        self.n_workers = max(n_workers,1)
+        self.config = config if config is not None else SearchConfig()
+        self.tt = TranspositionTable.shared(self.config.hash_mb)
+        self.stop_event = mp.Event()
+        self.nodes = 0
+        self.qnodes = 0
+        self._conns = []
+        self._processes = []
+        for i in range(1,self.n_workers):
+            parent_conn,child_conn = mp.Pipe()
+            p = mp.Process(
+                target=_helper_main,
+                args=(i,self.tt.shm_name,self.config,child_conn,self.stop_event),
+                daemon=True
+            )
+            p.start()
+            self._conns.append(parent_conn)
+            self._processes.append(p)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def stop(self) -> None:
+        '''ask a running search to stop'''
+        self.stop_event.set()
+
+    def close(self) -> None:
+        '''stop the helper processes and free the shared table'''
+        self.stop_event.set()
+        for conn in self._conns:
+            conn.send(None)
+        for p in self._processes:
+            p.join()
+        self._conns,self._processes = [],[]
+        self.tt.close(unlink=True)
+
+    def search(
+        self,game:Game,limits:Optional[SearchLimits]=None,
+        callback:Optional[Callable[[SearchInfo],None]]=None
+    ) -> SearchResult:
+        '''
+        search <game> with all workers and return the result of the deepest
+        completed iteration, preferring the main search on ties
+        '''
+        limits = limits if limits is not None else SearchLimits()
+        self.stop_event.clear()
+        fen = game.get_fen()
+        for conn in self._conns:
+            conn.send((fen,limits))
+
+        main = IterativeDeepening(
+            game,limits,self.stop_event,callback,config=self.config,tt=self.tt
+        )
+        try:
+            result = main.search()
+        finally:
+            self.stop_event.set()
+        self.nodes,self.qnodes = main.nodes,main.qnodes
+        best_helper = None
+        for conn in self._conns:
+            helper = conn.recv()
+            self.nodes += helper[3]
+            self.qnodes += helper[4]
+            if helper[0] > result.depth and (
+                best_helper is None or helper[0] > best_helper[0]
+            ):
+                best_helper = helper
+        if best_helper is not None:
+            depth,score,ucis,_,_ = best_helper
+            pv = moves_from_uci(game.current_board,game._current_player,ucis)
+            if pv:
+                result = SearchResult(pv[0],score,pv,depth)
+        result.nodes = self.nodes
+        result.qnodes = self.qnodes
+        return result
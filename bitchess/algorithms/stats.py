@@ -0,0 +1,148 @@
+'''
+opt-in search statistics, enabled with SearchConfig.collect_stats. When
+disabled the search uses the plain Board and functions, so the only cost
+is a None check at the rare cutoff sites.
+'''
+from ..board import Board
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+import time
+
+PHASES = ('movegen','check','make_unmake','evaluation','ordering','tt')
+'''
+phases timed separately. Time is charged to the outermost phase only: the
+move generation inside a check test counts as check.
+'''
+
+@dataclass
+class SearchStats:
+    '''counters and timings of one or more searches'''
+    nodes: int = 0
+    qnodes: int = 0
+    tt_probes: int = 0
+    tt_hits: int = 0
+    tt_cutoffs: int = 0
+    '''nodes answered by a stored score without searching'''
+    beta_cutoffs: List[int] = field(default_factory=list)
+    '''main search beta cutoffs by index of the cutting move (0 = first)'''
+    movegen_calls: int = 0
+    makes: int = 0
+    '''moves made, null moves included'''
+    unmakes: int = 0
+    times: Dict[str,float] = field(default_factory=lambda: dict.fromkeys(PHASES,0.0))
+    '''seconds spent in each of PHASES'''
+    seconds: float = 0.0
+    '''wall time of the searches'''
+
+    def __post_init__(self):
+        self._active = False
+
+    @property
+    def cutoffs(self) -> int:
+        return sum(self.beta_cutoffs)
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        '''share of beta cutoffs made by the first move searched'''
+        return self.beta_cutoffs[0] / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def nps(self) -> int:
+        return int((self.nodes + self.qnodes) / self.seconds) if self.seconds > 0 else 0
+
+    def add_cutoff(self,move_index:int) -> None:
+        if move_index >= len(self.beta_cutoffs):
+            self.beta_cutoffs.extend([0] * (move_index + 1 - len(self.beta_cutoffs)))
+        self.beta_cutoffs[move_index] += 1
+
+    def merge(self,other:'SearchStats') -> None:
+        '''add the counts and times of <other> to these'''
+        for name in (
+            'nodes','qnodes','tt_probes','tt_hits','tt_cutoffs',
+            'movegen_calls','makes','unmakes','seconds'
+        ):
+            setattr(self,name,getattr(self,name) + getattr(other,name))
+        missing = len(other.beta_cutoffs) - len(self.beta_cutoffs)
+        self.beta_cutoffs.extend([0] * max(missing,0))
+        for i,n in enumerate(other.beta_cutoffs):
+            self.beta_cutoffs[i] += n
+        for phase,seconds in other.times.items():
+            self.times[phase] = self.times.get(phase,0.0) + seconds
+
+    def copy(self) -> 'SearchStats':
+        out = SearchStats()
+        out.merge(self)
+        return out
+
+    def to_dict(self) -> dict:
+        '''plain counters and times, e.g. to save as JSON'''
+        return asdict(self)
+
+    def timed(self,phase:str,func,*args):
+        '''call <func> with <args>, charging the time to <phase>'''
+        if self._active:
+            return func(*args)
+        self._active = True
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.times[phase] += time.perf_counter() - start
+            self._active = False
+
+    def table(self) -> str:
+        '''human-readable summary'''
+        lines = [
+            f'nodes {self.nodes} qnodes {self.qnodes} nps {self.nps}',
+            f'tt probes {self.tt_probes} hits {self.tt_hits} '
+            f'({self.tt_hit_rate:.1%}) cutoffs {self.tt_cutoffs}',
+            f'beta cutoffs {self.cutoffs} first move {self.first_move_cutoff_rate:.1%} '
+            f'by move {self.beta_cutoffs[:8]}',
+            f'movegen {self.movegen_calls} makes {self.makes} unmakes {self.unmakes}',
+        ]
+        for phase,seconds in self.times.items():
+            share = seconds / self.seconds if self.seconds > 0 else 0.0
+            lines.append(f'{phase:12s} {seconds:8.3f}s {share:6.1%}')
+        return '\n'.join(lines)
+
+class InstrumentedBoard(Board):
+    '''Board that counts and times the search's calls into it in <stats>'''
+    stats: Optional[SearchStats] = None
+
+    def get_pseudolegal_moves(self,piece_color):
+        if self.stats is None or self.stats._active:
+            return Board.get_pseudolegal_moves(self,piece_color)
+        self.stats.movegen_calls += 1
+        return self.stats.timed('movegen',Board.get_pseudolegal_moves,self,piece_color)
+
+    def get_castling_moves(self,piece_color):
+        if self.stats is None:
+            return Board.get_castling_moves(self,piece_color)
+        return self.stats.timed('movegen',Board.get_castling_moves,self,piece_color)
+
+    def is_check(self,piece_color):
+        if self.stats is None:
+            return Board.is_check(self,piece_color)
+        return self.stats.timed('check',Board.is_check,self,piece_color)
+
+    def push(self,move):
+        if self.stats is None:
+            return Board.push(self,move)
+        self.stats.makes += 1
+        return self.stats.timed('make_unmake',Board.push,self,move)
+
+    def push_null(self):
+        if self.stats is None:
+            return Board.push_null(self)
+        self.stats.makes += 1
+        return self.stats.timed('make_unmake',Board.push_null,self)
+
+    def pop(self):
+        if self.stats is None:
+            return Board.pop(self)
+        self.stats.unmakes += 1
+        return self.stats.timed('make_unmake',Board.pop,self)
@@ -0,0 +1,183 @@
+'''fixed-size transposition table'''
+from typing import Optional, NamedTuple
+from array import array
+from enum import IntEnum
+
+class Bound(IntEnum):
+    '''how a stored score relates to the true score of the position'''
+    EMPTY = 0
+    EXACT = 1
+    LOWER = 2
+    '''score is a lower bound (fail high)'''
+    UPPER = 3
+    '''score is an upper bound (fail low)'''
+
+class TTEntry(NamedTuple):
+    depth: int
+    score: int
+    bound: Bound
+    move: int
+    '''16-bit move code (see Move.get_code), 0 if none'''
+
+ENTRY_SIZE = 16
+'''bytes per entry: checked key 8, packed data 8'''
+
+BUCKET_SIZE = 2
+'''slot 0 is depth-preferred, slot 1 is always replaced'''
+
+def _pack(depth:int,score:int,bound:int,move:int,age:int) -> int:
+    '''
+    pack an entry into 64 bits: score (bits 0-31, two's complement), move
+    (bits 32-47), depth (bits 48-55), bound (bits 56-57) and age (bits 58-63)
+    '''
+    return (
+        (score & 0xFFFFFFFF) | move << 32 | (depth & 0xFF) << 48 |
+        bound << 56 | age << 58
+    )
+
+def _unpack(data:int) -> TTEntry:
+    score = data & 0xFFFFFFFF
+    if score >= 0x80000000:
+        score -= 0x100000000
+    return TTEntry(
+        data >> 48 & 0xFF,score,Bound(data >> 56 & 3),data >> 32 & 0xFFFF
+    )
+
+def table_bytes(size_mb:float) -> int:
+    '''number of bytes a table of <size_mb> megabytes actually uses'''
+    n_buckets = max(int(size_mb * 2**20) // (ENTRY_SIZE * BUCKET_SIZE),1)
+    # round down to a power of two so the bucket is a mask of the key
+    n_buckets = 1 << (n_buckets.bit_length() - 1)
+    return n_buckets * BUCKET_SIZE * ENTRY_SIZE
+
+class TranspositionTable:
+    '''
+    transposition table keyed by 64-bit zobrist hash. Entries are kept in two
+    preallocated parallel columns of 64-bit words; the number of entries is
+    fixed by <size_mb>.
+
+    Each bucket has a depth-preferred slot, replaced only by deeper searches
+    or entries from a newer search, and an always-replace slot.
+
+    The key column holds key ^ data, so an entry torn by two processes
+    writing at once no longer matches its key and reads as a miss. That makes
+    the table safe to share between processes without locks: pass a writable
+    <buffer> of table_bytes(size_mb) bytes (see shared() and attach()).
+    '''
+    def __init__(self,size_mb:float=16,buffer=None):
+        n_bytes = table_bytes(size_mb)
+        self.n_entries = n_bytes // ENTRY_SIZE
+        self._mask = self.n_entries // BUCKET_SIZE - 1
+        self._shm = None
+        if buffer is None:
+            self.keys = array('Q',[0]) * self.n_entries
+            self.data = array('Q',[0]) * self.n_entries
+        else:
+            view = memoryview(buffer)
+            half = self.n_entries * 8
+            self.keys = view[:half].cast('Q')
+            self.data = view[half:n_bytes].cast('Q')
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    @classmethod
+    def shared(cls,size_mb:float=16) -> 'TranspositionTable':
+        '''create a table in a new shared memory block, named by shm_name'''
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(create=True,size=table_bytes(size_mb))
+        tt = cls(size_mb,shm.buf)
+        tt._shm = shm
+        tt.clear()
+        return tt
+
+    @classmethod
+    def attach(cls,name:str,size_mb:float) -> 'TranspositionTable':
+        '''
+        attach to a table created with shared() by the parent process (child
+        processes share the parent's resource tracker, which unlinks the block
+        only if the creator never does)
+        '''
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name)
+        tt = cls(size_mb,shm.buf)
+        tt._shm = shm
+        return tt
+
+    @property
+    def shm_name(self) -> Optional[str]:
+        '''name of the shared memory block, None for a private table'''
+        return None if self._shm is None else self._shm.name
+
+    def close(self,unlink:bool=False) -> None:
+        '''
+        detach from shared memory. The creator passes <unlink> to free it once
+        all processes are done
+        '''
+        if self._shm is None:
+            return
+        self.keys.release()
+        self.data.release()
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+
+    def clear(self) -> None:
+        '''empty the table and reset counters'''
+        zeros = array('Q',[0]) * self.n_entries
+        self.keys[:] = zeros
+        self.data[:] = zeros
+        self.age = 0
+        self.probes = self.hits = self.stores = self.collisions = 0
+
+    def new_search(self) -> None:
+        '''age the table so entries of earlier searches are replaced first'''
+        self.age = (self.age + 1) & 0x3F
+
+    def probe(self,key:int) -> Optional[TTEntry]:
+        '''return the entry stored for <key>, None if there is none'''
+        self.probes += 1
+        i = (key & self._mask) * BUCKET_SIZE
+        for j in range(i,i + BUCKET_SIZE):
+            data = self.data[j]
+            if self.keys[j] ^ data == key and data >> 56 & 3:
+                self.hits += 1
+                return _unpack(data)
+        return None
+
+    def store(self,key:int,depth:int,score:int,bound:Bound,move:int=0) -> None:
+        '''store a search result for <key>'''
+        i = (key & self._mask) * BUCKET_SIZE
+        data = self.data[i]
+        if (
+            self.keys[i] ^ data == key or
+            not(data >> 56 & 3) or
+            data >> 58 != self.age or
+            depth >= data >> 48 & 0xFF
+        ):
+            j = i
+        else:
+            j = i + 1
+            data = self.data[j]
+        if self.keys[j] ^ data == key:
+            if move == 0:
+                # keep the best move of an earlier search of this position
+                move = data >> 32 & 0xFFFF
+        elif data >> 56 & 3:
+            self.collisions += 1
+        data = _pack(depth,score,bound,move,self.age)
+        self.data[j] = data
+        self.keys[j] = key ^ data
+        self.stores += 1
+
+    def hashfull(self) -> int:
+        '''permille of the first 1000 entries written during this search'''
+        n = min(1000,self.n_entries)
+        used = sum(
+            1 for j in range(n)
+            if self.data[j] >> 56 & 3 and self.data[j] >> 58 == self.age
+        )
+        return used * 1000 // n
@@ -0,0 +1,248 @@
+'''
+vectorized evaluation of many positions at once.
+
+Positions are packed into an (N,12) uint64 array of piece bitboards, one
+column per PIECE_PLANES entry, with bit i set for square i (a1=0, h8=63). All
+terms are then computed for the whole batch with NumPy bit operations and
+table lookups instead of one Board at a time.
+'''
+from . import core, evaluation, pawns
+from bitarray import bitarray
+from typing import List, Optional
+import numpy as np
+
+PIECE_PLANES = [
+    (color,p) for color in (core.Color.WHITE,core.Color.BLACK)
+    for p in core.PIECE_NAMES
+]
+'''(color,piece) of each bitboard column: white pawn..king, then black'''
+
+_ALL = np.uint64(0xFFFFFFFFFFFFFFFF)
+_NOT_A = np.uint64(0xFEFEFEFEFEFEFEFE)
+_NOT_H = np.uint64(0x7F7F7F7F7F7F7F7F)
+
+# square index offset of each direction and the mask clearing squares that
+# wrapped around the board edge
+NORTH,SOUTH,EAST,WEST = (8,_ALL),(-8,_ALL),(1,_NOT_A),(-1,_NOT_H)
+NORTHEAST,NORTHWEST = (9,_NOT_A),(7,_NOT_H)
+SOUTHEAST,SOUTHWEST = (-7,_NOT_A),(-9,_NOT_H)
+
+_ORTHOGONALS = (NORTH,SOUTH,EAST,WEST)
+_DIAGONALS = (NORTHEAST,NORTHWEST,SOUTHEAST,SOUTHWEST)
+_KING_STEPS = _ORTHOGONALS + _DIAGONALS
+_NOT_AB = np.uint64(0xFCFCFCFCFCFCFCFC)
+_NOT_GH = np.uint64(0x3F3F3F3F3F3F3F3F)
+_KNIGHT_JUMPS = (
+    (17,_NOT_A),(15,_NOT_H),(10,_NOT_AB),(6,_NOT_GH),
+    (-6,_NOT_AB),(-10,_NOT_GH),(-15,_NOT_A),(-17,_NOT_H)
+)
+
+def _shift(bb:np.ndarray,direction) -> np.ndarray:
+    '''shift every bitboard of <bb> one square in <direction>'''
+    offset,mask = direction
+    if offset > 0:
+        return (bb << np.uint64(offset)) & mask
+    return (bb >> np.uint64(-offset)) & mask
+
+def _fill(bb:np.ndarray,empty:np.ndarray,direction) -> np.ndarray:
+    '''
+    occluded (Kogge-Stone) fill of <bb> in <direction> through <empty>
+    squares, including the starting squares
+    '''
+    offset,mask = direction
+    empty = empty & mask
+    for n in (1,2,4):
+        step = offset * n
+        if step > 0:
+            bb = bb | (empty & (bb << np.uint64(step)))
+            empty = empty & (empty << np.uint64(step))
+        else:
+            bb = bb | (empty & (bb >> np.uint64(-step)))
+            empty = empty & (empty >> np.uint64(-step))
+    return bb
+
+def _slider_attacks(bb:np.ndarray,empty:np.ndarray,directions) -> np.ndarray:
+    '''squares attacked by the sliding pieces <bb> along <directions>'''
+    attacks = np.zeros_like(bb)
+    for direction in directions:
+        attacks |= _shift(_fill(bb,empty,direction),direction)
+    return attacks
+
+def _popcount(bb:np.ndarray) -> np.ndarray:
+    '''number of set bits of each bitboard, as int64'''
+    if hasattr(np,'bitwise_count'):
+        return np.bitwise_count(bb).astype(np.int64)
+    bits = np.unpackbits(bb[...,None].view(np.uint8),axis=-1)
+    return bits.sum(axis=-1,dtype=np.int64)
+
+def _squares(bb:np.ndarray) -> np.ndarray:
+    '''unpack bitboards to 0/1 uint8 arrays with a trailing axis of 64 squares'''
+    b = np.ascontiguousarray(bb,dtype='<u8')
+    bits = np.unpackbits(b[...,None].view(np.uint8),axis=-1,bitorder='little')
+    return bits
+
+def writable(out:np.ndarray) -> bool:
+    '''can squaresets be written straight into the memory of <out>'''
+    return out.dtype == np.dtype('<u8') and out.flags.c_contiguous and out.flags.writeable
+
+def write_squaresets(out:np.ndarray,column:int,squaresets) -> None:
+    '''
+    copy one squareset per row into <column> of <out>, an (N,k) little-endian
+    uint64 array for which writable() holds, through bitarray views of its
+    memory. Each item of <squaresets> is a squareset or a tuple of them to
+    intersect.
+    '''
+    buffer = memoryview(out).cast('B')
+    row = 8 * out.shape[1]
+    start = 8 * column
+    for squares in squaresets:
+        view = bitarray(buffer=buffer[start:start + 8],endian='little')
+        if isinstance(squares,tuple):
+            view[:] = squares[0]
+            for other in squares[1:]:
+                view &= other
+        else:
+            view[:] = squares
+        start += row
+
+def write_pieces(boards:List,out:np.ndarray) -> None:
+    '''write the piece bitboards of <boards> into the first 12 columns of <out>'''
+    for j,(color,p) in enumerate(PIECE_PLANES):
+        write_squaresets(
+            out,j,((board.squaresets[p],board.squaresets[color]) for board in boards)
+        )
+
+def pack_boards(boards:List,out:Optional[np.ndarray]=None) -> np.ndarray:
+    '''
+    pack <boards> into an (N,12) uint64 array of piece bitboards (see
+    PIECE_PLANES), written into <out> if given
+    '''
+    shape = (len(boards),len(PIECE_PLANES))
+    if out is None:
+        out = np.empty(shape,dtype='<u8')
+    target = out if writable(out) else np.empty(shape,dtype='<u8')
+    write_pieces(boards,target)
+    if target is not out:
+        out[...] = target
+    return out
+
+def material(bitboards:np.ndarray) -> np.ndarray:
+    '''
+    (N,2) material points of white and black, as Board.count_material
+    '''
+    points = np.array(
+        [core.PIECE_MATERIAL_POINTS[p] for _,p in PIECE_PLANES],dtype=np.int64
+    )
+    counts = _popcount(bitboards) * points
+    return np.stack([counts[:,:6].sum(axis=1),counts[:,6:].sum(axis=1)],axis=1)
+
+def _knight_attacks(knights:np.ndarray) -> np.ndarray:
+    attacks = np.zeros_like(knights)
+    for direction in _KNIGHT_JUMPS:
+        attacks |= _shift(knights,direction)
+    return attacks
+
+def _king_attacks(kings:np.ndarray) -> np.ndarray:
+    attacks = np.zeros_like(kings)
+    for direction in _KING_STEPS:
+        attacks |= _shift(kings,direction)
+    return attacks
+
+def mobility(bitboards:np.ndarray) -> np.ndarray:
+    '''
+    (N,2) approximate mobility of white and black: for each piece type
+    except pawns, the number of squares its pieces attack that aren't
+    occupied by their own side. Attacks of two pieces of the same type are
+    merged, so a square both reach counts once; pins and checks are ignored.
+    '''
+    white = np.bitwise_or.reduce(bitboards[:,:6],axis=1)
+    black = np.bitwise_or.reduce(bitboards[:,6:],axis=1)
+    empty = ~(white | black)
+    out = np.empty((len(bitboards),2),dtype=np.int64)
+    for side,(offset,own) in enumerate(((0,white),(6,black))):
+        knights,bishops,rooks,queens,kings = (
+            bitboards[:,offset + i] for i in range(1,6)
+        )
+        attacks = (
+            _knight_attacks(knights),
+            _slider_attacks(bishops,empty,_DIAGONALS),
+            _slider_attacks(rooks,empty,_ORTHOGONALS),
+            _slider_attacks(queens,empty,_KING_STEPS),
+            _king_attacks(kings)
+        )
+        out[:,side] = sum(_popcount(a & ~own) for a in attacks)
+    return out
+
+def _pawn_side(own:np.ndarray,enemy:np.ndarray,piece_color:bool):
+    '''vectorized pawns.evaluate_side: (mg,eg) arrays for <piece_color>'''
+    full = np.full_like(own,_ALL)
+    forward,back = (NORTH,SOUTH) if piece_color else (SOUTH,NORTH)
+    front_fill = lambda bb: _fill(bb,full,forward)
+    rear_fill = lambda bb: _fill(bb,full,back)
+    adjacent = lambda bb: _shift(bb,EAST) | _shift(bb,WEST)
+    if piece_color:
+        enemy_attacks = _shift(enemy,SOUTHEAST) | _shift(enemy,SOUTHWEST)
+    else:
+        enemy_attacks = _shift(enemy,NORTHEAST) | _shift(enemy,NORTHWEST)
+    own_front = front_fill(_shift(own,forward))
+    enemy_front = rear_fill(_shift(enemy,back))
+
+    doubled = own & rear_fill(_shift(own,back))
+    passed = own & ~doubled & ~(enemy_front | adjacent(enemy_front))
+    isolated = own & ~adjacent(own_front | rear_fill(own))
+    covered = adjacent(own_front)
+    backward = own & ~isolated & _shift(
+        _shift(own,forward) & enemy_attacks & ~covered,back
+    )
+
+    counts = [_popcount(bb) for bb in (doubled,isolated,backward)]
+    passed_squares = _squares(passed).astype(np.int64)
+    out = []
+    for phase in (0,1):
+        weights = (pawns.DOUBLED[phase],pawns.ISOLATED[phase],pawns.BACKWARD[phase])
+        by_square = np.array([
+            pawns.PASSED[i // 8 if piece_color else 7 - i // 8][phase]
+            for i in range(64)
+        ],dtype=np.int64)
+        out.append(
+            sum(c * w for c,w in zip(counts,weights)) + passed_squares @ by_square
+        )
+    return out
+
+def pawn_structure(bitboards:np.ndarray) -> np.ndarray:
+    '''(N,2) middlegame and endgame pawn-structure scores, white minus black'''
+    white,black = bitboards[:,0],bitboards[:,6]
+    white_mg,white_eg = _pawn_side(white,black,core.Color.WHITE)
+    black_mg,black_eg = _pawn_side(black,white,core.Color.BLACK)
+    return np.stack([white_mg - black_mg,white_eg - black_eg],axis=1)
+
+def evaluate(
+    bitboards:np.ndarray,piece_colors:Optional[np.ndarray]=None
+) -> np.ndarray:
+    '''
+    static evaluation of each packed position, equal to
+    evaluation.evaluate of the same board. Scores are from white's point of
+    view unless <piece_colors> gives the side for each position (True for
+    white).
+    '''
+    n = len(bitboards)
+    mg_table = np.array(
+        [evaluation.MG[color][p] for color,p in PIECE_PLANES],dtype=np.int64
+    ).reshape(-1)
+    eg_table = np.array(
+        [evaluation.EG[color][p] for color,p in PIECE_PLANES],dtype=np.int64
+    ).reshape(-1)
+    phase_weights = np.array(
+        [evaluation.PHASE_WEIGHTS[p] for _,p in PIECE_PLANES],dtype=np.int64
+    )
+    squares = _squares(bitboards).reshape(n,-1)
+    structure = pawn_structure(bitboards)
+    mg = squares @ mg_table + structure[:,0]
+    eg = squares @ eg_table + structure[:,1]
+    phase = np.minimum(_popcount(bitboards) @ phase_weights,evaluation.MAX_PHASE)
+    total = mg * phase + eg * (evaluation.MAX_PHASE - phase)
+    # rounded toward zero like evaluation.evaluate, before any sign flip
+    score = np.sign(total) * (np.abs(total) // evaluation.MAX_PHASE)
+    if piece_colors is not None:
+        score = np.where(np.asarray(piece_colors,dtype=bool),score,-score)
+    return score
@@ -0,0 +1,4 @@
+'''
+benchmark suite for the board, move generation and search. Run it with the
+bitchess-bench console script; see run.main.
+'''
@@ -0,0 +1,24 @@
+'''fixed positions the benchmarks run on'''
+
+POSITIONS = [
+    # start position
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    # "kiwipete": castling, en passant and promotions in one position
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    # open middlegame
+    'r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8',
+    # rook endgame
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    # promotions and checks
+    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+]
+
+PERFT = [
+    (POSITIONS[0],3,8902),
+    (POSITIONS[1],2,2039),
+    (POSITIONS[3],3,2812),
+]
+'''(fen,depth,expected leaf count)'''
+
+SEARCH_DEPTH = 3
+'''depth of the NPS benchmark searches'''
@@ -0,0 +1,310 @@
+'''
+run the benchmarks, write the results as JSON and compare them with a
+baseline. Each benchmark reports the best time per operation over a number
+of repeats; a benchmark regresses when that time grows by more than the
+threshold percentage over the baseline.
+
+The baseline is recorded with --save-baseline on the machine that compares
+with it, in the cache directory by default; timings from another machine
+say nothing about a regression. Without one, nothing is compared.
+'''
+from ..board import Board
+from ..game import Game
+from ..perft import perft
+from ..tables import cache_dir
+from ..algorithms.negamax import Negamax
+from .positions import POSITIONS, PERFT, SEARCH_DEPTH
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+def default_baseline() -> str:
+    '''the baseline of this machine, in the cache directory'''
+    return os.path.join(cache_dir(),'benchmark-baseline.json')
+
+DEFAULT_THRESHOLD = 10.0
+'''percent slowdown tolerated before a benchmark counts as a regression'''
+
+MIN_SECONDS = 0.2
+'''each measurement repeats a benchmark's pass until it has run this long'''
+
+BENCHMARKS: Dict[str,Callable[[],Callable[[],int]]] = {}
+'''
+name to setup function. The setup returns a pass of the benchmark: a
+function doing the timed work and returning its number of operations
+'''
+
+def benchmark(func):
+    '''register <func> under its name'''
+    BENCHMARKS[func.__name__] = func
+    return func
+
+def _positions() -> List[Tuple[Board,bool]]:
+    return [
+        (game.current_board,game._current_player)
+        for game in (Game(fen) for fen in POSITIONS)
+    ]
+
+def _measure(run:Callable[[],int],min_seconds:float) -> Tuple[int,float]:
+    '''(operations,seconds) of as many passes of <run> as fit <min_seconds>'''
+    ops,seconds = 0,0.0
+    gc.disable()
+    try:
+        while seconds < min_seconds or ops == 0:
+            start = time.perf_counter()
+            ops += run()
+            seconds += time.perf_counter() - start
+    finally:
+        gc.enable()
+    return ops,seconds
+
+@benchmark
+def fen_parsing() -> Callable[[],int]:
+    boards = [Board(fen) for fen in POSITIONS]
+    def run():
+        for board in boards:
+            board._squaresets_from_fen()
+        return len(boards)
+    return run
+
+@benchmark
+def pseudolegal_movegen() -> Callable[[],int]:
+    positions = _positions()
+    def run():
+        for board,color in positions:
+            board.get_pseudolegal_moves(color)
+        return len(positions)
+    return run
+
+@benchmark
+def legal_movegen() -> Callable[[],int]:
+    positions = _positions()
+    def run():
+        for board,color in positions:
+            board.get_legal_moves(color)
+        return len(positions)
+    return run
+
+@benchmark
+def make_move() -> Callable[[],int]:
+    # each move is made and taken back on its board: make_move itself
+    # can't be undone
+    pairs = [
+        (board,move)
+        for board,color in _positions()
+        for move in board.get_pseudolegal_moves(color)
+    ]
+    def run():
+        for board,move in pairs:
+            board.push(move)
+            board.pop()
+        return len(pairs)
+    return run
+
+@benchmark
+def is_check() -> Callable[[],int]:
+    positions = _positions()
+    def run():
+        for board,color in positions:
+            board.is_check(color)
+        return len(positions)
+    return run
+
+@benchmark
+def count_material() -> Callable[[],int]:
+    boards = [board for board,_ in _positions()]
+    def run():
+        for board in boards:
+            board.count_material()
+        return len(boards)
+    return run
+
+@benchmark
+def get_fen() -> Callable[[],int]:
+    games = [Game(fen) for fen in POSITIONS]
+    def run():
+        for game in games:
+            game.get_fen()
+        return len(games)
+    return run
+
+@benchmark
+def perft_nodes() -> Callable[[],int]:
+    games = [(Game(fen),depth,expected) for fen,depth,expected in PERFT]
+    def run():
+        total = 0
+        for game,depth,expected in games:
+            n = perft(game.current_board,game._current_player,depth)
+            if n != expected:
+                raise RuntimeError(
+                    f'perft({depth}) of {game.fen} is {n}, expected {expected}'
+                )
+            total += n
+        return total
+    return run
+
+@benchmark
+def search_nodes() -> Callable[[],int]:
+    '''time per node of fixed-depth searches: the inverse of NPS'''
+    def run():
+        total = 0
+        for fen in POSITIONS:
+            result = Negamax(Game(fen),depth=SEARCH_DEPTH).search()
+            total += result.nodes + result.qnodes
+        return total
+    return run
+
+STARTUP_IMPORTS = 'import bitchess.game, bitchess.algorithms.negamax'
+'''what a short-lived worker imports before it can search'''
+
+@benchmark
+def startup() -> Callable[[],int]:
+    '''a fresh interpreter importing the game and search, interpreter start included'''
+    command = [sys.executable,'-c',STARTUP_IMPORTS]
+    def run():
+        subprocess.run(command,check=True)
+        return 1
+    return run
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    ops: int
+    seconds: float
+    '''time of the best measurement'''
+
+    @property
+    def us_per_op(self) -> float:
+        return self.seconds / self.ops * 1e6 if self.ops else 0.0
+
+    @property
+    def ops_per_second(self) -> float:
+        return self.ops / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        out = asdict(self)
+        out['us_per_op'] = self.us_per_op
+        return out
+
+@dataclass
+class Regression:
+    name: str
+    baseline_us: float
+    current_us: float
+
+    @property
+    def change(self) -> float:
+        '''slowdown in percent'''
+        return (self.current_us / self.baseline_us - 1) * 100
+
+def run_benchmarks(
+    names:Optional[List[str]]=None,repeat:int=3,min_seconds:float=MIN_SECONDS
+) -> Dict[str,BenchmarkResult]:
+    '''
+    run the benchmarks <names> (all if None), keeping the best of <repeat>
+    measurements of at least <min_seconds> each
+    '''
+    results = {}
+    for name in names or list(BENCHMARKS):
+        run = BENCHMARKS[name]()
+        runs = [_measure(run,min_seconds) for _ in range(repeat)]
+        ops,seconds = min(runs,key=lambda r: r[1] / r[0])
+        results[name] = BenchmarkResult(name,ops,seconds)
+    return results
+
+def to_json(results:Dict[str,BenchmarkResult]) -> dict:
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': {name: r.to_dict() for name,r in results.items()},
+    }
+
+def compare(
+    results:Dict[str,BenchmarkResult],baseline:dict,
+    threshold:float=DEFAULT_THRESHOLD
+) -> List[Regression]:
+    '''
+    benchmarks more than <threshold> percent slower per operation than in
+    <baseline> (as written by to_json). Benchmarks missing from the baseline
+    are skipped.
+    '''
+    out = []
+    for name,result in results.items():
+        base = baseline['results'].get(name)
+        if base is None or base['us_per_op'] <= 0:
+            continue
+        regression = Regression(name,base['us_per_op'],result.us_per_op)
+        if regression.change > threshold:
+            out.append(regression)
+    return out
+
+def table(results:Dict[str,BenchmarkResult],baseline:Optional[dict]=None) -> str:
+    lines = [f'{"benchmark":20s} {"us/op":>12s} {"ops/s":>12s} {"change":>8s}']
+    for name,r in results.items():
+        change = ''
+        base = None if baseline is None else baseline['results'].get(name)
+        if base is not None and base['us_per_op'] > 0:
+            change = f'{(r.us_per_op / base["us_per_op"] - 1) * 100:+7.1f}%'
+        lines.append(f'{name:20s} {r.us_per_op:12.2f} {r.ops_per_second:12.1f} {change:>8s}')
+    return '\n'.join(lines)
+
+def main(argv:Optional[List[str]]=None) -> int:
+    '''console entry point; exits with status 1 if any benchmark regressed'''
+    parser = argparse.ArgumentParser(
+        prog='bitchess-bench',description='run the bitchess benchmarks'
+    )
+    parser.add_argument('names',nargs='*',
+        help=f'benchmarks to run (default all): {", ".join(BENCHMARKS)}')
+    parser.add_argument('-o','--output',help='write the results to this JSON file')
+    parser.add_argument('-b','--baseline',default=default_baseline(),
+        help='baseline JSON file to compare with (default %(default)s)')
+    parser.add_argument('-t','--threshold',type=float,default=DEFAULT_THRESHOLD,
+        help='percent slowdown counted as a regression (default %(default)s)')
+    parser.add_argument('-r','--repeat',type=int,default=3,
+        help='runs per benchmark, the best is kept (default %(default)s)')
+    parser.add_argument('-m','--min-seconds',type=float,default=MIN_SECONDS,
+        help='minimum length of each run in seconds (default %(default)s)')
+    parser.add_argument('--save-baseline',action='store_true',
+        help='write the results to the baseline file instead of comparing')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(unknown)}')
+
+    results = run_benchmarks(args.names or None,args.repeat,args.min_seconds)
+    data = to_json(results)
+    if args.output:
+        with open(args.output,'w') as f:
+            json.dump(data,f,indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)),exist_ok=True)
+        with open(args.baseline,'w') as f:
+            json.dump(data,f,indent=2)
+        print(table(results))
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(table(results,baseline))
+    if baseline is None:
+        print(f'no baseline at {args.baseline}: record one with --save-baseline')
+        return 0
+    regressions = compare(results,baseline,args.threshold)
+    for r in regressions:
+        print(
+            f'REGRESSION {r.name}: {r.baseline_us:.2f} -> {r.current_us:.2f} us/op '
+            f'({r.change:+.1f}% > {args.threshold}%)'
+        )
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
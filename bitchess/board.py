@@ -1,11 +1,68 @@
 '''board representation class'''
 import re
-import colorama
 from typing import Optional, List, Tuple
 from bitarray import bitarray
-from . import core, squareset as ss
+from . import core, squareset as ss, zobrist, evaluation
+from .tables import TABLES, DIRECTIONS
 from .move import Move
 from copy import deepcopy
+import struct
+
+PACKED_FORMAT = struct.Struct('<Q16sBBBBH2x')
+'''
+packed position: occupancy bitboard, a 4-bit piece code per occupied square
+in square order (low nibble first), side to move, castling rights (white
+kingside, white queenside, black kingside, black queenside from bit 0), en
+passant square (255 if none), half-move clock, full-move counter, padding
+'''
+
+PACKED_SIZE = PACKED_FORMAT.size
+
+PACKED_PIECES = [
+    (color,p) for color in (core.Color.WHITE,core.Color.BLACK)
+    for p in core.PIECE_NAMES
+]
+'''(color,piece) of each packed piece code: white pawn..king, then black'''
+
+_CASTLING_BITS = [
+    (color,side) for color in (core.Color.WHITE,core.Color.BLACK)
+    for side in ('KINGSIDE','QUEENSIDE')
+]
+
+# attack tables as ints for the static exchange evaluation, views of the
+# shared table cache
+
+SEE_VALUES = { p:100 * v for p,v in core.PIECE_MATERIAL_POINTS.items() }
+'''piece values of Board.see in centipawns'''
+SEE_VALUES['KING'] = 100000
+
+_KNIGHT_ATTACKS = TABLES.ints('KNIGHT_ATTACKS')
+_KING_ATTACKS = TABLES.ints('KING_ATTACKS')
+_PAWN_ATTACKS = [TABLES.ints('PAWN_ATTACKS')[64:],TABLES.ints('PAWN_ATTACKS')[:64]]
+'''indexed [piece_color][square] like ss.PAWN_ATTACKS'''
+_RAYS = [TABLES.ints('RAYS')[64 * i:64 * i + 64] for i in range(8)]
+_INCREASING = [d in ('N','NE','E','NW') for d in DIRECTIONS]
+'''directions whose squares have rising indexes: the nearest blocker is the lowest bit'''
+_ROOK_DIRECTIONS = [DIRECTIONS.index(d) for d in ('N','E','S','W')]
+_BISHOP_DIRECTIONS = [DIRECTIONS.index(d) for d in ('NE','SE','SW','NW')]
+
+def _to_int(arr:bitarray) -> int:
+    return int.from_bytes(arr.tobytes(),'little')
+
+def _slider_attacks(square:int,occupied:int,directions:List[int]) -> int:
+    '''squares attacked from <square> along <directions>, up to the first blocker'''
+    out = 0
+    for d in directions:
+        ray = _RAYS[d][square]
+        blockers = ray & occupied
+        if blockers:
+            if _INCREASING[d]:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= _RAYS[d][blocker]
+        out |= ray
+    return out
 
 def _copy_board(board):
     '''
@@ -14,7 +71,10 @@ def _copy_board(board):
     b = Board(fen=None)
     b.squaresets = { k:v.copy() for k,v in board.squaresets.items()}
     b.castling = deepcopy(board.castling)
-    b.ep_index = board.ep_index
+    b.mg_score = board.mg_score
+    b.eg_score = board.eg_score
+    b.phase = board.phase
+    b.pawn_key = board.pawn_key
     return b
 
 class Board():
@@ -22,6 +82,7 @@ class Board():
     board representation class.
     '''
     def __init__(self,fen:str='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'):
+        self._undo_stack = []
         if fen is not None:
             self.fen = fen
             self._squaresets_from_fen()
@@ -58,11 +119,10 @@ class Board():
 
         # en passant
         if fen_parts[3] == '-':
-            self.ep_index = None
             self.squaresets['EN_PASSANT'] = ss.EMPTY.copy()
         else:
-            self.ep_index = core.ALGEBRAIC_TO_INDEX[fen_parts[3]]
-            self.squaresets['EN_PASSANT'] = ss.SQUARES[self.ep_index].copy()
+            ep_index = core.ALGEBRAIC_TO_INDEX[fen_parts[3]]
+            self.squaresets['EN_PASSANT'] = ss.SQUARES[ep_index].copy()
         self.castling = {}
         self.castling[core.Color.WHITE] = { #
             'KINGSIDE':'K' in fen_parts[2],
@@ -72,6 +132,43 @@ class Board():
             'KINGSIDE': 'k' in fen_parts[2],
             'QUEENSIDE': 'q' in fen_parts[2]
         }
+        self._init_evaluation()
+
+    def _init_evaluation(self):
+        '''
+        compute the running evaluation sums from scratch: middlegame and
+        endgame piece-square scores (white minus black), game phase and the
+        zobrist key of the pawns alone
+        '''
+        self.mg_score = 0
+        self.eg_score = 0
+        self.phase = 0
+        self.pawn_key = zobrist.hash_pawns(self)
+        for color in (core.Color.WHITE,core.Color.BLACK):
+            for p in core.PIECE_NAMES:
+                for i in (self.squaresets[p] & self.squaresets[color]).search(1):
+                    self.mg_score += evaluation.MG[color][p][i]
+                    self.eg_score += evaluation.EG[color][p][i]
+                    self.phase += evaluation.PHASE_WEIGHTS[p]
+
+    def _evaluation_remove(self,mask:bitarray):
+        '''remove the pieces under <mask> from the running evaluation sums'''
+        for i in (mask & self.squaresets['OCCUPIED']).search(1):
+            color = self.squaresets[core.Color.WHITE][i] == 1
+            for p in core.PIECE_NAMES:
+                if self.squaresets[p][i]:
+                    self.mg_score -= evaluation.MG[color][p][i]
+                    self.eg_score -= evaluation.EG[color][p][i]
+                    self.phase -= evaluation.PHASE_WEIGHTS[p]
+                    if p == 'PAWN':
+                        self.pawn_key ^= zobrist.PIECE_KEYS[color][p][i]
+                    break
+
+    @property
+    def ep_index(self) -> Optional[int]:
+        '''index of the en passant square, None if there is none'''
+        squares = self.squaresets['EN_PASSANT']
+        return squares.index(1) if squares.any() else None
 
     @classmethod
     def copy(cls,board):
@@ -80,16 +177,106 @@ class Board():
         '''
         b = cls(fen=None)
         b.squaresets = { k:v.copy() for k,v in board.squaresets.items()}
-        b.castling = board.castling.copy()
-        b.ep_index = board.ep_index
+        b.castling = { k:v.copy() for k,v in board.castling.items()}
+        b.mg_score = board.mg_score
+        b.eg_score = board.eg_score
+        b.phase = board.phase
+        b.pawn_key = board.pawn_key
         return b
 
+    @classmethod
+    def from_piece_squaresets(
+        cls,pieces:dict,castling:Optional[dict]=None,ep_index:Optional[int]=None
+    ):
+        '''
+        build a board from <pieces>, a dict of (piece_color,piece_name) to
+        squareset. <castling> is laid out like Board.castling (no rights if
+        None) and <ep_index> is the en passant square index, if any.
+        '''
+        b = cls(fen=None)
+        b.squaresets = {}
+        for color in (core.Color.WHITE,core.Color.BLACK):
+            b.squaresets[color] = ss.EMPTY.copy()
+        for p in core.PIECE_NAMES:
+            b.squaresets[p] = ss.EMPTY.copy()
+            for color in (core.Color.WHITE,core.Color.BLACK):
+                squares = pieces.get((color,p),ss.EMPTY)
+                b.squaresets[p] |= squares
+                b.squaresets[color] |= squares
+        b.squaresets['OCCUPIED'] = b.squaresets[core.Color.WHITE] | \
+            b.squaresets[core.Color.BLACK]
+        b.squaresets['UNOCCUPIED'] = b.squaresets['OCCUPIED'] ^ ss.UNIVERSE
+        if ep_index is None:
+            b.squaresets['EN_PASSANT'] = ss.EMPTY.copy()
+        else:
+            b.squaresets['EN_PASSANT'] = ss.SQUARES[ep_index].copy()
+        if castling is None:
+            castling = {
+                color:{'KINGSIDE':False,'QUEENSIDE':False}
+                for color in (core.Color.WHITE,core.Color.BLACK)
+            }
+        b.castling = { k:v.copy() for k,v in castling.items()}
+        b._init_evaluation()
+        return b
+
+    def to_packed(
+        self,piece_color:bool,half_move_clock:int=0,full_move_counter:int=1
+    ) -> bytes:
+        '''
+        PACKED_SIZE byte encoding of the position with <piece_color> to move,
+        see PACKED_FORMAT. The half-move clock saturates at 255.
+        '''
+        codes = {}
+        for code,(color,p) in enumerate(PACKED_PIECES):
+            for i in (self.squaresets[p] & self.squaresets[color]).search(1):
+                codes[i] = code
+        if len(codes) > 32:
+            raise ValueError(f'cannot pack a board with {len(codes)} pieces')
+        pieces = bytearray(16)
+        for n,i in enumerate(sorted(codes)):
+            pieces[n >> 1] |= codes[i] << (4 * (n & 1))
+        castling = 0
+        for bit,(color,side) in enumerate(_CASTLING_BITS):
+            castling |= self.castling[color][side] << bit
+        ep = self.squaresets['EN_PASSANT'].find(1)
+        return PACKED_FORMAT.pack(
+            int.from_bytes(self.squaresets['OCCUPIED'].tobytes(),'little'),
+            bytes(pieces),int(piece_color),castling,255 if ep < 0 else ep,
+            min(half_move_clock,255),full_move_counter
+        )
+
+    @classmethod
+    def from_packed(cls,data:bytes) -> Tuple['Board',bool,int,int]:
+        '''
+        decode the output of to_packed to (board,piece_color to move,
+        half-move clock,full-move counter)
+        '''
+        occupied,pieces,side,castling,ep,half_move_clock,full_move_counter = \
+            PACKED_FORMAT.unpack(data)
+        squaresets = {}
+        occupancy = bitarray(endian='little')
+        occupancy.frombytes(occupied.to_bytes(8,'little'))
+        for n,i in enumerate(occupancy.search(1)):
+            key = PACKED_PIECES[pieces[n >> 1] >> (4 * (n & 1)) & 15]
+            if key not in squaresets:
+                squaresets[key] = ss.EMPTY.copy()
+            squaresets[key][i] = 1
+        rights = {color:{} for color in (core.Color.WHITE,core.Color.BLACK)}
+        for bit,(color,side_name) in enumerate(_CASTLING_BITS):
+            rights[color][side_name] = bool(castling >> bit & 1)
+        board = cls.from_piece_squaresets(
+            squaresets,rights,None if ep == 255 else ep
+        )
+        return board,bool(side),half_move_clock,full_move_counter
+
     def print_all_squaresets(self):
         for k,v in self.squaresets.items():
             print(f'squareset: {k}')
             ss.print_squareset(v)
 
     def print_boardstate(self):
+        # only needed for display: keep it out of the import of board
+        import colorama
         outstr = ''
         for i in range(56,-1,-8):
             outstr += colorama.Fore.GREEN + f'{i//8+1} '
@@ -235,11 +422,8 @@ class Board():
             from_index = pieces.index(1)
             pieces.invert(from_index)
             # get targets
-            targets = ss.get_knight_targets(
-                ss.SQUARES[from_index],
-                enemy_squares,
-                self.squaresets['UNOCCUPIED']
-            )
+            targets = ss.KNIGHT_ATTACKS[from_index] & \
+                (enemy_squares | self.squaresets['UNOCCUPIED'])
             m = self._create_moves('KNIGHT',piece_color,ss.SQUARES[from_index],targets,enemy_squares)
             moves.extend(m)
         return moves
@@ -311,11 +495,8 @@ class Board():
             from_index = pieces.index(1)
             pieces.invert(from_index)
             # get targets
-            targets = ss.get_king_targets(
-                ss.SQUARES[from_index],
-                enemy_squares,
-                self.squaresets['UNOCCUPIED']
-            )
+            targets = ss.KING_ATTACKS[from_index] & \
+                (enemy_squares | self.squaresets['UNOCCUPIED'])
             m = self._create_moves('KING',piece_color,ss.SQUARES[from_index],targets,enemy_squares)
             moves.extend(m)
         return moves
@@ -334,36 +515,87 @@ class Board():
         out.extend(self._get_legal_castling_moves(piece_color))
         return out
 
+    def get_move_from_uci(self,uci:str,piece_color:bool) -> Optional[Move]:
+        '''
+        return the legal move for <piece_color> matching long algebraic
+        <uci> (e.g., "e2e4", "e7e8q", "e1g1"), None if there is none
+        '''
+        moves = self.get_pseudolegal_moves(piece_color)
+        moves.extend(self.get_castling_moves(piece_color))
+        for move in moves:
+            if move.get_uci() == uci:
+                self.push(move)
+                is_legal = not(self.is_check(piece_color))
+                self.pop()
+                if is_legal:
+                    return move
+        return None
+
+    def move_from_code(self,code:int,piece_color:bool) -> Move:
+        '''
+        the move of <piece_color> with Move.get_code() <code>, without checking
+        that it is legal: for replaying moves known to be legal, e.g. from a
+        game record
+        '''
+        from_index,to_index = code & 63,code >> 6 & 63
+        promotion = code >> 12 & 7
+        piece_type = self.get_piece_name_at_index(from_index)
+        to_square = ss.SQUARES[to_index]
+        if piece_type == 'KING' and abs(to_index - from_index) == 2:
+            move_type = 'castle'
+        elif (
+            (to_square & self.squaresets[not(piece_color)]).any() or
+            (piece_type == 'PAWN' and to_square == self.squaresets['EN_PASSANT'])
+        ):
+            move_type = 'attack'
+        else:
+            move_type = 'quiet'
+        return Move(
+            piece_type,piece_color,ss.SQUARES[from_index],to_square,move_type,
+            core.PROMOTION_PIECES[promotion - 1] if promotion else None
+        )
+
     def _get_legal_castling_moves(self,piece_color:bool):
         '''return list of tuple (move, board) for available castling moves'''
         out = []
+        for king_move in self.get_castling_moves(piece_color):
+            rook_from,rook_to = self._castling_rook_squares(king_move)
+            board = _copy_board(self)
+            board.make_move(king_move)
+            board.make_move(Move('ROOK',piece_color,rook_from,rook_to,'castle'))
+            out.append((king_move,board))
+        return out
+
+    def get_castling_moves(self,piece_color:bool) -> List[Move]:
+        '''
+        return castling moves available to <piece_color>. Castling is
+        represented by the king move alone (move_type 'castle'); the rook is
+        relocated by push()/make_move of the resulting board.
+        '''
+        out = []
         king = self.squaresets['KING'] & self.squaresets[piece_color]
+        rooks = self.squaresets['ROOK'] & self.squaresets[piece_color]
+        back_rank = ss.RANK[0] if piece_color else ss.RANK[7]
 
         if self.castling[piece_color]['KINGSIDE']:
-            rook = self.squaresets['ROOK'] & self.squaresets[piece_color] & ss.FILE[7]
             king_targets = king >> 1  | king >> 2
-            king_move = Move('KING',piece_color,king,king >> 2,'castle')
-            rook_move = Move('ROOK',piece_color,rook,rook << 2,'castle')
-            if king_targets & self.squaresets['OCCUPIED'] == ss.EMPTY:
+            if (
+                rooks & ss.FILE[7] & back_rank != ss.EMPTY and
+                king_targets & self.squaresets['OCCUPIED'] == ss.EMPTY
+            ):
                 self.place_piece_at(king_targets,'KING',piece_color)
                 if not(self.is_check(piece_color)):
-                    board = _copy_board(self)
-                    board.make_move(king_move)
-                    board.make_move(rook_move)
-                    out.append((king_move,board))
+                    out.append(Move('KING',piece_color,king,king >> 2,'castle'))
                 self.remove_piece_at(king_targets)
         if self.castling[piece_color]['QUEENSIDE']:
-            rook = self.squaresets['ROOK'] & self.squaresets[piece_color] & ss.FILE[0]
             king_targets = (king << 1  | king << 2 )
-            king_move = Move('KING',piece_color,king,king << 2,'castle')
-            rook_move = Move('ROOK',piece_color,rook,rook >> 3,'castle')
-            if king_targets & self.squaresets['OCCUPIED'] == ss.EMPTY:
+            if (
+                rooks & ss.FILE[0] & back_rank != ss.EMPTY and
+                (king_targets | king << 3) & self.squaresets['OCCUPIED'] == ss.EMPTY
+            ):
                 self.place_piece_at(king_targets,'KING',piece_color)
                 if not(self.is_check(piece_color)):
-                    board = _copy_board(self)
-                    board.make_move(king_move)
-                    board.make_move(rook_move)
-                    out.append((king_move,board))
+                    out.append(Move('KING',piece_color,king,king << 2,'castle'))
                 self.remove_piece_at(king_targets)
         return out
 
@@ -384,6 +616,13 @@ class Board():
         place piece of type <piece_type> for player <piece_color> at <mask>
         bitarray. This will overwrite any other piece located on the square
         '''
+        self._evaluation_remove(mask)
+        for i in mask.search(1):
+            self.mg_score += evaluation.MG[piece_color][piece_type][i]
+            self.eg_score += evaluation.EG[piece_color][piece_type][i]
+            self.phase += evaluation.PHASE_WEIGHTS[piece_type]
+            if piece_type == 'PAWN':
+                self.pawn_key ^= zobrist.PIECE_KEYS[piece_color][piece_type][i]
         not_mask = ss.UNIVERSE ^ mask
         self.squaresets['OCCUPIED'] |= mask
         self.squaresets['UNOCCUPIED'] &= not_mask
@@ -399,6 +638,7 @@ class Board():
         '''
         remove any pieces at <mask> bitarray
         '''
+        self._evaluation_remove(mask)
         not_mask = ss.UNIVERSE ^ mask
         self.squaresets['OCCUPIED'] &= not_mask
         self.squaresets['UNOCCUPIED'] |= mask
@@ -447,6 +687,73 @@ class Board():
                 (move.from_square & ss.FILE[0]) != ss.EMPTY):
                 self.castling[move.piece_color]['QUEENSIDE'] = False
 
+    def push(self,move:Move) -> None:
+        '''
+        make <move> in place, remembering what is needed to take it back with
+        pop(). Castling moves (the king move, move_type 'castle') also move the
+        rook.
+        '''
+        to_index = move.to_square.index(1)
+        capture_index = to_index
+        if (
+            move.piece_type == 'PAWN' and
+            self.squaresets['EN_PASSANT'] == move.to_square
+        ):
+            capture_index += -8 if move.piece_color else 8
+        captured = self.get_piece_at_index(capture_index)
+        castling = tuple(
+            self.castling[c][side]
+            for c in (core.Color.WHITE,core.Color.BLACK)
+            for side in ('KINGSIDE','QUEENSIDE')
+        )
+        self._undo_stack.append(
+            (move,captured,capture_index,self.squaresets['EN_PASSANT'],castling)
+        )
+
+        self.make_move(move)
+        if move.move_type == 'castle':
+            rook_from,rook_to = self._castling_rook_squares(move)
+            self.make_move(Move('ROOK',move.piece_color,rook_from,rook_to,'castle'))
+
+    def push_null(self) -> None:
+        '''
+        pass the move (null move) for search pruning. Only the en passant
+        square changes; take it back with pop().
+        '''
+        self._undo_stack.append(
+            (None,None,None,self.squaresets['EN_PASSANT'],None)
+        )
+        self.squaresets['EN_PASSANT'] = ss.EMPTY.copy()
+
+    def pop(self) -> Optional[Move]:
+        '''take back the last move made with push() and return it'''
+        move,captured,capture_index,en_passant,castling = self._undo_stack.pop()
+        if move is None: # null move
+            self.squaresets['EN_PASSANT'] = en_passant
+            return None
+        if move.move_type == 'castle':
+            rook_from,rook_to = self._castling_rook_squares(move)
+            self.remove_piece_at(rook_to)
+            self.place_piece_at(rook_from,'ROOK',move.piece_color)
+        self.remove_piece_at(move.to_square)
+        self.place_piece_at(move.from_square,move.piece_type,move.piece_color)
+        if captured is not None:
+            self.place_piece_at(ss.SQUARES[capture_index],captured[0],captured[1])
+        self.squaresets['EN_PASSANT'] = en_passant
+        i = 0
+        for c in (core.Color.WHITE,core.Color.BLACK):
+            for side in ('KINGSIDE','QUEENSIDE'):
+                self.castling[c][side] = castling[i]
+                i += 1
+        return move
+
+    def _castling_rook_squares(self,move:Move):
+        '''return (from_square, to_square) of the rook for a castling move'''
+        if move.to_square.index(1) > move.from_square.index(1):
+            return move.to_square >> 1, move.to_square << 1
+        else:
+            return move.to_square << 2, move.to_square >> 1
+
     # STATUS CHECKS
     def is_check(self,piece_color:bool) -> bool:
         '''
@@ -464,6 +771,85 @@ class Board():
                 return True
         return False
 
+    # STATIC EXCHANGE EVALUATION
+    def _piece_ints(self) -> dict:
+        return { k:_to_int(self.squaresets[k]) for k in (
+            *core.PIECE_NAMES,core.Color.WHITE,core.Color.BLACK,'OCCUPIED'
+        )}
+
+    @staticmethod
+    def _attackers(square:int,occupied:int,pieces:dict) -> int:
+        '''pieces of either color in <occupied> attacking <square>'''
+        diagonal = pieces['BISHOP'] | pieces['QUEEN']
+        straight = pieces['ROOK'] | pieces['QUEEN']
+        attackers = (
+            _PAWN_ATTACKS[core.Color.BLACK][square] & pieces['PAWN'] & pieces[core.Color.WHITE] |
+            _PAWN_ATTACKS[core.Color.WHITE][square] & pieces['PAWN'] & pieces[core.Color.BLACK] |
+            _KNIGHT_ATTACKS[square] & pieces['KNIGHT'] |
+            _KING_ATTACKS[square] & pieces['KING']
+        )
+        if diagonal & occupied:
+            attackers |= _slider_attacks(square,occupied,_BISHOP_DIRECTIONS) & diagonal
+        if straight & occupied:
+            attackers |= _slider_attacks(square,occupied,_ROOK_DIRECTIONS) & straight
+        return attackers & occupied
+
+    def attackers_to(self,square:int) -> bitarray:
+        '''squareset of the pieces of either color attacking the index <square>'''
+        pieces = self._piece_ints()
+        attackers = self._attackers(square,pieces['OCCUPIED'],pieces)
+        out = bitarray(endian='little')
+        out.frombytes(attackers.to_bytes(8,'little'))
+        return out
+
+    def see(self,move:Move) -> int:
+        '''
+        static exchange evaluation of <move>: the material the mover wins (or
+        loses, if negative) in centipawns when both sides keep recapturing on
+        the target square with their least valuable attacker, each free to
+        stop when recapturing would lose. Sliders behind a capturing piece
+        join in as it leaves (x-rays). Pins and checks are ignored; a king
+        only recaptures if the square is no longer attacked.
+        '''
+        pieces = self._piece_ints()
+        occupied = pieces['OCCUPIED']
+        from_index = move.from_square.index(1)
+        to_index = move.to_square.index(1)
+        victim = self.get_piece_name_at_index(to_index)
+        gain = [SEE_VALUES[victim] if victim is not None else 0]
+        if victim is None and move.move_type == 'attack':
+            # en passant: the captured pawn leaves its own square
+            gain[0] = SEE_VALUES['PAWN']
+            occupied ^= 1 << (to_index - 8 if move.piece_color else to_index + 8)
+        attacker_value = SEE_VALUES[move.piece_type]
+        if move.promotion is not None:
+            attacker_value = SEE_VALUES[move.promotion]
+            gain[0] += attacker_value - SEE_VALUES['PAWN']
+        occupied ^= 1 << from_index
+        side = not(move.piece_color)
+        attackers = self._attackers(to_index,occupied,pieces)
+        while True:
+            # score if <side> takes the piece that just captured
+            gain.append(attacker_value - gain[-1])
+            own = attackers & pieces[side]
+            if not(own):
+                break
+            for piece in core.PIECE_NAMES:
+                found = own & pieces[piece]
+                if found:
+                    break
+            if piece == 'KING' and attackers & pieces[not(side)]:
+                break
+            occupied ^= found & -found
+            attackers = self._attackers(to_index,occupied,pieces)
+            attacker_value = SEE_VALUES[piece]
+            side = not(side)
+        # the last entry is a capture nobody can make: each side in turn
+        # keeps the better of stopping and recapturing
+        for d in range(len(gain) - 2,0,-1):
+            gain[d - 1] = -max(-gain[d - 1],gain[d])
+        return gain[0]
+
     def is_checkmate(self,piece_color:bool,is_check:bool=None) -> bool:
         '''
         returns True if player <piece_color> is checkmated. it is checkmate
@@ -480,6 +866,10 @@ class Board():
             is_check = self.is_check(piece_color)
         return not(is_check) and not(self.get_legal_moves(piece_color))
 
+    def get_zobrist_hash(self,piece_color:bool) -> int:
+        '''return 64-bit zobrist key of the position with <piece_color> to move'''
+        return zobrist.hash_board(self,piece_color)
+
     def count_material(self):
         '''return matieral counts by player'''
         score = {}
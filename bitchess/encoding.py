@@ -0,0 +1,116 @@
+'''
+batch encoding of positions as NumPy planes, e.g. for training models.
+
+Each position is N_PLANES 8x8 planes: the 12 piece planes of
+batch.PIECE_PLANES, then side to move, the four castling rights and the en
+passant square (see PLANES). Planes are stored either packed, one uint64
+bitboard per plane (bit i is square i), or unpacked as [plane][rank][file]
+with rank 0 the first rank.
+'''
+from . import core
+from .batch import PIECE_PLANES, writable, write_pieces, write_squaresets
+from .board import Board
+from bitarray import bitarray
+from typing import List, Optional, Tuple
+import numpy as np
+
+CASTLING_PLANES = [
+    (color,side) for color in (core.Color.WHITE,core.Color.BLACK)
+    for side in ('KINGSIDE','QUEENSIDE')
+]
+
+PLANES = PIECE_PLANES + ['SIDE'] + CASTLING_PLANES + ['EN_PASSANT']
+'''
+what each plane holds. SIDE and castling planes are all ones when white is
+to move or the right is held, all zeros otherwise.
+'''
+
+N_PLANES = len(PLANES)
+
+_SIDE = len(PIECE_PLANES)
+_CASTLING = _SIDE + 1
+_EN_PASSANT = _CASTLING + len(CASTLING_PLANES)
+_FULL = np.uint64(0xFFFFFFFFFFFFFFFF)
+_SHIFTS = np.arange(64,dtype=np.uint64)
+
+CHUNK_SIZE = 1024
+'''positions unpacked at a time, bounding the size of temporaries'''
+
+def encode_batch(
+    boards:List[Board],piece_colors:Optional[List[bool]]=None,
+    out:Optional[np.ndarray]=None,packed:bool=False
+) -> np.ndarray:
+    '''
+    encode <boards> with <piece_colors> to move (white if None) as an
+    (N,N_PLANES,8,8) array, or an (N,N_PLANES) uint64 array if <packed>.
+    The planes are written into <out>, a C-contiguous array of that shape of
+    any numeric dtype, which is allocated (float32 if unpacked) if None.
+    '''
+    n = len(boards)
+    if piece_colors is None:
+        piece_colors = [core.Color.WHITE] * n
+    shape = (n,N_PLANES) if packed else (n,N_PLANES,8,8)
+    if out is None:
+        out = np.empty(shape,dtype=np.uint64 if packed else np.float32)
+    elif out.shape != shape or not(out.flags.c_contiguous):
+        raise ValueError(f'out must be a C-contiguous array of shape {shape}')
+    if not(packed):
+        _encode_unpacked(boards,piece_colors,out)
+        return out
+    target = out if writable(out) else np.empty(shape,dtype='<u8')
+    _encode_packed(boards,piece_colors,target)
+    if target is not out:
+        out[...] = target
+    return out
+
+def _encode_packed(boards:List[Board],piece_colors:List[bool],out:np.ndarray) -> None:
+    '''write the packed planes of <boards> into <out>, an array for which batch.writable holds'''
+    write_pieces(boards,out)
+    out[:,_SIDE] = np.where(np.asarray(piece_colors,dtype=bool),_FULL,0)
+    for i,(color,side) in enumerate(CASTLING_PLANES):
+        rights = [board.castling[color][side] for board in boards]
+        out[:,_CASTLING + i] = np.where(np.asarray(rights,dtype=bool),_FULL,0)
+    write_squaresets(out,_EN_PASSANT,(board.squaresets['EN_PASSANT'] for board in boards))
+
+def _encode_unpacked(boards:List[Board],piece_colors:List[bool],out:np.ndarray) -> None:
+    '''
+    write the square planes of <boards> into <out>, packing CHUNK_SIZE
+    positions at a time into one reused buffer
+    '''
+    planes = out.reshape(len(out),N_PLANES,64)
+    chunk = np.empty((min(CHUNK_SIZE,len(boards)),N_PLANES),dtype='<u8')
+    for start in range(0,len(boards),CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE,len(boards))
+        bitboards = chunk[:stop - start]
+        _encode_packed(boards[start:stop],piece_colors[start:stop],bitboards)
+        np.bitwise_and(
+            bitboards[:,:,None] >> _SHIFTS,np.uint64(1),
+            out=planes[start:stop],casting='unsafe'
+        )
+
+def _squareset(bb:int) -> bitarray:
+    arr = bitarray(endian='little')
+    arr.frombytes(bb.to_bytes(8,'little'))
+    return arr
+
+def decode_batch(planes:np.ndarray) -> List[Tuple[Board,bool]]:
+    '''
+    decode the output of encode_batch, packed or not, to a list of
+    (board,piece_color to move)
+    '''
+    if planes.ndim == 4:
+        bits = np.asarray(planes != 0).reshape(len(planes),N_PLANES,64)
+        planes = np.packbits(bits,axis=-1,bitorder='little').view('<u8')[...,0]
+    out = []
+    for row in planes.tolist():
+        pieces = {
+            plane:_squareset(bb) for plane,bb in zip(PIECE_PLANES,row)
+        }
+        castling = {color:{} for color in (core.Color.WHITE,core.Color.BLACK)}
+        for i,(color,side) in enumerate(CASTLING_PLANES):
+            castling[color][side] = row[_CASTLING + i] != 0
+        ep = row[_EN_PASSANT]
+        ep_index = ep.bit_length() - 1 if ep else None
+        board = Board.from_piece_squaresets(pieces,castling,ep_index)
+        out.append((board,row[_SIDE] != 0))
+    return out
@@ -0,0 +1,212 @@
+'''
+tapered piece-square-table evaluation.
+
+Every piece on the board contributes a middlegame and an endgame score
+(piece value plus its square's table entry) and a game phase weight. Board
+keeps running white-minus-black sums of these in place_piece_at and
+remove_piece_at, so the static evaluation only blends the two sums, plus
+the pawn-structure score, which is almost always read from the pawn hash
+table (see pawns).
+'''
+from . import core, pawns
+
+MAX_PHASE = 24
+'''phase of the starting position; 0 is a bare king and pawn ending'''
+
+PHASE_WEIGHTS = {
+    'PAWN':0,
+    'KNIGHT':1,
+    'BISHOP':1,
+    'ROOK':2,
+    'QUEEN':4,
+    'KING':0
+}
+
+# piece values and tables in centipawns. Tables are written as the board is
+# printed (rank 8 first, files a-h) from white's point of view.
+DEFAULT_TABLES = {
+    'values':{
+        'mg':{'PAWN':100,'KNIGHT':320,'BISHOP':330,'ROOK':500,'QUEEN':900,'KING':0},
+        'eg':{'PAWN':120,'KNIGHT':300,'BISHOP':320,'ROOK':520,'QUEEN':920,'KING':0}
+    },
+    'mg':{
+        'PAWN':[
+              0,  0,  0,  0,  0,  0,  0,  0,
+             50, 50, 50, 50, 50, 50, 50, 50,
+             10, 10, 20, 30, 30, 20, 10, 10,
+              5,  5, 10, 25, 25, 10,  5,  5,
+              0,  0,  0, 20, 20,  0,  0,  0,
+              5, -5,-10,  0,  0,-10, -5,  5,
+              5, 10, 10,-20,-20, 10, 10,  5,
+              0,  0,  0,  0,  0,  0,  0,  0
+        ],
+        'KNIGHT':[
+            -50,-40,-30,-30,-30,-30,-40,-50,
+            -40,-20,  0,  0,  0,  0,-20,-40,
+            -30,  0, 10, 15, 15, 10,  0,-30,
+            -30,  5, 15, 20, 20, 15,  5,-30,
+            -30,  0, 15, 20, 20, 15,  0,-30,
+            -30,  5, 10, 15, 15, 10,  5,-30,
+            -40,-20,  0,  5,  5,  0,-20,-40,
+            -50,-40,-30,-30,-30,-30,-40,-50
+        ],
+        'BISHOP':[
+            -20,-10,-10,-10,-10,-10,-10,-20,
+            -10,  0,  0,  0,  0,  0,  0,-10,
+            -10,  0,  5, 10, 10,  5,  0,-10,
+            -10,  5,  5, 10, 10,  5,  5,-10,
+            -10,  0, 10, 10, 10, 10,  0,-10,
+            -10, 10, 10, 10, 10, 10, 10,-10,
+            -10,  5,  0,  0,  0,  0,  5,-10,
+            -20,-10,-10,-10,-10,-10,-10,-20
+        ],
+        'ROOK':[
+              0,  0,  0,  0,  0,  0,  0,  0,
+              5, 10, 10, 10, 10, 10, 10,  5,
+             -5,  0,  0,  0,  0,  0,  0, -5,
+             -5,  0,  0,  0,  0,  0,  0, -5,
+             -5,  0,  0,  0,  0,  0,  0, -5,
+             -5,  0,  0,  0,  0,  0,  0, -5,
+             -5,  0,  0,  0,  0,  0,  0, -5,
+              0,  0,  0,  5,  5,  0,  0,  0
+        ],
+        'QUEEN':[
+            -20,-10,-10, -5, -5,-10,-10,-20,
+            -10,  0,  0,  0,  0,  0,  0,-10,
+            -10,  0,  5,  5,  5,  5,  0,-10,
+             -5,  0,  5,  5,  5,  5,  0, -5,
+              0,  0,  5,  5,  5,  5,  0, -5,
+            -10,  5,  5,  5,  5,  5,  0,-10,
+            -10,  0,  5,  0,  0,  0,  0,-10,
+            -20,-10,-10, -5, -5,-10,-10,-20
+        ],
+        'KING':[
+            -30,-40,-40,-50,-50,-40,-40,-30,
+            -30,-40,-40,-50,-50,-40,-40,-30,
+            -30,-40,-40,-50,-50,-40,-40,-30,
+            -30,-40,-40,-50,-50,-40,-40,-30,
+            -20,-30,-30,-40,-40,-30,-30,-20,
+            -10,-20,-20,-20,-20,-20,-20,-10,
+             20, 20,  0,  0,  0,  0, 20, 20,
+             20, 30, 10,  0,  0, 10, 30, 20
+        ]
+    },
+    'eg':{
+        'PAWN':[
+              0,  0,  0,  0,  0,  0,  0,  0,
+             80, 80, 80, 80, 80, 80, 80, 80,
+             50, 50, 50, 50, 50, 50, 50, 50,
+             30, 30, 30, 30, 30, 30, 30, 30,
+             15, 15, 15, 15, 15, 15, 15, 15,
+              5,  5,  5,  5,  5,  5,  5,  5,
+              0,  0,  0,  0,  0,  0,  0,  0,
+              0,  0,  0,  0,  0,  0,  0,  0
+        ],
+        'KNIGHT':[
+            -50,-40,-30,-30,-30,-30,-40,-50,
+            -40,-20,  0,  0,  0,  0,-20,-40,
+            -30,  0, 10, 15, 15, 10,  0,-30,
+            -30,  5, 15, 20, 20, 15,  5,-30,
+            -30,  0, 15, 20, 20, 15,  0,-30,
+            -30,  5, 10, 15, 15, 10,  5,-30,
+            -40,-20,  0,  5,  5,  0,-20,-40,
+            -50,-40,-30,-30,-30,-30,-40,-50
+        ],
+        'BISHOP':[
+            -20,-10,-10,-10,-10,-10,-10,-20,
+            -10,  0,  0,  0,  0,  0,  0,-10,
+            -10,  0,  5, 10, 10,  5,  0,-10,
+            -10,  5,  5, 10, 10,  5,  5,-10,
+            -10,  0, 10, 10, 10, 10,  0,-10,
+            -10, 10, 10, 10, 10, 10, 10,-10,
+            -10,  5,  0,  0,  0,  0,  5,-10,
+            -20,-10,-10,-10,-10,-10,-10,-20
+        ],
+        'ROOK':[
+              0,  0,  0,  0,  0,  0,  0,  0,
+             10, 10, 10, 10, 10, 10, 10, 10,
+              0,  0,  0,  0,  0,  0,  0,  0,
+              0,  0,  0,  0,  0,  0,  0,  0,
+              0,  0,  0,  0,  0,  0,  0,  0,
+              0,  0,  0,  0,  0,  0,  0,  0,
+              0,  0,  0,  0,  0,  0,  0,  0,
+              0,  0,  0,  0,  0,  0,  0,  0
+        ],
+        'QUEEN':[
+            -20,-10,-10, -5, -5,-10,-10,-20,
+            -10,  0,  0,  0,  0,  0,  0,-10,
+            -10,  0,  5,  5,  5,  5,  0,-10,
+             -5,  0,  5,  5,  5,  5,  0, -5,
+             -5,  0,  5,  5,  5,  5,  0, -5,
+            -10,  0,  5,  5,  5,  5,  0,-10,
+            -10,  0,  0,  0,  0,  0,  0,-10,
+            -20,-10,-10, -5, -5,-10,-10,-20
+        ],
+        'KING':[
+            -50,-40,-30,-20,-20,-30,-40,-50,
+            -30,-20,-10,  0,  0,-10,-20,-30,
+            -30,-10, 20, 30, 30, 20,-10,-30,
+            -30,-10, 30, 40, 40, 30,-10,-30,
+            -30,-10, 30, 40, 40, 30,-10,-30,
+            -30,-10, 20, 30, 30, 20,-10,-30,
+            -30,-30,  0,  0,  0,  0,-30,-30,
+            -50,-30,-30,-30,-30,-30,-30,-50
+        ]
+    }
+}
+
+MG = {}
+'''MG[color][piece][square]: signed middlegame score (white positive)'''
+
+EG = {}
+'''EG[color][piece][square]: signed endgame score (white positive)'''
+
+def set_tables(tables:dict) -> None:
+    '''
+    install <tables> (same layout as DEFAULT_TABLES) as the active tables.
+    Boards created before this keep sums from the old tables.
+    '''
+    for phase,out in (('mg',MG),('eg',EG)):
+        for color in (core.Color.WHITE,core.Color.BLACK):
+            out[color] = {}
+            for p in core.PIECE_NAMES:
+                value = tables['values'][phase][p]
+                table = tables[phase][p]
+                if len(table) != 64:
+                    raise ValueError(f'{phase} table for {p} must have 64 entries')
+                if color:
+                    # display order starts at a8: flip ranks for LERF index
+                    out[color][p] = [value + table[i ^ 56] for i in range(64)]
+                else:
+                    out[color][p] = [-(value + table[i]) for i in range(64)]
+
+def load_tables(path:str) -> None:
+    '''install tables from a JSON file laid out like DEFAULT_TABLES'''
+    import json
+    with open(path) as f:
+        set_tables(json.load(f))
+
+def save_tables(path:str,tables:dict=DEFAULT_TABLES) -> None:
+    '''write <tables> to a JSON file, e.g. as a starting point for tuning'''
+    import json
+    with open(path,'w') as f:
+        json.dump(tables,f,indent=1)
+
+set_tables(DEFAULT_TABLES)
+
+def evaluate(board,piece_color:bool) -> int:
+    '''
+    static evaluation in centipawns from the perspective of <piece_color>,
+    blending the board's running middlegame and endgame sums, plus its
+    pawn structure, by game phase
+    '''
+    pawn_mg,pawn_eg = pawns.PAWN_TABLE.probe(board)
+    phase = min(board.phase,MAX_PHASE)
+    total = (
+        (board.mg_score + pawn_mg) * phase +
+        (board.eg_score + pawn_eg) * (MAX_PHASE - phase)
+    )
+    # divide before signing, rounding toward zero: the score of one side is
+    # then exactly the negated score of the other, and of the mirrored position
+    score = abs(total) // MAX_PHASE
+    return score if (total >= 0) == piece_color else -score
@@ -17,3 +17,6 @@ class AmbiguousMoveError(Exception):
 
 class NoValidMoveError(Exception):
     '''no valid moves. Used to get stalemate/checkmate'''
+
+class SearchAbortedError(Exception):
+    '''search was stopped by its stop flag, time or node limit'''
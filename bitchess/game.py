@@ -1,11 +1,11 @@
 from . import core, squareset as ss
 from .board import Board
 from .move import Move
+from .exceptions import IllegalMoveError
 from typing import Optional, List, Tuple, Callable, TypeAlias
-import numpy as np
+import math
 import time
 import os
-import secrets
 
 LegalMoves: TypeAlias = List[Tuple[Move,Board]]
 
@@ -22,6 +22,30 @@ class Game():
             self._current_player = core.Color.BLACK
         self._half_move_clock = int(fen_parts[4])
         self._full_move_counter = int(fen_parts[5])
+        self._init_statuses()
+
+    @classmethod
+    def from_packed(cls,data:bytes) -> 'Game':
+        '''start a game from a position encoded by to_packed'''
+        board,piece_color,half_move_clock,full_move_counter = Board.from_packed(data)
+        game = cls.__new__(cls)
+        game.current_board = board
+        game.board_stack = []
+        game.move_stack = []
+        game._current_player = piece_color
+        game._half_move_clock = half_move_clock
+        game._full_move_counter = full_move_counter
+        game.fen = game.get_fen()
+        game._init_statuses()
+        return game
+
+    def to_packed(self) -> bytes:
+        '''board.PACKED_SIZE byte encoding of the current position and clocks'''
+        return self.current_board.to_packed(
+            self._current_player,self._half_move_clock,self._full_move_counter
+        )
+
+    def _init_statuses(self) -> None:
         self.status = core.Status.valid
         # run initial status checks. Either player in checkmate, current
         # player in stalemate (any variation)
@@ -63,6 +87,18 @@ class Game():
         move,board = self._str_to_move(s,legal_moves)
         self._post_move_update(move,board)
 
+    def play_uci_move(self,uci:str) -> None:
+        '''
+        play a single half move for current player from a long algebraic
+        string (e.g., "e2e4", "e7e8q")
+        '''
+        legal_moves = self.current_board.get_legal_moves(self._current_player)
+        for move,board in legal_moves:
+            if move.get_uci() == uci:
+                self._post_move_update(move,board)
+                return
+        raise IllegalMoveError(uci)
+
     def _post_move_update(self,move:Move,board:Board) -> None:
         '''perform all updates to game stacks/timers/statuses'''
         self.board_stack.append(self.current_board)
@@ -169,6 +205,7 @@ class Game():
 
     def move_select_random(self,legal_moves:LegalMoves) -> Tuple[Move,Board]:
         '''select a random move from LegalMoves'''
+        import secrets
         i = secrets.randbelow(len(legal_moves))
         return legal_moves[i]
 
@@ -186,6 +223,15 @@ class Game():
         if self.is_threefold_repetition():
             self.status |= core.Status.threefold_repetition
 
+    def result(self) -> str:
+        '''"1-0", "0-1", "1/2-1/2", or "*" while the game is in progress'''
+        if self.status & core.Status.checkmate:
+            # the side to move is the one that was mated
+            return '0-1' if self._current_player else '1-0'
+        if self.status:
+            return '1/2-1/2'
+        return '*'
+
     def is_threefold_repetition(self):
         '''evaluates whether the current position has been reached 3 times'''
         i = 0
@@ -248,8 +294,8 @@ class Game():
         else:
             if self.status == core.Status.checkmate:
                 if self._current_player:
-                    return np.inf
+                    return math.inf
                 else:
-                    return -np.inf
+                    return -math.inf
             else:
                 return 0
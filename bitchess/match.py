@@ -0,0 +1,167 @@
+'''self-play and engine matches played in parallel over a process pool'''
+from .game import Game, LegalMoves
+from .move import Move
+from .board import Board
+from .algorithms.negamax import SearchConfig
+from .algorithms.deepening import IterativeDeepening, SearchLimits
+from .algorithms.transposition import TranspositionTable
+from .polyglot import Book
+from typing import Optional, List, Callable, Tuple, NamedTuple
+from dataclasses import dataclass, field
+import multiprocessing as mp
+import time
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+MatchMoveFunc = Callable[[Game,LegalMoves],Tuple[Move,Board]]
+'''
+move function of a match player: like the move functions of Game.play, but
+also given the game. Must be picklable (a module-level function or an
+instance of a module-level class) to be sent to the workers.
+'''
+
+def random_player(game:Game,legal_moves:LegalMoves) -> Tuple[Move,Board]:
+    '''select a random legal move'''
+    return game.move_select_random(legal_moves)
+
+@dataclass
+class SearchPlayer:
+    '''select moves with an iterative deepening search under <limits>'''
+    limits: SearchLimits = field(default_factory=lambda: SearchLimits(depth=2))
+    config: SearchConfig = field(default_factory=SearchConfig)
+    book: Optional[str] = None
+    '''path of a Polyglot book to play from while the position is in it'''
+
+    def __call__(self,game:Game,legal_moves:LegalMoves) -> Tuple[Move,Board]:
+        # one table and book per player and game: opened on first use in the
+        # worker
+        if getattr(self,'_tt',None) is None:
+            self._tt = TranspositionTable(self.config.hash_mb)
+            self._book = None if self.book is None else Book(self.book)
+        if self._book is not None:
+            move = self._book.find(game.current_board,game._current_player)
+            if move is not None:
+                return self._legal(move.get_uci(),legal_moves)
+        result = IterativeDeepening(
+            game,self.limits,config=self.config,tt=self._tt
+        ).search()
+        return self._legal(result.best_move.get_uci(),legal_moves)
+
+    @staticmethod
+    def _legal(uci:str,legal_moves:LegalMoves) -> Tuple[Move,Board]:
+        for move,board in legal_moves:
+            if move.get_uci() == uci:
+                return move,board
+        raise RuntimeError(f'selected a move that is not legal: {uci}')
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_tt',None)
+        state.pop('_book',None)
+        return state
+
+class GameRecord(NamedTuple):
+    '''result of one match game'''
+    game_id: int
+    opening: int
+    '''index of the opening FEN'''
+    result: str
+    '''"1-0", "0-1", "1/2-1/2", or "*" if stopped at the ply limit'''
+    status: int
+    '''core.Status flags of the final position'''
+    plies: int
+    seconds: float
+
+def _play_game(task) -> GameRecord:
+    '''play one game in a worker process'''
+    game_id,opening,fen,white,black,max_plies = task
+    start = time.perf_counter()
+    game = Game(fen=fen)
+    plies = 0
+    while game.status.count() == 0 and plies < max_plies:
+        legal_moves = game.current_board.get_legal_moves(game._current_player)
+        player = white if game._current_player else black
+        move,board = player(game,legal_moves)
+        game._post_move_update(move,board)
+        plies += 1
+    return GameRecord(
+        game_id,opening,game.result(),int(game.status),plies,
+        time.perf_counter() - start
+    )
+
+@dataclass
+class MatchResult:
+    '''records of all games of a match and its wall clock time'''
+    games: List[GameRecord]
+    seconds: float
+
+    @property
+    def plies(self) -> int:
+        return sum(g.plies for g in self.games)
+
+    @property
+    def games_per_second(self) -> float:
+        return len(self.games) / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def plies_per_second(self) -> float:
+        return self.plies / self.seconds if self.seconds > 0 else 0.0
+
+    def score(self) -> Tuple[int,int,int]:
+        '''(white wins,black wins,draws); unfinished games aren't counted'''
+        results = [g.result for g in self.games]
+        return results.count('1-0'),results.count('0-1'),results.count('1/2-1/2')
+
+    def table(self) -> str:
+        '''one line per game plus totals and throughput'''
+        lines = ['game opening result   plies    secs']
+        for g in self.games:
+            lines.append(
+                f'{g.game_id:4d} {g.opening:7d} {g.result:7s} {g.plies:7d} {g.seconds:7.2f}'
+            )
+        wins,losses,draws = self.score()
+        lines.append(
+            f'+{wins} -{losses} ={draws} in {self.seconds:.2f}s: '
+            f'{self.games_per_second:.2f} games/s, {self.plies_per_second:.1f} plies/s'
+        )
+        return '\n'.join(lines)
+
+class MatchRunner:
+    '''
+    plays games across a pool of <n_workers> processes (one per CPU if None).
+    The workers are started once and reused by every run(); call close() (or
+    use the object as a context manager) to shut them down.
+    '''
+    def __init__(self,n_workers:Optional[int]=None):
+        self.pool = mp.Pool(n_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def close(self) -> None:
+        '''shut down the pool'''
+        self.pool.close()
+        self.pool.join()
+
+    def run(
+        self,n_games:int,white:MatchMoveFunc=random_player,
+        black:MatchMoveFunc=random_player,openings:Optional[List[str]]=None,
+        max_plies:int=400
+    ) -> MatchResult:
+        '''
+        play <n_games> games between the move functions <white> and <black>,
+        starting game i from openings[i % len(openings)] (the standard start
+        position if None). Games still running after <max_plies> are stopped
+        and scored "*".
+        '''
+        openings = openings or [START_FEN]
+        tasks = [
+            (i,i % len(openings),openings[i % len(openings)],white,black,max_plies)
+            for i in range(n_games)
+        ]
+        start = time.perf_counter()
+        games = sorted(self.pool.imap_unordered(_play_game,tasks))
+        return MatchResult(games,time.perf_counter() - start)
@@ -34,6 +34,17 @@ class Move():
         else:
             return s
 
+    def get_code(self) -> int:
+        '''
+        return 16-bit move code: from index (bits 0-5), to index (bits 6-11)
+        and promotion piece (bits 12-14, index into PROMOTION_PIECES + 1).
+        0 is never a valid move code.
+        '''
+        code = self.from_square.index(1) | self.to_square.index(1) << 6
+        if self.promotion is not None:
+            code |= (core.PROMOTION_PIECES.index(self.promotion) + 1) << 12
+        return code
+
     def get_pgn(self) -> str:
         if self.move_type == 'castle':
             if self.to_square > self.from_square:
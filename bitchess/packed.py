@@ -0,0 +1,143 @@
+'''
+files of fixed-width packed positions (see board.PACKED_FORMAT), for position
+databases too large to keep as FENs. A file is a short header followed by
+PACKED_SIZE byte records; PositionFile maps it read-only so any record or
+slice of records is read straight from disk into NumPy.
+'''
+from .board import Board, PACKED_SIZE
+from .game import Game
+from typing import Tuple, Union
+import numpy as np
+import os
+
+MAGIC = b'BCPF'
+VERSION = 1
+HEADER_SIZE = 16
+'''magic 4, version 1, record size 1, padding 10'''
+
+POSITION_DTYPE = np.dtype([
+    ('occupied','<u8'),
+    ('pieces','u1',(16,)),
+    ('side','u1'),
+    ('castling','u1'),
+    ('ep','u1'),
+    ('half_move_clock','u1'),
+    ('full_move_counter','<u2'),
+    ('padding','V2'),
+])
+'''NumPy view of one packed position'''
+
+assert POSITION_DTYPE.itemsize == PACKED_SIZE
+
+def _header() -> bytes:
+    return MAGIC + bytes([VERSION,PACKED_SIZE]) + bytes(HEADER_SIZE - 6)
+
+def to_records(data:bytes) -> np.ndarray:
+    '''structured array of the packed positions concatenated in <data>'''
+    return np.frombuffer(data,dtype=POSITION_DTYPE)
+
+def to_bitboards(records:np.ndarray) -> np.ndarray:
+    '''
+    (N,12) uint64 piece bitboards of <records>, in the column order of
+    batch.PIECE_PLANES, without decoding to Board objects
+    '''
+    n = len(records)
+    occupied = np.ascontiguousarray(records['occupied'],dtype='<u8')
+    bits = np.unpackbits(
+        occupied.view(np.uint8).reshape(n,8),axis=1,bitorder='little'
+    ).astype(bool)
+    nibbles = records['pieces']
+    codes = np.empty((n,32),dtype=np.uint8)
+    codes[:,0::2] = nibbles & 15
+    codes[:,1::2] = nibbles >> 4
+    # the n-th occupied square holds the n-th code
+    order = np.clip(np.cumsum(bits,axis=1) - 1,0,31)
+    square_codes = np.take_along_axis(codes,order,axis=1)
+    out = np.empty((n,12),dtype=np.uint64)
+    for code in range(12):
+        plane = bits & (square_codes == code)
+        out[:,code] = np.packbits(plane,axis=1,bitorder='little').view('<u8')[:,0]
+    return out
+
+class PositionWriter:
+    '''
+    appends packed positions to the file <path>, creating it if needed.
+    Call close() (or use the object as a context manager) to flush.
+    '''
+    def __init__(self,path:str):
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            _check_header(path)
+        self.file = open(path,'ab')
+        if not(exists):
+            self.file.write(_header())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def write(
+        self,board:Board,piece_color:bool,half_move_clock:int=0,
+        full_move_counter:int=1
+    ) -> None:
+        self.file.write(board.to_packed(piece_color,half_move_clock,full_move_counter))
+
+    def write_game(self,game:Game) -> None:
+        '''write the current position of <game>'''
+        self.file.write(game.to_packed())
+
+    def write_records(self,records:np.ndarray) -> None:
+        '''write a POSITION_DTYPE array, e.g. a slice of another PositionFile'''
+        self.file.write(np.ascontiguousarray(records,dtype=POSITION_DTYPE).tobytes())
+
+def _check_header(path:str) -> None:
+    with open(path,'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if header[:4] != MAGIC or header[4] != VERSION or header[5] != PACKED_SIZE:
+        raise ValueError(f'{path} is not a version {VERSION} position file')
+
+class PositionFile:
+    '''
+    read-only, memory-mapped file of packed positions written by
+    PositionWriter. Indexing with an int decodes that record to (board,
+    piece_color to move, half-move clock, full-move counter); indexing with
+    a slice returns the records as a POSITION_DTYPE array backed by the file.
+    '''
+    def __init__(self,path:str):
+        _check_header(path)
+        n = (os.path.getsize(path) - HEADER_SIZE) // PACKED_SIZE
+        if n == 0:
+            self.records = np.empty(0,dtype=POSITION_DTYPE)
+        else:
+            self.records = np.memmap(
+                path,dtype=POSITION_DTYPE,mode='r',offset=HEADER_SIZE,shape=(n,)
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def close(self) -> None:
+        '''drop the mapping; it is unmapped once no slices of it remain'''
+        self.records = np.empty(0,dtype=POSITION_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(
+        self,i:Union[int,slice]
+    ) -> Union[Tuple[Board,bool,int,int],np.ndarray]:
+        if isinstance(i,slice):
+            return self.records[i]
+        return Board.from_packed(self.records[i].tobytes())
+
+    def game(self,i:int) -> Game:
+        '''a Game starting from record <i>'''
+        return Game.from_packed(self.records[i].tobytes())
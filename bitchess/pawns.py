@@ -0,0 +1,124 @@
+'''
+pawn-structure evaluation backed by a pawn hash table.
+
+Passed, doubled, isolated and backward pawns are found for all pawns of a
+side at once with file/rank masks and fills. The result depends only on the
+pawns, so it is cached under Board.pawn_key, a zobrist hash of the pawns
+alone that Board keeps up to date as pieces are placed and removed. Pawns
+move far less often than pieces, so most nodes of a search reuse a cached
+score.
+'''
+from . import core, squareset as ss
+from bitarray import bitarray
+from array import array
+from typing import Tuple
+
+# (middlegame,endgame) scores in centipawns
+PASSED = [
+    (0,0),(5,10),(10,20),(15,35),(25,60),(45,100),(70,150),(0,0)
+]
+'''bonus for a passed pawn by rank, counted from its own side'''
+DOUBLED = (-10,-20)
+'''penalty for each pawn with a friendly pawn in front of it on its file'''
+ISOLATED = (-10,-15)
+'''penalty for a pawn with no friendly pawns on the adjacent files'''
+BACKWARD = (-8,-10)
+'''
+penalty for a pawn whose stop square is attacked by an enemy pawn and can't
+be covered by a friendly pawn
+'''
+
+ENTRY_SIZE = 16
+'''bytes per entry: key 8, middlegame score 4, endgame score 4'''
+
+def _adjacent_files(arr:bitarray) -> bitarray:
+    '''squares one file east or west of <arr>'''
+    return ss.shift_east_one(arr) | ss.shift_west_one(arr)
+
+def evaluate_side(own:bitarray,enemy:bitarray,piece_color:bool) -> Tuple[int,int]:
+    '''
+    (middlegame,endgame) pawn-structure score of the pawns <own> of
+    <piece_color> against <enemy> pawns
+    '''
+    if piece_color:
+        front_fill,rear_fill = ss.north_fill,ss.south_fill
+        forward,back = ss.shift_north_one,ss.shift_south_one
+        enemy_attacks = ss.shift_southeast_one(enemy) | ss.shift_southwest_one(enemy)
+    else:
+        front_fill,rear_fill = ss.south_fill,ss.north_fill
+        forward,back = ss.shift_south_one,ss.shift_north_one
+        enemy_attacks = ss.shift_northeast_one(enemy) | ss.shift_northwest_one(enemy)
+    # squares strictly in front of each side's pawns, from its own side
+    own_front = front_fill(forward(own))
+    enemy_front = rear_fill(back(enemy))
+
+    doubled = own & rear_fill(back(own))
+    # only the frontmost pawn of a file can be passed
+    passed = own & ~doubled & ~(enemy_front | _adjacent_files(enemy_front))
+    isolated = own & ~_adjacent_files(own_front | rear_fill(own))
+    # squares friendly pawns attack now or after advancing
+    covered = _adjacent_files(own_front)
+    backward = own & ~isolated & back(forward(own) & enemy_attacks & ~covered)
+
+    mg = doubled.count() * DOUBLED[0] + isolated.count() * ISOLATED[0] + \
+        backward.count() * BACKWARD[0]
+    eg = doubled.count() * DOUBLED[1] + isolated.count() * ISOLATED[1] + \
+        backward.count() * BACKWARD[1]
+    for i in passed.search(1):
+        rank = i // 8 if piece_color else 7 - i // 8
+        mg += PASSED[rank][0]
+        eg += PASSED[rank][1]
+    return mg,eg
+
+def evaluate_pawns(board) -> Tuple[int,int]:
+    '''(middlegame,endgame) pawn-structure score of <board>, white minus black'''
+    pawns = board.squaresets['PAWN']
+    white = pawns & board.squaresets[core.Color.WHITE]
+    black = pawns & board.squaresets[core.Color.BLACK]
+    white_mg,white_eg = evaluate_side(white,black,core.Color.WHITE)
+    black_mg,black_eg = evaluate_side(black,white,core.Color.BLACK)
+    return white_mg - black_mg,white_eg - black_eg
+
+class PawnHashTable:
+    '''
+    fixed-size, always-replace cache of pawn-structure scores keyed by
+    Board.pawn_key. The number of entries is fixed by <size_kb>.
+    '''
+    def __init__(self,size_kb:float=256):
+        n_entries = max(int(size_kb * 2**10) // ENTRY_SIZE,1)
+        # round down to a power of two so the slot is a mask of the key
+        self.n_entries = 1 << (n_entries.bit_length() - 1)
+        self._mask = self.n_entries - 1
+        self.keys = array('Q',[0]) * self.n_entries
+        self.mg = array('i',[0]) * self.n_entries
+        self.eg = array('i',[0]) * self.n_entries
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self) -> None:
+        '''empty the table and reset counters'''
+        self.keys = array('Q',[0]) * self.n_entries
+        self.mg = array('i',[0]) * self.n_entries
+        self.eg = array('i',[0]) * self.n_entries
+        self.probes = self.hits = 0
+
+    def probe(self,board) -> Tuple[int,int]:
+        '''
+        pawn-structure score of <board> (see evaluate_pawns), computed and
+        stored only if the table has no entry for its pawns. A key of 0 (no
+        pawns at all) matches the empty slots, whose 0 scores are correct.
+        '''
+        self.probes += 1
+        key = board.pawn_key
+        i = key & self._mask
+        if self.keys[i] == key:
+            self.hits += 1
+            return self.mg[i],self.eg[i]
+        mg,eg = evaluate_pawns(board)
+        self.keys[i] = key
+        self.mg[i] = mg
+        self.eg[i] = eg
+        return mg,eg
+
+PAWN_TABLE = PawnHashTable()
+'''table used by evaluation.evaluate; each process has its own'''
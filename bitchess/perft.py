@@ -0,0 +1,34 @@
+'''perft: count the leaf nodes of the legal move tree, to test move generation'''
+from .board import Board
+from .move import Move
+from typing import List, Tuple
+
+def _moves(board:Board,piece_color:bool) -> List[Move]:
+    moves = board.get_pseudolegal_moves(piece_color)
+    moves.extend(board.get_castling_moves(piece_color))
+    return moves
+
+def perft(board:Board,piece_color:bool,depth:int) -> int:
+    '''
+    number of legal move sequences of <depth> plies from <board> with
+    <piece_color> to move. Moves are made and taken back on <board> itself.
+    '''
+    if depth == 0:
+        return 1
+    n = 0
+    for move in _moves(board,piece_color):
+        board.push(move)
+        if not(board.is_check(piece_color)):
+            n += 1 if depth == 1 else perft(board,not(piece_color),depth - 1)
+        board.pop()
+    return n
+
+def divide(board:Board,piece_color:bool,depth:int) -> List[Tuple[str,int]]:
+    '''perft split by first move: [(uci,count)], for tracking down bugs'''
+    out = []
+    for move in _moves(board,piece_color):
+        board.push(move)
+        if not(board.is_check(piece_color)):
+            out.append((move.get_uci(),perft(board,not(piece_color),depth - 1)))
+        board.pop()
+    return out
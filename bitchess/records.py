@@ -0,0 +1,207 @@
+'''
+compact binary game records, e.g. for self-play output. A file is a header
+followed by one record per game:
+
+    varint   length of the rest of the record in bytes
+    32 bytes start position (board.PACKED_FORMAT)
+    byte     result, index into RESULTS
+    byte     flags, bit 0 set if evals are stored
+    varint   number of moves
+    varints  move codes (Move.get_code)
+    varints  zigzag-encoded evals, one per move, if stored
+
+Move codes fit 16 bits, so most moves take 2 bytes. They are replayed onto a
+single Board with Board.move_from_code without generating legal moves.
+'''
+from .board import Board, PACKED_SIZE
+from .game import Game
+from .move import Move
+from typing import Optional, List, Iterator, Tuple, BinaryIO
+from dataclasses import dataclass, field
+
+MAGIC = b'BCGR'
+VERSION = 1
+HEADER_SIZE = 8
+'''magic 4, version 1, padding 3'''
+
+RESULTS = ['*','1-0','0-1','1/2-1/2']
+
+_EVALS = 1
+
+def write_varint(out:bytearray,n:int) -> None:
+    '''append unsigned <n> to <out>, 7 bits per byte, low bits first'''
+    while n > 127:
+        out.append(n & 127 | 128)
+        n >>= 7
+    out.append(n)
+
+def read_varint(data:bytes,pos:int) -> Tuple[int,int]:
+    '''(value,position after it) of the varint at <pos> of <data>'''
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 127) << shift
+        if b < 128:
+            return n,pos
+        shift += 7
+
+def _zigzag(n:int) -> int:
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+def _unzigzag(n:int) -> int:
+    return n >> 1 if not(n & 1) else -((n + 1) >> 1)
+
+@dataclass
+class RecordedGame:
+    '''one stored game'''
+    start: bytes
+    '''packed start position, see Board.to_packed'''
+    moves: List[int] = field(default_factory=list)
+    '''move codes, see Move.get_code'''
+    result: str = '*'
+    evals: Optional[List[int]] = None
+    '''score of each move, e.g. from the search that chose it'''
+
+    @classmethod
+    def from_game(
+        cls,game:Game,result:Optional[str]=None,evals:Optional[List[int]]=None
+    ) -> 'RecordedGame':
+        '''record the moves of <game>, with its result unless <result> is given'''
+        start_board = game.board_stack[0] if game.board_stack else game.current_board
+        fen_parts = game.fen.split()
+        start = start_board.to_packed(
+            fen_parts[1] == 'w',int(fen_parts[4]),int(fen_parts[5])
+        )
+        return cls(
+            start,[m.get_code() for m in game.move_stack],
+            game.result() if result is None else result,evals
+        )
+
+    def to_bytes(self) -> bytes:
+        '''the record as stored in a file, length prefix included'''
+        if self.evals is not None and len(self.evals) != len(self.moves):
+            raise ValueError('evals must have one score per move')
+        body = bytearray(self.start)
+        body.append(RESULTS.index(self.result))
+        body.append(0 if self.evals is None else _EVALS)
+        write_varint(body,len(self.moves))
+        for code in self.moves:
+            write_varint(body,code)
+        if self.evals is not None:
+            for score in self.evals:
+                write_varint(body,_zigzag(score))
+        out = bytearray()
+        write_varint(out,len(body))
+        return bytes(out + body)
+
+    @classmethod
+    def from_bytes(cls,body:bytes) -> 'RecordedGame':
+        '''decode a record without its length prefix'''
+        start = bytes(body[:PACKED_SIZE])
+        result,flags = RESULTS[body[PACKED_SIZE]],body[PACKED_SIZE + 1]
+        n,pos = read_varint(body,PACKED_SIZE + 2)
+        moves = []
+        for _ in range(n):
+            code,pos = read_varint(body,pos)
+            moves.append(code)
+        evals = None
+        if flags & _EVALS:
+            evals = []
+            for _ in range(n):
+                score,pos = read_varint(body,pos)
+                evals.append(_unzigzag(score))
+        return cls(start,moves,result,evals)
+
+    def replay(self) -> Iterator[Tuple[Board,bool,Optional[Move]]]:
+        '''
+        yield (board,piece_color to move,next move) for each position of the
+        game, the last with next move None. The same Board is updated in
+        place between positions: copy it to keep one.
+        '''
+        board,piece_color,_,_ = Board.from_packed(self.start)
+        for code in self.moves:
+            move = board.move_from_code(code,piece_color)
+            yield board,piece_color,move
+            board.push(move)
+            piece_color = not(piece_color)
+        yield board,piece_color,None
+
+    def game(self) -> Game:
+        '''the record as a Game, with its board and move stacks'''
+        game = Game.from_packed(self.start)
+        for code in self.moves:
+            move = game.current_board.move_from_code(code,game._current_player)
+            board = Board.copy(game.current_board)
+            board.push(move)
+            # the game keeps every board, so nothing needs taking back
+            board._undo_stack = []
+            game._post_move_update(move,board)
+        return game
+
+class GameWriter:
+    '''
+    appends game records to the file <path>, creating it if needed. Call
+    close() (or use the object as a context manager) to flush.
+    '''
+    def __init__(self,path:str):
+        self.file = open(path,'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC + bytes([VERSION]) + bytes(HEADER_SIZE - 5))
+        else:
+            _check_header(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def write(self,record:RecordedGame) -> None:
+        self.file.write(record.to_bytes())
+
+    def write_game(
+        self,game:Game,result:Optional[str]=None,evals:Optional[List[int]]=None
+    ) -> None:
+        self.write(RecordedGame.from_game(game,result,evals))
+
+def _check_header(path:str) -> None:
+    with open(path,'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if header[:4] != MAGIC or header[4:5] != bytes([VERSION]):
+        raise ValueError(f'{path} is not a version {VERSION} game record file')
+
+class GameReader:
+    '''
+    iterates over the records of the file <path> one at a time, without
+    loading the whole file
+    '''
+    def __init__(self,path:str):
+        _check_header(path)
+        self.path = path
+
+    def __iter__(self) -> Iterator[RecordedGame]:
+        with open(self.path,'rb') as f:
+            f.seek(HEADER_SIZE)
+            while True:
+                length = _read_length(f)
+                if length is None:
+                    return
+                yield RecordedGame.from_bytes(f.read(length))
+
+def _read_length(f:BinaryIO) -> Optional[int]:
+    '''the varint length prefix of the next record, None at the end of <f>'''
+    n = shift = 0
+    while True:
+        b = f.read(1)
+        if not(b):
+            if shift:
+                raise ValueError('truncated game record')
+            return None
+        n |= (b[0] & 127) << shift
+        if b[0] < 128:
+            return n
+        shift += 7
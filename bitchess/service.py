@@ -0,0 +1,207 @@
+'''
+asyncio interface to the search for serving many games at once. Searches
+run in a bounded process pool so the event loop stays responsive.
+'''
+from .game import Game
+from .move import Move
+from .algorithms.negamax import SearchConfig
+from .algorithms.deepening import IterativeDeepening, SearchLimits
+from .algorithms.transposition import TranspositionTable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, astuple
+from typing import Optional, List, Union
+import multiprocessing as mp
+import asyncio
+import os
+
+# per-process state of pool workers, set by _init_worker
+_cancel_flags = None
+_config = None
+_tt = None
+
+def _init_worker(cancel_flags,config):
+    global _cancel_flags,_config,_tt
+    _cancel_flags = cancel_flags
+    _config = config
+    _tt = TranspositionTable(config.hash_mb)
+
+class _CancelFlag:
+    '''stop event of a search, set through a slot of the shared cancel flags'''
+    def __init__(self,slot:int):
+        self.slot = slot
+
+    def is_set(self) -> bool:
+        return _cancel_flags[self.slot] != 0
+
+    def set(self) -> None:
+        _cancel_flags[self.slot] = 1
+
+def _analyse(fen:str,limits:SearchLimits,slot:int):
+    '''search in a worker process, stopping early if the slot is cancelled'''
+    search = IterativeDeepening(
+        Game(fen=fen),limits,_CancelFlag(slot),config=_config,tt=_tt
+    )
+    result = search.search()
+    return (
+        None if result.best_move is None else result.best_move.get_uci(),
+        result.score,result.depth,[m.get_uci() for m in result.pv],
+        result.nodes + result.qnodes
+    )
+
+@dataclass
+class Analysis:
+    '''result of EngineService.analyse'''
+    best_move: Optional[str]
+    '''long algebraic notation, None if the side to move has no moves'''
+    score: int
+    depth: int
+    pv: List[str] = field(default_factory=list)
+    nodes: int = 0
+
+@dataclass
+class ServiceMetrics:
+    '''snapshot of an EngineService's load and counters'''
+    queued: int
+    '''searches waiting for a free worker'''
+    running: int
+    requests: int
+    coalesced: int
+    '''requests answered by joining an identical search already in flight'''
+    cancelled: int
+    completed: int
+
+class EngineService:
+    '''
+    asyncio front end to a pool of <n_workers> search processes (one per CPU
+    if None). At most n_workers searches run at once; the rest queue in the
+    event loop.
+
+    Cancelling the task awaiting a request stops its search early. Identical
+    requests (same position and limits) made while one is in flight share
+    its search, which is only cancelled once every requester has cancelled.
+    '''
+    def __init__(self,n_workers:Optional[int]=None,config:Optional[SearchConfig]=None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.config = config if config is not None else SearchConfig()
+        self._cancel_flags = mp.RawArray('b',self.n_workers)
+        self._executor = ProcessPoolExecutor(
+            self.n_workers,initializer=_init_worker,
+            initargs=(self._cancel_flags,self.config)
+        )
+        self._free_slots = list(range(self.n_workers))
+        self._slots = None
+        self._inflight = {}
+        self.queued = 0
+        self.running = 0
+        self.requests = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.completed = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self,*args):
+        await self.aclose()
+
+    def _cancel_all(self) -> None:
+        for slot in range(self.n_workers):
+            self._cancel_flags[slot] = 1
+
+    def close(self) -> None:
+        '''stop all searches and shut down the pool, blocking until it has'''
+        self._cancel_all()
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self) -> None:
+        '''
+        stop all searches and shut down the pool, waiting for the workers in
+        a thread so other coroutines keep running meanwhile
+        '''
+        self._cancel_all()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None,self._executor.shutdown,True)
+
+    def metrics(self) -> ServiceMetrics:
+        return ServiceMetrics(
+            self.queued,self.running,self.requests,self.coalesced,
+            self.cancelled,self.completed
+        )
+
+    async def analyse(
+        self,position:Union[str,Game],limit:Optional[SearchLimits]=None
+    ) -> Analysis:
+        '''search <position> (a FEN or a Game) under <limit>'''
+        fen = position if isinstance(position,str) else position.get_fen()
+        limit = limit if limit is not None else SearchLimits(depth=4)
+        key = (fen,astuple(limit))
+        self.requests += 1
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = [asyncio.ensure_future(self._search(fen,limit)),0]
+            self._inflight[key] = entry
+            entry[0].add_done_callback(lambda _,entry=entry: self._forget(key,entry))
+        else:
+            self.coalesced += 1
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            entry[1] -= 1
+            if entry[1] == 0 and not(entry[0].done()):
+                # a dying search must not take new requests while it winds down
+                self._forget(key,entry)
+                entry[0].cancel()
+            raise
+
+    def _forget(self,key,entry) -> None:
+        '''drop <entry> from the in-flight searches unless a newer one replaced it'''
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    async def play(self,game:Game,limit:Optional[SearchLimits]=None) -> Optional[Move]:
+        '''
+        select a move for the side to move in <game>, None if there is none.
+        The game itself is not changed.
+        '''
+        analysis = await self.analyse(game,limit)
+        if analysis.best_move is None:
+            return None
+        return game.current_board.get_move_from_uci(
+            analysis.best_move,game._current_player
+        )
+
+    async def _search(self,fen:str,limit:SearchLimits) -> Analysis:
+        '''run one search on a free worker, waiting in the queue for one'''
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.n_workers)
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.queued -= 1
+        slot = self._free_slots.pop()
+        self._cancel_flags[slot] = 0
+        self.running += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor,_analyse,fen,limit,slot)
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # stop the worker and keep the slot until it has finished
+            self.cancelled += 1
+            self._cancel_flags[slot] = 1
+            try:
+                await future
+            except Exception:
+                pass
+            raise
+        finally:
+            self.running -= 1
+            self._free_slots.append(slot)
+            self._slots.release()
+        self.completed += 1
+        return Analysis(*result)
@@ -1,53 +1,54 @@
 '''base functions for manipulating squaresets'''
 
-from bitarray import bitarray, util as bitutil
+from bitarray import bitarray
 from .exceptions import InvalidSquareSetError
+from .tables import TABLES, DIRECTIONS
 import enum
 
+def _from_hex(digits:str) -> bitarray:
+    '''
+    squareset of the hex <digits>, read like bitarray.util.hex2ba with little
+    endian (square 0 is the low bit of the first digit) but without importing
+    bitarray.util
+    '''
+    arr = bitarray(endian='little')
+    arr.frombytes(bytes.fromhex(''.join(
+        digits[i+1] + digits[i] for i in range(0,len(digits),2)
+    )))
+    return arr
+
 # Define reference squaresets
 
 UNIVERSE = 64 * bitarray('1',endian='little')
 EMPTY = 64 * bitarray('0',endian='little')
 
-SQUARES = {}
-for i in range(0,64):
-    SQUARES[i] = bitutil.hex2ba('1000000000000000',endian='little') >> i
-
-FILE = [
-    8 * bitarray('10000000',endian='little'),
-    8 * bitarray('01000000',endian='little'),
-    8 * bitarray('00100000',endian='little'),
-    8 * bitarray('00010000',endian='little'),
-    8 * bitarray('00001000',endian='little'),
-    8 * bitarray('00000100',endian='little'),
-    8 * bitarray('00000010',endian='little'),
-    8 * bitarray('00000001',endian='little')
-]
+# read-only views of the shared table cache: copy before changing in place
+SQUARES = dict(enumerate(TABLES.squaresets('SQUARES')))
+FILE = TABLES.squaresets('FILES')
 NOT_FILE = [ x ^ UNIVERSE for x in FILE ]
 
-
-RANK = [
-    bitutil.hex2ba('FF00000000000000',endian='little'),
-    bitutil.hex2ba('00FF000000000000',endian='little'),
-    bitutil.hex2ba('0000FF0000000000',endian='little'),
-    bitutil.hex2ba('000000FF00000000',endian='little'),
-    bitutil.hex2ba('00000000FF000000',endian='little'),
-    bitutil.hex2ba('0000000000FF0000',endian='little'),
-    bitutil.hex2ba('000000000000FF00',endian='little'),
-    bitutil.hex2ba('00000000000000FF',endian='little')
-]
+RANK = TABLES.squaresets('RANKS')
 END_RANKS = RANK[0] | RANK[7]
 NOT_RANK = [ x ^ UNIVERSE for x in RANK ]
 
+KNIGHT_ATTACKS = TABLES.squaresets('KNIGHT_ATTACKS')
+KING_ATTACKS = TABLES.squaresets('KING_ATTACKS')
+PAWN_ATTACKS = [TABLES.squaresets('PAWN_ATTACKS',64,64),TABLES.squaresets('PAWN_ATTACKS',0,64)]
+'''squares a pawn attacks from each square, indexed [piece_color][square]'''
+RAYS = {
+    d:TABLES.squaresets('RAYS',64 * i,64) for i,d in enumerate(DIRECTIONS)
+}
+'''squares along each direction from each square on an empty board, e.g. RAYS['NE'][0]'''
+
 # DIAGONAL ROTATION ALGORITHM
-_DIAG_K1 = bitutil.hex2ba('0055005500550055',endian='little')
-_DIAG_K2 = bitutil.hex2ba('0000333300003333',endian='little')
-_DIAG_K4 = bitutil.hex2ba('00000000F0F0F0F0',endian='little')
+_DIAG_K1 = _from_hex('0055005500550055')
+_DIAG_K2 = _from_hex('0000333300003333')
+_DIAG_K4 = _from_hex('00000000F0F0F0F0')
 
 # ANTIDIAGONAL ROTATION ALGORITHM
-_AD_K1 = bitutil.hex2ba('00AA00AA00AA00AA',endian='little')
-_AD_K2 = bitutil.hex2ba('0000CCCC0000CCCC',endian='little')
-_AD_K4 = bitutil.hex2ba('F0F0F0F00F0F0F0F',endian='little')
+_AD_K1 = _from_hex('00AA00AA00AA00AA')
+_AD_K2 = _from_hex('0000CCCC0000CCCC')
+_AD_K4 = _from_hex('F0F0F0F00F0F0F0F')
 
 
 def print_squareset(arr: bitarray) -> bitarray:
@@ -152,7 +153,7 @@ def northeast_fill(arr:bitarray,unoccupied:bitarray=UNIVERSE) -> bitarray:
     prop &= prop >> 9
     arr |= prop & (arr >> 18)
     prop &= prop >> 18
-    arr |= prop & (arr >> 18)
+    arr |= prop & (arr >> 36)
     return arr
 
 def east_fill(arr:bitarray,unoccupied:bitarray=UNIVERSE) -> bitarray:
@@ -192,7 +193,7 @@ def southwest_fill(arr:bitarray,unoccupied:bitarray=UNIVERSE) -> bitarray:
     prop &= prop << 9
     arr |= prop & (arr << 18)
     prop &= prop << 18
-    arr |= prop & (arr << 27)
+    arr |= prop & (arr << 36)
     return arr
 
 def west_fill(arr:bitarray,unoccupied:bitarray=UNIVERSE) -> bitarray:
@@ -0,0 +1,512 @@
+'''
+endgame tablebases for a lone king against a king and one or two pieces
+(KQK, KRK, KPK, KBNK...), built by retrograde analysis.
+
+A table stores, for every position of its material with either side to
+move, the distance to mate in plies (DTM) of the side with the pieces, or a
+draw. Positions are reduced by board symmetry before indexing: without pawns
+the white king is mirrored into the a1-d1-d4 triangle (flips about the
+vertical, horizontal and a1-h8 axes), with pawns only across the d/e file
+boundary. Tables are written to compact files of one byte per position and
+probed through mmap.
+
+When black captures a piece, the position is looked up in the table of the
+material left (KRK for KRRK), and when a pawn promotes, in the table of the
+promoted material; generate() builds those tables first.
+
+Three-piece tables take seconds to generate; four-piece ones such as KBNK
+are 64 times larger and take hours in pure Python.
+'''
+from . import core, squareset as ss
+from .board import Board
+from .tables import TABLES, DIRECTIONS
+from typing import Optional, List, Dict, Tuple
+import mmap
+import os
+
+MAGIC = b'BCTB'
+VERSION = 1
+HEADER_SIZE = 16
+'''magic 4, version 1, number of pieces besides the kings 1, padding 2, name 8'''
+
+SUFFIX = '.btb'
+
+PIECE_LETTERS = { v:k for k,v in core.CODE_TO_PIECE.items() }
+'''piece name to its upper case letter'''
+
+def _squares_of(bb:int) -> List[int]:
+    out = []
+    while bb:
+        low = bb & -bb
+        out.append(low.bit_length() - 1)
+        bb ^= low
+    return out
+
+def _square_map(flip) -> List[int]:
+    '''where each square goes under the squareset <flip>'''
+    return [flip(ss.SQUARES[i]).index(1) for i in range(64)]
+
+FLIP_VERTICAL = _square_map(ss.flip_vertical)
+FLIP_HORIZONTAL = _square_map(ss.flip_horizontal)
+FLIP_DIAGONAL = _square_map(ss.flip_diagonal)
+
+def _canonical_maps(pawns:bool) -> Tuple[List[Optional[int]],List[List[int]]]:
+    '''
+    (slot of each white king square, or None if not canonical; square map
+    that brings each white king square to a canonical one)
+    '''
+    maps = []
+    for wk in range(64):
+        m = list(range(64))
+        if m[wk] % 8 > 3:
+            m = [FLIP_HORIZONTAL[s] for s in m]
+        if not(pawns):
+            if m[wk] // 8 > 3:
+                m = [FLIP_VERTICAL[s] for s in m]
+            if m[wk] // 8 > m[wk] % 8:
+                m = [FLIP_DIAGONAL[s] for s in m]
+        maps.append(m)
+    canonical = sorted({maps[wk][wk] for wk in range(64)})
+    slots = [None] * 64
+    for i,s in enumerate(canonical):
+        slots[s] = i
+    return slots,maps
+
+# attack tables as ints, views of the shared table cache
+KING_ATTACKS = TABLES.ints('KING_ATTACKS')
+KNIGHT_ATTACKS = TABLES.ints('KNIGHT_ATTACKS')
+PAWN_ATTACKS = TABLES.ints('PAWN_ATTACKS')[:64]
+'''squares attacked by a white pawn'''
+
+def _rays(direction:str,step:int) -> List[List[int]]:
+    '''squares along the ray from each square, nearest first'''
+    rays = TABLES.ints('RAYS')[64 * DIRECTIONS.index(direction):]
+    return [sorted(_squares_of(rays[i]),key=lambda s: (s - i) * step) for i in range(64)]
+
+ROOK_RAYS = [_rays('N',1),_rays('S',-1),_rays('E',1),_rays('W',-1)]
+BISHOP_RAYS = [_rays('NE',1),_rays('NW',1),_rays('SE',-1),_rays('SW',-1)]
+SLIDER_RAYS = {'ROOK':ROOK_RAYS,'BISHOP':BISHOP_RAYS,'QUEEN':ROOK_RAYS + BISHOP_RAYS}
+
+def attacks(piece:str,square:int,occupied:int) -> int:
+    '''squares attacked by a white <piece> on <square> given <occupied>'''
+    if piece == 'KING':
+        return KING_ATTACKS[square]
+    if piece == 'KNIGHT':
+        return KNIGHT_ATTACKS[square]
+    if piece == 'PAWN':
+        return PAWN_ATTACKS[square]
+    out = 0
+    for rays in SLIDER_RAYS[piece]:
+        for s in rays[square]:
+            out |= 1 << s
+            if occupied >> s & 1:
+                break
+    return out
+
+def parse_material(name:str) -> List[str]:
+    '''pieces besides the white king of a table name such as "KBNK"'''
+    name = name.upper()
+    if len(name) < 3 or name[0] != 'K' or name[-1] != 'K' or 'K' in name[1:-1]:
+        raise ValueError(f'unsupported material {name}: expected K<pieces>K')
+    return [core.CODE_TO_PIECE[c] for c in name[1:-1]]
+
+class Table:
+    '''
+    DTM table of one material. Positions are indexed by (white king slot,
+    black king, piece squares...); values are 0 for draws and positions
+    that can't occur, else 1 + the plies to mate by white. <data> holds
+    the white-to-move half followed by the black-to-move half.
+    '''
+    def __init__(self,name:str,data=None):
+        self.name = name.upper()
+        self.pieces = parse_material(self.name)
+        self.has_pawns = 'PAWN' in self.pieces
+        self.slots,self.maps = _canonical_maps(self.has_pawns)
+        self.n_slots = sum(s is not None for s in self.slots)
+        self.size = self.n_slots * 64 ** (1 + len(self.pieces))
+        self.data = data
+        '''None until generated or opened'''
+
+    def index(self,wk:int,bk:int,squares:List[int]) -> int:
+        '''index of a position, after mirroring it into the canonical half'''
+        m = self.maps[wk]
+        mapped = [m[bk]] + [m[s] for s in squares]
+        if not(self.has_pawns) and m[wk] // 8 == m[wk] % 8:
+            # king on the a1-h8 diagonal: the first piece off it decides
+            for s in mapped:
+                if s // 8 != s % 8:
+                    if s // 8 > s % 8:
+                        mapped = [FLIP_DIAGONAL[s] for s in mapped]
+                    break
+        i = self.slots[m[wk]]
+        for s in mapped:
+            i = i * 64 + s
+        return i
+
+    def decode(self,i:int) -> Tuple[int,int,List[int]]:
+        '''(white king,black king,piece squares) of a canonical index'''
+        squares = []
+        for _ in self.pieces:
+            i,s = divmod(i,64)
+            squares.append(s)
+        squares.reverse()
+        slot,bk = divmod(i,64)
+        return self.slots.index(slot),bk,squares
+
+    def value(self,white_to_move:bool,i:int) -> int:
+        return self.data[i if white_to_move else self.size + i]
+
+    def probe(self,wk:int,bk:int,squares:List[int],white_to_move:bool) -> Optional[int]:
+        '''
+        plies until white mates from the position, 0 for a draw, None if
+        black is already checkmated
+        '''
+        v = self.value(white_to_move,self.index(wk,bk,squares))
+        if v == 1:
+            return None
+        return v - 1 if v else 0
+
+    def save(self,path:str) -> None:
+        header = MAGIC + bytes([VERSION,len(self.pieces),0,0]) + \
+            self.name.encode().ljust(8,b'\0')
+        with open(path,'wb') as f:
+            f.write(header)
+            f.write(self.data)
+
+    @classmethod
+    def open(cls,path:str) -> 'Table':
+        '''memory-map a table written by save()'''
+        with open(path,'rb') as f:
+            data = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        if data[:4] != MAGIC or data[4] != VERSION:
+            data.close()
+            raise ValueError(f'{path} is not a version {VERSION} tablebase')
+        name = data[8:16].rstrip(b'\0').decode()
+        table = cls(name,memoryview(data)[HEADER_SIZE:])
+        table._mmap = data
+        return table
+
+    def close(self) -> None:
+        if getattr(self,'_mmap',None) is not None:
+            self.data.release()
+            self._mmap.close()
+            self._mmap = None
+
+def _material_name(pieces:List[str]) -> str:
+    return 'K' + ''.join(PIECE_LETTERS[p] for p in pieces) + 'K'
+
+def _capture_names(pieces:List[str]) -> List[str]:
+    '''tables of the material left after black captures one of <pieces>'''
+    if len(pieces) < 2:
+        return []
+    return sorted({_material_name(pieces[:j] + pieces[j + 1:]) for j in range(len(pieces))})
+
+class Generator:
+    '''retrograde analysis of one material; see generate()'''
+    def __init__(self,name:str,subtables:Optional[Dict[str,Table]]=None):
+        self.table = Table(name)
+        self.pieces = self.table.pieces
+        self.subtables = subtables or {}
+
+    def _valid(self,wk:int,bk:int,squares:List[int]) -> bool:
+        '''distinct squares, kings apart, no pawns on the first or last rank'''
+        all_squares = [wk,bk] + squares
+        if len(set(all_squares)) != len(all_squares):
+            return False
+        if KING_ATTACKS[wk] >> bk & 1:
+            return False
+        return all(
+            0 < s // 8 < 7 for s,p in zip(squares,self.pieces) if p == 'PAWN'
+        )
+
+    def _attacked(self,square:int,wk:int,squares:List[int],occupied:int,skip:int=-1) -> bool:
+        '''is <square> attacked by white, ignoring the piece on <skip>'''
+        if KING_ATTACKS[wk] >> square & 1:
+            return True
+        for s,p in zip(squares,self.pieces):
+            if s != skip and attacks(p,s,occupied) >> square & 1:
+                return True
+        return False
+
+    def _black_in_check(self,wk,bk,squares) -> bool:
+        occupied = 1 << wk | 1 << bk
+        for s in squares:
+            occupied |= 1 << s
+        return self._attacked(bk,wk,squares,occupied)
+
+    def _black_moves(self,wk:int,bk:int,squares:List[int]):
+        '''
+        yield (table,white-to-move index) after each legal black king move.
+        The table is this one, or after a capture the table of the material
+        left, or None if no piece is left to mate with.
+        '''
+        occupied = 1 << wk
+        for s in squares:
+            occupied |= 1 << s
+        for t in _squares_of(KING_ATTACKS[bk] & ~KING_ATTACKS[wk] & ~(1 << wk)):
+            if occupied >> t & 1:
+                # capture, legal if the piece isn't defended
+                if not(self._attacked(t,wk,squares,occupied & ~(1 << t),skip=t)):
+                    j = squares.index(t)
+                    left = self.pieces[:j] + self.pieces[j + 1:]
+                    if not(left):
+                        yield None,None
+                        continue
+                    sub = self.subtables[_material_name(left)]
+                    yield sub,sub.index(wk,t,squares[:j] + squares[j + 1:])
+            elif not(self._attacked(t,wk,squares,occupied)):
+                yield self.table,self.table.index(wk,t,squares)
+
+    def _capture_loss(self,wk:int,bk:int,squares:List[int]) -> Optional[int]:
+        '''
+        None if black has no legal capture, 0 if one escapes to a draw, else
+        the largest stored value (1 + plies to mate) of the positions its
+        captures lead to
+        '''
+        worst = None
+        for table,k in self._black_moves(wk,bk,squares):
+            if table is self.table:
+                continue
+            v = 0 if table is None else table.value(True,k)
+            if v == 0:
+                return 0
+            worst = v if worst is None else max(worst,v)
+        return worst
+
+    def _capture_losses(self) -> Dict[int,List[int]]:
+        '''
+        black-to-move indices whose captures all lose, by the largest value
+        of those captures: the ply of the black pass that must recheck them,
+        since no move inside this table may come later
+        '''
+        pending = {}
+        if len(self.pieces) < 2:
+            return pending
+        t = self.table
+        for i in range(t.size):
+            wk,bk,squares = t.decode(i)
+            if not(self._valid(wk,bk,squares)):
+                continue
+            v = self._capture_loss(wk,bk,squares)
+            if v:
+                pending.setdefault(v,[]).append(i)
+        return pending
+
+    def _white_unmoves(self,wk:int,bk:int,squares:List[int]):
+        '''yield the white-to-move positions white could have moved from'''
+        occupied = 1 << wk | 1 << bk
+        for s in squares:
+            occupied |= 1 << s
+        for t in _squares_of(KING_ATTACKS[wk] & ~occupied & ~KING_ATTACKS[bk]):
+            yield t,bk,squares
+        for j,(s,p) in enumerate(zip(squares,self.pieces)):
+            if p == 'PAWN':
+                origins = []
+                if s - 8 >= 8 and not(occupied >> (s - 8) & 1):
+                    origins.append(s - 8)
+                    if s // 8 == 3 and not(occupied >> (s - 16) & 1):
+                        origins.append(s - 16)
+            else:
+                origins = _squares_of(attacks(p,s,occupied) & ~occupied)
+            for t in origins:
+                yield wk,bk,squares[:j] + [t] + squares[j + 1:]
+
+    def _promotion_wins(self) -> Dict[int,List[int]]:
+        '''
+        white-to-move indices winning by promoting a pawn, by plies to mate,
+        from the tables of the promoted material
+        '''
+        pending = {}
+        if 'PAWN' not in self.pieces:
+            return pending
+        t = self.table
+        for i in range(t.size):
+            wk,bk,squares = t.decode(i)
+            if not(self._valid(wk,bk,squares)) or self._black_in_check(wk,bk,squares):
+                continue
+            best = None
+            for j,(s,p) in enumerate(zip(squares,self.pieces)):
+                target = s + 8
+                if p != 'PAWN' or s // 8 != 6 or target in (wk,bk) or target in squares:
+                    continue
+                for promotion in ('QUEEN','ROOK'):
+                    pieces = self.pieces[:j] + [promotion] + self.pieces[j + 1:]
+                    sub = self.subtables.get(_material_name(pieces))
+                    if sub is None:
+                        continue
+                    promoted = squares[:j] + [target] + squares[j + 1:]
+                    v = sub.value(False,sub.index(wk,bk,promoted))
+                    if v and (best is None or v < best):
+                        best = v
+            if best is not None:
+                # lost for black in best - 1 plies after the promotion
+                pending.setdefault(best,[]).append(i)
+        return pending
+
+    def generate(self) -> Table:
+        t = self.table
+        t.data = bytearray(2 * t.size)
+        data,size = t.data,t.size
+        # checkmates: black to move, in check, no legal moves
+        frontier = []
+        for i in range(size):
+            wk,bk,squares = t.decode(i)
+            if not(self._valid(wk,bk,squares)):
+                continue
+            if self._black_in_check(wk,bk,squares) and \
+                    next(self._black_moves(wk,bk,squares),False) is False:
+                data[size + i] = 1
+                frontier.append(i)
+        pending = self._promotion_wins()
+        captures = self._capture_losses()
+
+        plies = 1
+        while frontier or any(n >= plies for n in pending) or \
+                any(n >= plies for n in captures):
+            found = []
+            if plies % 2: # white to move, mates in <plies>
+                for i in frontier:
+                    wk,bk,squares = t.decode(i)
+                    for pwk,pbk,psquares in self._white_unmoves(wk,bk,squares):
+                        j = t.index(pwk,pbk,psquares)
+                        if data[j] == 0 and not(self._black_in_check(pwk,pbk,psquares)):
+                            data[j] = plies + 1
+                            found.append(j)
+                for j in pending.pop(plies,[]):
+                    if data[j] == 0:
+                        data[j] = plies + 1
+                        found.append(j)
+            else: # black to move, mated in <plies> whatever it plays
+                candidates = []
+                for i in frontier:
+                    wk,bk,squares = t.decode(i)
+                    occupied = 1 << wk
+                    for s in squares:
+                        occupied |= 1 << s
+                    for pbk in _squares_of(KING_ATTACKS[bk] & ~occupied & ~KING_ATTACKS[wk]):
+                        candidates.append(t.index(wk,pbk,squares))
+                # positions whose slowest loss is a capture into a sub-table
+                candidates.extend(captures.pop(plies,[]))
+                for j in candidates:
+                    if data[size + j] or not(self._valid(*t.decode(j))):
+                        continue
+                    moves = list(self._black_moves(*t.decode(j)))
+                    # no moves is stalemate: the seeds hold the mates
+                    if moves and all(
+                        table is not None and 0 < table.value(True,k) <= plies
+                        for table,k in moves
+                    ):
+                        data[size + j] = plies + 1
+                        found.append(j)
+            frontier = found
+            plies += 1
+        return t
+
+def generate(name:str,subtables:Optional[Dict[str,Table]]=None) -> Table:
+    '''
+    build the table of <name> (e.g. "KRK"). The tables of the material left
+    after a capture (KRK for KRRK) and, with pawns, of the promoted material
+    (KQK and KRK for KPK) are generated if not given in <subtables>.
+    '''
+    pieces = parse_material(name)
+    subtables = dict(subtables or {})
+    needed = _capture_names(pieces)
+    for j,p in enumerate(pieces):
+        if p == 'PAWN':
+            for promotion in ('QUEEN','ROOK'):
+                needed.append(_material_name(pieces[:j] + [promotion] + pieces[j + 1:]))
+    for sub in needed:
+        if sub not in subtables:
+            subtables[sub] = generate(sub,subtables)
+    return Generator(name,subtables).generate()
+
+class Tablebases:
+    '''
+    the tables in directory <path>, memory-mapped, probed by Board. Call
+    close() (or use the object as a context manager) to unmap them.
+    '''
+    def __init__(self,path:str):
+        self.tables = {}
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith(SUFFIX):
+                table = Table.open(os.path.join(path,filename))
+                self.tables[table.name] = table
+        self.max_pieces = max(
+            (len(t.pieces) + 2 for t in self.tables.values()),default=0
+        )
+        self.probes = 0
+        self.hits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            table.close()
+
+    def probe(self,board:Board,piece_color:bool) -> Optional[int]:
+        '''
+        plies to mate with <piece_color> to move: positive if it mates,
+        negative if it gets mated, 0 for a draw. None if the material isn't
+        in the tables or the side to move is already checkmated.
+        '''
+        self.probes += 1
+        white = board.squaresets[core.Color.WHITE]
+        black = board.squaresets[core.Color.BLACK]
+        # the tables have the pieces on white's side: mirror if black has them
+        strong = core.Color.WHITE if white.count() >= black.count() else core.Color.BLACK
+        if board.squaresets[not(strong)].count() != 1:
+            return None
+        pieces = [
+            p for p in core.PIECE_NAMES[:-1]
+            for _ in range((board.squaresets[p] & board.squaresets[strong]).count())
+        ]
+        table = self.tables.get(_material_name(pieces))
+        if table is None:
+            # pieces may be listed in another order, e.g. KBNK
+            for t in self.tables.values():
+                if sorted(t.pieces) == sorted(pieces):
+                    table = t
+                    break
+            else:
+                return None
+        squares = []
+        used = set()
+        for p in table.pieces:
+            for s in (board.squaresets[p] & board.squaresets[strong]).search(1):
+                if s not in used:
+                    used.add(s)
+                    squares.append(s)
+                    break
+        king = board.squaresets['KING']
+        wk = (king & board.squaresets[strong]).index(1)
+        bk = (king & board.squaresets[not(strong)]).index(1)
+        if not(strong):
+            wk,bk = FLIP_VERTICAL[wk],FLIP_VERTICAL[bk]
+            squares = [FLIP_VERTICAL[s] for s in squares]
+        dtm = table.probe(wk,bk,squares,piece_color == strong)
+        if dtm is None:
+            return None
+        self.hits += 1
+        return dtm if piece_color == strong else -dtm
+
+_opened: Dict[str,Tablebases] = {}
+
+def open_tablebases(path:str) -> Tablebases:
+    '''the Tablebases of directory <path>, mapped once per process'''
+    path = os.path.abspath(path)
+    if path not in _opened:
+        _opened[path] = Tablebases(path)
+    return _opened[path]
+
+def write_tables(path:str,names:List[str]) -> None:
+    '''generate the tables <names> and save them in directory <path>'''
+    os.makedirs(path,exist_ok=True)
+    tables = {}
+    for name in names:
+        tables[name.upper()] = generate(name,tables)
+    for name,table in tables.items():
+        table.save(os.path.join(path,name + SUFFIX))
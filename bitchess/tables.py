@@ -0,0 +1,196 @@
+'''
+precomputed tables kept in a versioned on-disk cache. The first process to
+need them generates the file; every later one maps it read-only with mmap,
+so pool workers share the same pages instead of rebuilding the tables.
+
+The file is a header followed by little-endian 64-bit words, laid out as in
+LAYOUT. Squareset tables are served as bitarrays over the mapped buffer
+(read-only: copy one before changing it in place), and key tables as
+memoryviews of ints.
+
+The cache lives in cache_dir(). If it can't be written the tables are kept in memory.
+Bump VERSION whenever the layout or any table's contents change.
+'''
+from bitarray import bitarray
+from typing import List, Optional, Tuple
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b'BCTC'
+VERSION = 1
+HEADER = struct.Struct('<4sII4x')
+'''magic, version, number of words, padding'''
+
+ZOBRIST_SEED = 0x6269746368657373
+
+LAYOUT: List[Tuple[str,int]] = [
+    ('SQUARES',64),
+    ('FILES',8),
+    ('RANKS',8),
+    ('KNIGHT_ATTACKS',64),
+    ('KING_ATTACKS',64),
+    ('PAWN_ATTACKS',128),
+    ('RAYS',512),
+    ('ZOBRIST',781),
+]
+'''
+(name,number of words) of each table, in file order. PAWN_ATTACKS holds the
+white pawn table then the black one; RAYS one table per direction of
+DIRECTIONS, each the squares along the ray on an empty board; ZOBRIST the
+piece keys (white then black, core.PIECE_NAMES order, 64 each), castling
+keys (white kingside, queenside, black kingside, queenside), 8 en passant
+file keys and the side key.
+'''
+
+DIRECTIONS = ['N','NE','E','SE','S','SW','W','NW']
+_STEPS = [(0,1),(1,1),(1,0),(1,-1),(0,-1),(-1,-1),(-1,0),(-1,1)]
+'''(file,rank) step of each of DIRECTIONS'''
+
+OFFSETS = {}
+_n = 0
+for _name,_size in LAYOUT:
+    OFFSETS[_name] = _n
+    _n += _size
+WORDS = _n
+
+def _steps(square:int,df:int,dr:int,limit:int=8) -> int:
+    '''bitboard of up to <limit> squares from <square> in the direction (df,dr)'''
+    f,r = square % 8 + df,square // 8 + dr
+    bb = 0
+    while limit and 0 <= f < 8 and 0 <= r < 8:
+        bb |= 1 << (r * 8 + f)
+        f,r,limit = f + df,r + dr,limit - 1
+    return bb
+
+def _leaper(square:int,jumps) -> int:
+    bb = 0
+    for df,dr in jumps:
+        bb |= _steps(square,df,dr,1)
+    return bb
+
+_KNIGHT_JUMPS = [(1,2),(2,1),(2,-1),(1,-2),(-1,-2),(-2,-1),(-2,1),(-1,2)]
+
+def _zobrist_keys() -> List[int]:
+    import random
+    rng = random.Random(ZOBRIST_SEED)
+    return [rng.getrandbits(64) for _ in range(dict(LAYOUT)['ZOBRIST'])]
+
+def generate() -> List[int]:
+    '''every table as one list of words, in LAYOUT order'''
+    words = [1 << i for i in range(64)]
+    words += [0x0101010101010101 << f for f in range(8)]
+    words += [0xFF << (8 * r) for r in range(8)]
+    words += [_leaper(s,_KNIGHT_JUMPS) for s in range(64)]
+    words += [_leaper(s,_STEPS) for s in range(64)]
+    words += [_leaper(s,[(1,1),(-1,1)]) for s in range(64)]
+    words += [_leaper(s,[(1,-1),(-1,-1)]) for s in range(64)]
+    for df,dr in _STEPS:
+        words += [_steps(s,df,dr) for s in range(64)]
+    words += _zobrist_keys()
+    assert len(words) == WORDS
+    return words
+
+def to_bytes(words:List[int]) -> bytes:
+    return HEADER.pack(MAGIC,VERSION,len(words)) + struct.pack(f'<{len(words)}Q',*words)
+
+def cache_dir() -> str:
+    '''$BITCHESS_CACHE_DIR, else $XDG_CACHE_HOME/bitchess, else ~/.cache/bitchess'''
+    root = os.environ.get('BITCHESS_CACHE_DIR')
+    if root:
+        return root
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'),'.cache'),
+        'bitchess'
+    )
+
+def default_path() -> str:
+    '''path of the cache file for this VERSION'''
+    return os.path.join(cache_dir(),f'tables-v{VERSION}.bin')
+
+def _valid(buffer) -> bool:
+    if len(buffer) != HEADER.size + 8 * WORDS:
+        return False
+    magic,version,words = HEADER.unpack_from(buffer)
+    return magic == MAGIC and version == VERSION and words == WORDS
+
+def _write(path:str,data:bytes) -> None:
+    '''write <data> to <path> atomically, so concurrent readers never see a partial file'''
+    os.makedirs(os.path.dirname(path),exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp,'wb') as f:
+            f.write(data)
+        os.replace(tmp,path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _map(path:str) -> Optional[mmap.mmap]:
+    '''<path> mapped read-only, None if missing or not a valid cache file'''
+    try:
+        with open(path,'rb') as f:
+            buffer = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    except (OSError,ValueError):
+        return None
+    if not(_valid(buffer)):
+        buffer.close()
+        return None
+    return buffer
+
+class Tables:
+    '''the tables of one cache file, or of an in-memory buffer'''
+    def __init__(self,buffer,path:Optional[str]=None):
+        self.buffer = buffer
+        self.path = path
+        '''the mapped file, None if the tables live in memory'''
+        view = memoryview(buffer)[HEADER.size:]
+        self._view = view
+        if sys.byteorder == 'little':
+            self._words = view.cast('Q')
+        else:
+            self._words = list(struct.unpack(f'<{WORDS}Q',view))
+
+    @property
+    def mapped(self) -> bool:
+        return self.path is not None
+
+    def ints(self,name:str):
+        '''table <name> as a sequence of ints'''
+        start = OFFSETS[name]
+        return self._words[start:start + dict(LAYOUT)[name]]
+
+    def squaresets(self,name:str,start:int=0,n:Optional[int]=None) -> List[bitarray]:
+        '''
+        <n> entries (all if None) from <start> of table <name> as read-only
+        squaresets over the buffer
+        '''
+        first = OFFSETS[name] + start
+        if n is None:
+            n = dict(LAYOUT)[name] - start
+        return [
+            bitarray(buffer=self._view[8 * i:8 * i + 8],endian='little')
+            for i in range(first,first + n)
+        ]
+
+def open_tables(path:Optional[str]=None) -> Tables:
+    '''
+    map the cache file <path> (default_path() if None), generating and
+    writing it first if it is missing, stale or corrupt
+    '''
+    path = path or default_path()
+    buffer = _map(path)
+    if buffer is None:
+        data = to_bytes(generate())
+        try:
+            _write(path,data)
+        except OSError:
+            return Tables(data)
+        buffer = _map(path)
+        if buffer is None:
+            return Tables(data)
+    return Tables(buffer,path)
+
+TABLES = open_tables()
+'''the tables of this process'''
@@ -0,0 +1,254 @@
+'''
+UCI (universal chess interface) front end, for chess GUIs and match managers.
+Run it with the bitchess-uci console script.
+'''
+from .game import Game
+from .exceptions import IllegalMoveError
+from .algorithms.negamax import SearchConfig, MATE_SCORE, MATE_BOUND
+from .algorithms.deepening import IterativeDeepening, SearchLimits, SearchInfo, allocate_time
+from .algorithms.transposition import TranspositionTable
+from .polyglot import Book
+from typing import List, TextIO
+import threading
+import sys
+
+ENGINE_NAME = 'bitchess'
+ENGINE_AUTHOR = 'Jared Burton'
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+_COMMANDS = (
+    'uci','isready','setoption','ucinewgame','position','go','stop','ponderhit'
+)
+'''commands handled besides quit; others are ignored, as UCI requires'''
+
+_GO_VALUES = ('depth','movetime','wtime','btime','winc','binc','movestogo','nodes')
+
+def format_score(score:int) -> str:
+    '''UCI score string: "cp <centipawns>" or "mate <moves>"'''
+    if abs(score) >= MATE_BOUND:
+        moves = (MATE_SCORE - abs(score) + 1) // 2
+        return f'mate {moves if score > 0 else -moves}'
+    return f'cp {score}'
+
+class UCIEngine:
+    '''
+    UCI protocol handler writing responses to <output>. Searches run on a
+    background thread, so commands such as stop and isready are answered
+    while searching.
+    '''
+    def __init__(self,output:TextIO=sys.stdout):
+        self.output = output
+        self.config = SearchConfig()
+        self.tt = TranspositionTable(self.config.hash_mb)
+        self.book = None
+        '''Polyglot book played from before searching, see the BookFile option'''
+        self.game = Game(START_FEN)
+        self._fen_moves = (START_FEN,[])
+        '''(fen,moves) of the current game, to apply position incrementally'''
+        self._lock = threading.Lock()
+        self._thread = None
+        self._search = None
+        self._release = threading.Event()
+        '''set when an infinite or ponder search may report its best move'''
+        self._limits = None
+        self._timer = None
+
+    def send(self,line:str) -> None:
+        with self._lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def run(self,input:TextIO=sys.stdin) -> None:
+        '''handle commands from <input> until quit or end of input'''
+        for line in input:
+            if not(self.handle(line)):
+                return
+        self._quit()
+
+    def handle(self,line:str) -> bool:
+        '''handle one command, returning False once told to quit'''
+        tokens = line.split()
+        if not(tokens):
+            return True
+        command,args = tokens[0],tokens[1:]
+        if command == 'quit':
+            self._quit()
+            return False
+        if command in _COMMANDS:
+            try:
+                getattr(self,f'_{command}')(args)
+            except ValueError as e:
+                # malformed arguments: report and ignore the command
+                self.send(f'info string invalid {command}: {e}')
+        return True
+
+    def wait(self) -> None:
+        '''block until the running search, if any, has sent its best move'''
+        if self._thread is not None:
+            self._thread.join()
+
+    # COMMANDS
+    def _uci(self,args:List[str]) -> None:
+        self.send(f'id name {ENGINE_NAME}')
+        self.send(f'id author {ENGINE_AUTHOR}')
+        self.send(f'option name Hash type spin default {self.config.hash_mb} min 1 max 4096')
+        self.send('option name Ponder type check default false')
+        self.send('option name BookFile type string default <empty>')
+        self.send('uciok')
+
+    def _isready(self,args:List[str]) -> None:
+        self.send('readyok')
+
+    def _setoption(self,args:List[str]) -> None:
+        # setoption name <name> [value <value>]
+        if 'name' not in args:
+            return
+        i = args.index('name') + 1
+        j = args.index('value') if 'value' in args else len(args)
+        name,value = ' '.join(args[i:j]).lower(),' '.join(args[j + 1:])
+        if name == 'hash':
+            hash_mb = max(1,int(value))
+            self._stop_search()
+            self.config.hash_mb = hash_mb
+            self.tt = TranspositionTable(self.config.hash_mb)
+        elif name == 'bookfile':
+            if self.book is not None:
+                self.book.close()
+                self.book = None
+            if value and value != '<empty>':
+                try:
+                    self.book = Book(value)
+                except OSError:
+                    self.send(f'info string cannot open book {value}')
+
+    def _ucinewgame(self,args:List[str]) -> None:
+        self._stop_search()
+        self.tt.clear()
+
+    def _position(self,args:List[str]) -> None:
+        self._stop_search()
+        if 'moves' in args:
+            i = args.index('moves')
+            args,moves = args[:i],args[i + 1:]
+        else:
+            moves = []
+        if args and args[0] == 'fen':
+            fields = args[1:]
+            if len(fields) == 4:
+                # EPD style, without the move clocks
+                fields += ['0','1']
+            fen = ' '.join(fields)
+        else:
+            fen = START_FEN
+        previous_fen,previous_moves = self._fen_moves
+        n = len(previous_moves)
+        if fen == previous_fen and moves[:n] == previous_moves:
+            # same game: only play the new moves
+            new_moves = moves[n:]
+        else:
+            try:
+                game = Game(fen)
+            except (ValueError,IndexError,KeyError):
+                # keep the previous game
+                self.send(f'info string invalid position {fen}')
+                return
+            self.game = game
+            new_moves = moves
+        played = moves[:len(moves) - len(new_moves)]
+        for uci in new_moves:
+            try:
+                self.game.play_uci_move(uci)
+            except IllegalMoveError:
+                self.send(f'info string illegal move {uci}')
+                break
+            played.append(uci)
+        self._fen_moves = (fen,played)
+
+    def _go(self,args:List[str]) -> None:
+        limits = SearchLimits()
+        ponder = False
+        for i,token in enumerate(args):
+            if token in _GO_VALUES and i + 1 < len(args):
+                setattr(limits,token,int(args[i + 1]))
+            elif token == 'infinite':
+                limits.infinite = True
+            elif token == 'ponder':
+                ponder = True
+        self._stop_search()
+        if self.book is not None and not(limits.infinite or ponder):
+            move = self.book.find(self.game.current_board,self.game._current_player)
+            if move is not None:
+                self.send(f'bestmove {move.get_uci()}')
+                return
+        self._limits = limits
+        self._release.clear()
+        if not(limits.infinite or ponder):
+            self._release.set()
+        if ponder:
+            # search until ponderhit starts the clock, or stop
+            limits = SearchLimits(depth=limits.depth,infinite=True)
+        self._search = IterativeDeepening(
+            self.game,limits,callback=self._info,config=self.config,tt=self.tt
+        )
+        self._thread = threading.Thread(target=self._run_search,daemon=True)
+        self._thread.start()
+
+    def _stop(self,args:List[str]) -> None:
+        self._stop_search()
+
+    def _ponderhit(self,args:List[str]) -> None:
+        if self._search is None or self._release.is_set():
+            return
+        self._release.set()
+        if self._limits.infinite:
+            return
+        _,hard = allocate_time(self._limits,self.game._current_player)
+        if hard is not None:
+            self._timer = threading.Timer(hard,self._search.stop)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _quit(self) -> None:
+        self._stop_search()
+
+    # SEARCH
+    def _stop_search(self) -> None:
+        '''stop the running search, if any, and wait for its best move'''
+        if self._thread is None:
+            return
+        self._search.stop()
+        self._release.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run_search(self) -> None:
+        result = self._search.search()
+        # infinite and ponder searches may only answer once released
+        self._release.wait()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if result.best_move is None:
+            self.send('bestmove 0000')
+        elif len(result.pv) > 1:
+            self.send(
+                f'bestmove {result.best_move.get_uci()} ponder {result.pv[1].get_uci()}'
+            )
+        else:
+            self.send(f'bestmove {result.best_move.get_uci()}')
+
+    def _info(self,info:SearchInfo) -> None:
+        pv = ' '.join(m.get_uci() for m in info.pv)
+        self.send(
+            f'info depth {info.depth} score {format_score(info.score)} '
+            f'nodes {info.nodes} nps {info.nps} time {info.time} '
+            f'hashfull {self.tt.hashfull()} pv {pv}'
+        )
+
+def main() -> None:
+    '''console entry point: speak UCI on stdin/stdout'''
+    UCIEngine().run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+'''zobrist hashing of board positions'''
+from . import core
+from .tables import TABLES
+
+# the keys are views of the table cache, drawn from random.Random(ZOBRIST_SEED)
+_keys = TABLES.ints('ZOBRIST')
+
+PIECE_KEYS = {}
+_i = 0
+for _color in (core.Color.WHITE,core.Color.BLACK):
+    PIECE_KEYS[_color] = {}
+    for _p in core.PIECE_NAMES:
+        PIECE_KEYS[_color][_p] = _keys[_i:_i + 64]
+        _i += 64
+
+CASTLING_KEYS = {}
+for _color in (core.Color.WHITE,core.Color.BLACK):
+    CASTLING_KEYS[_color] = {'KINGSIDE':_keys[_i],'QUEENSIDE':_keys[_i + 1]}
+    _i += 2
+
+EN_PASSANT_KEYS = _keys[_i:_i + 8]
+'''one key per file of the en passant square'''
+
+SIDE_KEY = _keys[_i + 8]
+'''xor'd in when black is to move'''
+
+def hash_board(board,piece_color:bool) -> int:
+    '''64-bit zobrist key of <board> with <piece_color> to move'''
+    h = 0 if piece_color else SIDE_KEY
+    for color in (core.Color.WHITE,core.Color.BLACK):
+        keys = PIECE_KEYS[color]
+        own = board.squaresets[color]
+        for p in core.PIECE_NAMES:
+            for i in (board.squaresets[p] & own).search(1):
+                h ^= keys[p][i]
+        for side,allowed in board.castling[color].items():
+            if allowed:
+                h ^= CASTLING_KEYS[color][side]
+    for i in board.squaresets['EN_PASSANT'].search(1):
+        h ^= EN_PASSANT_KEYS[i % 8]
+    return h
+
+def hash_pawns(board) -> int:
+    '''zobrist key of the pawns of <board> alone (see Board.pawn_key)'''
+    h = 0
+    for color in (core.Color.WHITE,core.Color.BLACK):
+        keys = PIECE_KEYS[color]['PAWN']
+        for i in (board.squaresets['PAWN'] & board.squaresets[color]).search(1):
+            h ^= keys[i]
+    return h
@@ -3,10 +3,233 @@ from bitchess import core, squareset as ss
 from bitchess.board import Board
 from bitchess.move import Move
 from bitchess.game import Game
-from bitchess.negamax import Negamax
+from bitchess.algorithms.negamax import Negamax, SearchConfig, SearchResult, MATE_SCORE
+from bitchess.algorithms.ordering import MoveOrderer, mvv_lva, pick_moves
+from bitchess.algorithms.rootsplit import RootSplitSearch
+from bitchess.algorithms.smp import LazySMP
+from bitchess.exceptions import IllegalMoveError
+from bitchess.algorithms.deepening import IterativeDeepening, SearchLimits, allocate_time
 
-def test_negamax_tree_generation():
+def test_push_pop_restores_board():
+    '''making and taking back every legal move leaves the board unchanged'''
+    fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+    board = Board(fen=fen)
+    reference = Board(fen=fen)
+    moves = board.get_pseudolegal_moves(core.Color.WHITE)
+    moves.extend(board.get_castling_moves(core.Color.WHITE))
+    for move in moves:
+        board.push(move)
+        board.pop()
+        assert board == reference
+        assert board.squaresets == reference.squaresets
+
+def test_push_matches_legal_move_board():
+    '''push() produces the same position as the boards from get_legal_moves'''
+    fen = 'r3k2r/8/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1'
+    board = Board(fen=fen)
+    for move,legal_board in board.get_legal_moves(core.Color.WHITE):
+        board.push(move)
+        assert board.squaresets == legal_board.squaresets
+        assert board.castling == legal_board.castling
+        board.pop()
+
+def test_negamax_finds_mate_in_one():
+    game = Game(fen='k7/8/1K6/8/8/8/8/7R w - - 0 1')
+    result = Negamax(game,2).search()
+    assert result.best_move.get_uci() == 'h1h8'
+    assert result.score == MATE_SCORE - 1
+    assert result.pv[0] == result.best_move
+    assert result.nodes > 0
+
+def test_negamax_wins_hanging_queen():
+    game = Game(fen='4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    result = Negamax(game,1).search()
+    assert result.best_move.get_uci() == 'd2d5'
+    assert 400 < result.score < 600
+
+def test_quiescence_sees_recapture():
+    '''Qxd5 wins a pawn at depth 1 unless the recapture exd5 is seen'''
+    fen = '4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1'
+    config = SearchConfig(quiescence=False)
+    horizon = Negamax(Game(fen),1,config).search()
+    assert horizon.best_move.get_uci() == 'd1d5'
+    assert horizon.qnodes == 0
+    result = Negamax(Game(fen),1).search()
+    assert result.best_move.get_uci() != 'd1d5'
+    assert 600 < result.score < 800
+    assert result.qnodes > 0
+
+def test_negamax_leaves_game_untouched():
+    game = Game(fen='4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    before = game.current_board.squaresets
+    Negamax(game,2).search()
+    assert game.current_board.squaresets == before
+
+def test_iterative_deepening_reports_each_iteration():
+    game = Game(fen='4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    infos = []
+    limits = SearchLimits(depth=3)
+    result = IterativeDeepening(game,limits,callback=infos.append).search()
+    assert [info.depth for info in infos] == [1,2,3]
+    assert result.depth == 3
+    assert result.best_move.get_uci() == 'd2d5'
+    assert result.nodes + result.qnodes == infos[-1].nodes
+
+def test_iterative_deepening_stopped_still_returns_move():
+    game = Game(fen='4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    search = IterativeDeepening(game,SearchLimits(infinite=True))
+    search.stop()
+    result = search.search()
+    assert result.depth == 1
+    assert result.best_move.get_uci() == 'd2d5'
+
+def test_iterative_deepening_node_limit():
+    game = Game()
+    result = IterativeDeepening(game,SearchLimits(nodes=200)).search()
+    assert result.best_move is not None
+    assert result.nodes + result.qnodes <= 201 + 21
+
+def test_allocate_time():
+    assert allocate_time(SearchLimits(movetime=500),core.Color.WHITE) == (0.5,0.5)
+    assert allocate_time(SearchLimits(infinite=True),core.Color.WHITE) == (None,None)
+    soft,hard = allocate_time(SearchLimits(wtime=60000,btime=1000),core.Color.WHITE)
+    assert 0 < soft <= hard < 60
+    soft,hard = allocate_time(SearchLimits(wtime=60000,btime=1000),core.Color.BLACK)
+    assert hard < 1
+
+def test_move_ordering_reduces_nodes():
+    fen = 'r3k3/1p3p2/8/3q4/8/2N5/3R1P2/4K3 w - - 0 1'
+    plain = Negamax(Game(fen),3,SearchConfig(move_ordering=False)).search()
+    ordered = Negamax(Game(fen),3,SearchConfig(move_ordering=True)).search()
+    assert ordered.score == plain.score
+    assert ordered.nodes < plain.nodes
+
+def test_mvv_lva_prefers_valuable_victims():
+    board = Board(fen='4k3/8/8/3q4/2P1r3/8/8/4K3 w - - 0 1')
+    moves = [m for m in board.get_pseudolegal_moves(core.Color.WHITE)
+             if m.piece_type == 'PAWN']
+    scores = [mvv_lva(board,m) for m in moves]
+    ordered = list(pick_moves(moves,scores))
+    assert ordered[0].get_uci() == 'c4d5'
+    assert ordered[-1].move_type == 'quiet'
+
+def test_killer_and_history_update():
+    orderer = MoveOrderer()
+    board = Board(fen='4k3/8/8/8/8/8/8/R3K3 w - - 0 1')
+    moves = board.get_pseudolegal_moves(core.Color.WHITE)
+    quiet = moves[0]
+    orderer.update(quiet,3,2)
+    scores = orderer.score_moves(board,moves,0,2)
+    assert scores[0] == max(scores)
+    scores = orderer.score_moves(board,moves,moves[1].get_code(),2)
+    assert scores[1] > scores[0]
+    # history survives at other plies
+    scores = orderer.score_moves(board,moves,0,5)
+    assert scores[0] == 9
+
+NO_PRUNING = dict(
+    null_move=False,late_move_reductions=False,
+    futility_pruning=False,reverse_futility_pruning=False
+)
+
+@pytest.mark.parametrize('option',[
+    'null_move','late_move_reductions','reverse_futility_pruning'
+])
+def test_selective_search_reduces_nodes(option):
+    fen = 'r3k3/1p3p2/8/3q4/8/2N5/3R1P2/4K3 w - - 0 1'
+    limits = SearchLimits(depth=4)
+    full = IterativeDeepening(Game(fen),limits,config=SearchConfig(**NO_PRUNING)).search()
+    config = SearchConfig(**{**NO_PRUNING,option:True})
+    pruned = IterativeDeepening(Game(fen),limits,config=config).search()
+    assert pruned.best_move == full.best_move
+    assert pruned.nodes < full.nodes
+
+def test_selective_search_keeps_mate():
+    game = Game(fen='k7/8/1K6/8/8/8/8/7R w - - 0 1')
+    result = IterativeDeepening(game,SearchLimits(depth=4)).search()
+    assert result.best_move.get_uci() == 'h1h8'
+    assert result.score == MATE_SCORE - 1
+
+def test_no_null_move_in_pawn_endings():
+    negamax = Negamax(Game(fen='4k3/4p3/8/8/8/8/4P3/4K3 w - - 0 1'))
+    assert not(negamax._has_non_pawn_material(core.Color.WHITE))
+    negamax = Negamax(Game(fen='4k3/4p3/8/8/8/8/4P3/3NK3 w - - 0 1'))
+    assert negamax._has_non_pawn_material(core.Color.WHITE)
+    assert not(negamax._has_non_pawn_material(core.Color.BLACK))
+
+def test_push_null_pop():
+    board = Board(fen='4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1')
+    reference = Board(fen='4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1')
+    board.push_null()
+    assert not(board.squaresets['EN_PASSANT'].any())
+    assert board.pop() is None
+    assert board.squaresets == reference.squaresets
+
+def test_pvs_reduces_nodes():
+    fen = 'r3k3/1p3p2/8/3q4/8/2N5/3R1P2/4K3 w - - 0 1'
+    limits = SearchLimits(depth=5)
+    # pruning decisions depend on the window, so compare full-width searches
+    full_width = dict(
+        aspiration_windows=False,null_move=False,late_move_reductions=False,
+        futility_pruning=False,reverse_futility_pruning=False
+    )
+    config = SearchConfig(pvs=False,**full_width)
+    plain = IterativeDeepening(Game(fen),limits,config=config).search()
+    config = SearchConfig(pvs=True,**full_width)
+    pvs = IterativeDeepening(Game(fen),limits,config=config).search()
+    assert pvs.score == plain.score
+    assert pvs.nodes + pvs.qnodes < plain.nodes + plain.qnodes
+
+def test_aspiration_window_fail_high_re_search():
+    '''a window far below the true score must still give the exact score'''
+    game = Game(fen='4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    search = IterativeDeepening(game,SearchLimits(depth=3))
+    exact = search.search()
+    previous = SearchResult(best_move=None,score=-400)
+    iteration = search._search_depth(3,previous)
+    assert iteration.score == exact.score
+    assert iteration.best_move == exact.best_move
+
+def test_full_principal_variation():
+    '''the pv is as long as the search depth and playable from the root'''
+    game = Game(fen='4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    result = IterativeDeepening(game,SearchLimits(depth=5)).search()
+    assert len(result.pv) == 5
+    board = Board.copy(game.current_board)
+    color = game._current_player
+    for move in result.pv:
+        legal = [m for m,_ in board.get_legal_moves(color)]
+        assert move in legal
+        board.push(move)
+        color = not(color)
+
+def test_root_split_search_matches_serial_search():
+    fen = 'r3k3/1p3p2/8/3q4/8/2N5/3R1P2/4K3 w - - 0 1'
+    serial = Negamax(Game(fen),3).search()
+    with RootSplitSearch(2,SearchConfig(hash_mb=1)) as search:
+        parallel = search.search(Game(fen),3)
+        assert parallel.score == serial.score
+        assert parallel.best_move == serial.best_move
+        assert parallel.pv[0] == parallel.best_move
+        mate = search.search(Game('k7/8/1K6/8/8/8/8/7R w - - 0 1'),2)
+        assert mate.best_move.get_uci() == 'h1h8'
+        assert mate.score == MATE_SCORE - 1
+
+def test_lazy_smp_search():
+    fen = 'r3k3/1p3p2/8/3q4/8/2N5/3R1P2/4K3 w - - 0 1'
+    with LazySMP(2,SearchConfig(hash_mb=1)) as smp:
+        result = smp.search(Game(fen),SearchLimits(depth=3))
+        assert result.best_move.get_uci() == 'c3d5'
+        assert result.depth >= 3
+        assert result.nodes == smp.nodes
+        assert smp.tt.stores > 0
+        # workers are reused for the next search
+        result = smp.search(Game('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1'),SearchLimits(depth=2))
+        assert result.best_move.get_uci() == 'd2d5'
+
+def test_play_uci_move():
     game = Game()
-    n = Negamax(game,4)
-    n.tree.show()
-    assert False
+    game.play_uci_move('e2e4')
+    assert game.get_fen().startswith('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0')
+    with pytest.raises(IllegalMoveError):
+        game.play_uci_move('e2e4')
@@ -0,0 +1,79 @@
+import random
+import pytest
+import numpy as np
+from bitchess import core, evaluation, pawns, batch
+from bitchess.board import Board
+from bitchess.game import Game
+
+FENS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '4k3/8/8/5p2/3P4/4P3/8/4K3 w - - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    '4k3/1p6/8/3n4/8/8/8/4K3 b - - 0 1',
+]
+
+def random_boards(n,seed=0):
+    '''positions from short random games'''
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(n):
+        game = Game()
+        for _ in range(rng.randrange(30)):
+            legal = game.current_board.get_legal_moves(game._current_player)
+            if not(legal):
+                break
+            game.play_uci_move(rng.choice(legal)[0].get_uci())
+        boards.append((game.current_board,game._current_player))
+    return boards
+
+def test_pack_boards_into_buffer():
+    boards = [Board(fen) for fen in FENS]
+    out = np.zeros((len(boards),12),dtype=np.uint64)
+    assert batch.pack_boards(boards,out) is out
+    for board,row in zip(boards,out):
+        for (color,p),bb in zip(batch.PIECE_PLANES,row):
+            squares = board.squaresets[p] & board.squaresets[color]
+            assert list(squares.search(1)) == [i for i in range(64) if int(bb) >> i & 1]
+
+def test_pack_boards_into_view():
+    '''an <out> that can't be written in place gets the same bitboards'''
+    boards = [Board(fen) for fen in FENS]
+    wide = np.zeros((len(boards),14),dtype=np.uint64)
+    view = wide[:,1:13]
+    assert batch.pack_boards(boards,view) is view
+    assert (view == batch.pack_boards(boards)).all()
+    assert not(wide[:,0].any() or wide[:,13].any())
+
+def test_evaluate_matches_scalar():
+    positions = [(Board(fen),fen.split()[1] == 'w') for fen in FENS]
+    positions.extend(random_boards(6))
+    boards = [board for board,_ in positions]
+    colors = np.array([color for _,color in positions])
+    bitboards = batch.pack_boards(boards)
+    expected = [evaluation.evaluate(board,color) for board,color in positions]
+    assert batch.evaluate(bitboards,colors).tolist() == expected
+    white = [evaluation.evaluate(board,core.Color.WHITE) for board in boards]
+    assert batch.evaluate(bitboards).tolist() == white
+    black = batch.evaluate(bitboards,np.zeros(len(boards),dtype=bool))
+    assert black.tolist() == [-score for score in white]
+    structure = [list(pawns.evaluate_pawns(board)) for board in boards]
+    assert batch.pawn_structure(bitboards).tolist() == structure
+    material = [
+        [m[core.Color.WHITE],m[core.Color.BLACK]]
+        for m in (board.count_material() for board in boards)
+    ]
+    assert batch.material(bitboards).tolist() == material
+
+@pytest.mark.parametrize('fen',[
+    '4k3/8/8/3q4/8/2N5/3R1P2/4K3 w - - 0 1',
+    'r3k3/1b3p2/8/3q1n2/8/2N5/3RBP2/4K2Q w - - 0 1',
+])
+def test_mobility_counts_piece_moves(fen):
+    '''with one piece per type, mobility is the number of piece moves'''
+    board = Board(fen)
+    expected = [
+        sum(1 for m in board.get_pseudolegal_moves(color) if m.piece_type != 'PAWN')
+        for color in (core.Color.WHITE,core.Color.BLACK)
+    ]
+    assert batch.mobility(batch.pack_boards([board])).tolist() == [expected]
@@ -0,0 +1,57 @@
+import json
+from bitchess.benchmarks.run import (
+    BENCHMARKS, BenchmarkResult, run_benchmarks, compare, to_json, main, default_baseline
+)
+
+FAST = ['count_material','make_move','get_fen']
+
+def test_run_benchmarks():
+    results = run_benchmarks(FAST,repeat=1,min_seconds=0.01)
+    assert list(results) == FAST
+    for r in results.values():
+        assert r.ops > 0 and r.seconds > 0 and r.us_per_op > 0
+
+def test_all_registered():
+    assert set(BENCHMARKS) >= {
+        'fen_parsing','pseudolegal_movegen','legal_movegen','make_move',
+        'is_check','count_material','get_fen','perft_nodes','search_nodes'
+    }
+
+def test_compare():
+    baseline = to_json({
+        'a':BenchmarkResult('a',100,1.0),'b':BenchmarkResult('b',100,1.0)
+    })
+    results = {
+        'a':BenchmarkResult('a',100,1.05),
+        'b':BenchmarkResult('b',100,1.5),
+        'c':BenchmarkResult('c',100,9.0),
+    }
+    regressions = compare(results,baseline,threshold=10)
+    assert [r.name for r in regressions] == ['b']
+    assert round(regressions[0].change) == 50
+    assert compare(results,baseline,threshold=60) == []
+
+def test_main(tmp_path,capsys):
+    output = tmp_path / 'results.json'
+    baseline = tmp_path / 'baseline.json'
+    assert main(['count_material','-r','1','-b',str(baseline),'--save-baseline']) == 0
+    data = json.loads(baseline.read_text())
+    assert list(data['results']) == ['count_material']
+    # a baseline ten times faster than possible fails
+    data['results']['count_material']['us_per_op'] /= 10
+    baseline.write_text(json.dumps(data))
+    status = main(['count_material','-r','1','-b',str(baseline),'-o',str(output)])
+    assert status == 1
+    assert 'REGRESSION count_material' in capsys.readouterr().out
+    assert 'count_material' in json.loads(output.read_text())['results']
+    assert main(['count_material','-r','1','-b',str(baseline),'-t','5000']) == 0
+
+def test_default_baseline(tmp_path,monkeypatch,capsys):
+    '''saved per machine in the cache directory, skipped until then'''
+    monkeypatch.setenv('BITCHESS_CACHE_DIR',str(tmp_path / 'cache'))
+    path = tmp_path / 'cache' / 'benchmark-baseline.json'
+    assert default_baseline() == str(path)
+    assert main(['count_material','-r','1']) == 0
+    assert 'no baseline at' in capsys.readouterr().out
+    assert main(['count_material','-r','1','--save-baseline']) == 0
+    assert 'count_material' in json.loads(path.read_text())['results']
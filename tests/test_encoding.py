@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+from bitchess import core
+from bitchess.board import Board
+from bitchess.game import Game
+from bitchess.encoding import encode_batch, decode_batch, N_PLANES, PLANES
+
+FENS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w Kq - 0 1',
+    '4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 0 1',
+]
+
+def fen_position(fen):
+    game = Game(fen)
+    return game.current_board,game._current_player
+
+@pytest.mark.parametrize('packed',[True,False])
+def test_round_trip(packed):
+    positions = [fen_position(fen) for fen in FENS]
+    boards = [board for board,_ in positions]
+    colors = [color for _,color in positions]
+    planes = encode_batch(boards,colors,packed=packed)
+    assert planes.shape == ((4,N_PLANES) if packed else (4,N_PLANES,8,8))
+    for (board,color),(decoded,decoded_color) in zip(positions,decode_batch(planes)):
+        assert decoded == board
+        assert decoded.squaresets['EN_PASSANT'] == board.squaresets['EN_PASSANT']
+        assert decoded_color == color
+        assert (decoded.mg_score,decoded.pawn_key) == (board.mg_score,board.pawn_key)
+
+def test_en_passant_after_double_push():
+    game = Game()
+    game.play_uci_move('e2e4')
+    (board,_), = decode_batch(encode_batch([game.current_board],[False]))
+    assert board.squaresets['EN_PASSANT'] == game.current_board.squaresets['EN_PASSANT']
+    assert board.ep_index == game.current_board.ep_index == 20 # e3
+    # derived from the squareset, so it follows moves and take-backs
+    game.current_board.push(game.current_board.get_move_from_uci('g8f6',False))
+    assert game.current_board.ep_index is None
+    game.current_board.pop()
+    assert game.current_board.ep_index == 20
+
+def test_planes_layout():
+    board,color = fen_position(FENS[2])
+    planes = encode_batch([board],[color],out=np.zeros((1,N_PLANES,8,8),np.uint8))[0]
+    white_pawns = planes[PLANES.index((core.Color.WHITE,'PAWN'))]
+    assert white_pawns.sum() == 1 and white_pawns[4,4] == 1 # e5
+    assert planes[PLANES.index('SIDE')].all()
+    assert not(planes[PLANES.index((core.Color.BLACK,'QUEENSIDE'))].any())
+    assert planes[PLANES.index('EN_PASSANT')][5,3] == 1 # d6
+
+def test_writes_into_buffer():
+    boards = [Board(fen) for fen in FENS]
+    out = np.full((4,N_PLANES,8,8),7,dtype=np.float32)
+    assert encode_batch(boards,out=out) is out
+    assert set(np.unique(out)) == {0,1}
+    with pytest.raises(ValueError):
+        encode_batch(boards,out=np.zeros((3,N_PLANES,8,8)))
@@ -0,0 +1,84 @@
+import pytest
+import json
+from bitchess import core, evaluation, pawns
+from bitchess.board import Board
+
+def sums_match_recompute(board):
+    '''incremental sums equal a from-scratch computation'''
+    fresh = Board.copy(board)
+    fresh._init_evaluation()
+    return (board.mg_score,board.eg_score,board.phase) == \
+        (fresh.mg_score,fresh.eg_score,fresh.phase)
+
+def test_start_position_is_balanced():
+    board = Board()
+    assert board.phase == evaluation.MAX_PHASE
+    assert board.mg_score == 0 and board.eg_score == 0
+    assert evaluation.evaluate(board,core.Color.WHITE) == 0
+
+def test_mirrored_positions_negate():
+    white = Board('4k3/8/8/8/3N4/8/1P6/4K3 w - - 0 1')
+    black = Board('4k3/1p6/8/3n4/8/8/8/4K3 b - - 0 1')
+    assert evaluation.evaluate(white,core.Color.WHITE) == \
+        evaluation.evaluate(black,core.Color.BLACK)
+    assert evaluation.evaluate(white,core.Color.WHITE) > 0
+
+@pytest.mark.parametrize('fen',[
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    'r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+])
+def test_sides_negate(fen):
+    '''the score of one side is exactly the negated score of the other'''
+    board = Board(fen)
+    assert evaluation.evaluate(board,core.Color.BLACK) == \
+        -evaluation.evaluate(board,core.Color.WHITE)
+
+def test_incremental_update_through_moves():
+    fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+    board = Board(fen=fen)
+    reference = (board.mg_score,board.eg_score,board.phase)
+    moves = board.get_pseudolegal_moves(core.Color.WHITE)
+    moves.extend(board.get_castling_moves(core.Color.WHITE))
+    for move in moves:
+        board.push(move)
+        assert sums_match_recompute(board)
+        for reply in board.get_pseudolegal_moves(core.Color.BLACK)[:5]:
+            board.push(reply)
+            assert sums_match_recompute(board)
+            board.pop()
+        board.pop()
+        assert (board.mg_score,board.eg_score,board.phase) == reference
+
+def test_incremental_update_promotion_and_en_passant():
+    board = Board('1r2k3/P7/8/3pP3/8/8/8/4K3 w - d6 0 1')
+    for move,legal_board in board.get_legal_moves(core.Color.WHITE):
+        assert sums_match_recompute(legal_board)
+
+def test_phase_tapers_to_endgame():
+    board = Board('4k3/8/8/8/8/8/4P3/4K3 w - - 0 1')
+    assert board.phase == 0
+    _,pawn_eg = pawns.evaluate_pawns(board)
+    assert evaluation.evaluate(board,core.Color.WHITE) == board.eg_score + pawn_eg
+
+def test_load_tables(tmp_path):
+    path = tmp_path / 'tables.json'
+    evaluation.save_tables(path)
+    tables = json.loads(path.read_text())
+    tables['values']['mg']['KNIGHT'] = 1000
+    tables['values']['eg']['KNIGHT'] = 1000
+    path.write_text(json.dumps(tables))
+    try:
+        evaluation.load_tables(path)
+        board = Board('4k3/8/8/8/8/8/8/1N2K3 w - - 0 1')
+        assert evaluation.evaluate(board,core.Color.WHITE) > 900
+    finally:
+        evaluation.set_tables(evaluation.DEFAULT_TABLES)
+
+def test_load_tables_rejects_short_table(tmp_path):
+    tables = json.loads(json.dumps(evaluation.DEFAULT_TABLES))
+    tables['mg']['PAWN'] = tables['mg']['PAWN'][:63]
+    with pytest.raises(ValueError):
+        evaluation.set_tables(tables)
+    evaluation.set_tables(evaluation.DEFAULT_TABLES)
@@ -3,7 +3,7 @@ from bitchess import core, squareset as ss
 from bitchess.board import Board
 from bitchess.move import Move
 from bitchess.game import Game
-from bitchess.negamax import Negamax
+from bitchess.algorithms.negamax import Negamax
 import numpy as np
 
 def test_get_fen_board():
@@ -0,0 +1,18 @@
+import subprocess
+import sys
+
+HEAVY = [
+    'numpy','colorama','json','bitarray.util','multiprocessing','secrets',
+    'bitchess.tablebase'
+]
+
+def test_core_imports_are_light():
+    '''the board, game and search import none of the modules only some paths need'''
+    code = (
+        'import sys, bitchess.game, bitchess.algorithms.negamax\n'
+        f'print(",".join(m for m in {HEAVY!r} if m in sys.modules))'
+    )
+    out = subprocess.run(
+        [sys.executable,'-c',code],capture_output=True,text=True,check=True
+    )
+    assert out.stdout.strip() == ''
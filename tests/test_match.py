@@ -0,0 +1,34 @@
+import pytest
+from bitchess import core
+from bitchess.algorithms.deepening import SearchLimits
+from bitchess.match import MatchRunner, SearchPlayer, random_player, START_FEN
+
+MATE_IN_ONE = 'k7/8/1K6/8/8/8/8/7R w - - 0 1'
+
+@pytest.fixture(scope='module')
+def runner():
+    with MatchRunner(2) as runner:
+        yield runner
+
+def test_random_games(runner):
+    result = runner.run(4,max_plies=12)
+    assert [g.game_id for g in result.games] == [0,1,2,3]
+    for g in result.games:
+        assert g.plies <= 12
+        assert g.result in ('1-0','0-1','1/2-1/2','*')
+    assert result.plies == sum(g.plies for g in result.games)
+    assert result.plies_per_second > 0
+    assert len(result.table().splitlines()) == 6
+
+def test_openings_and_players(runner):
+    '''the workers are reused for a second run with other players'''
+    engine = SearchPlayer(SearchLimits(depth=2))
+    result = runner.run(
+        2,white=engine,black=random_player,openings=[MATE_IN_ONE,START_FEN],
+        max_plies=4
+    )
+    mate,opening = result.games
+    assert (mate.opening,mate.result,mate.plies) == (0,'1-0',1)
+    assert mate.status == core.Status.checkmate
+    assert opening.opening == 1 and opening.plies == 4
+    assert result.score() == (1,0,0)
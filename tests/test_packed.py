@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from bitchess import core
+from bitchess.batch import pack_boards
+from bitchess.board import Board, PACKED_SIZE
+from bitchess.game import Game
+from bitchess.packed import (
+    PositionFile, PositionWriter, POSITION_DTYPE, to_records, to_bitboards
+)
+
+FENS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2',
+    'r3k2r/8/8/8/8/8/8/R3K2R b Kq - 17 40',
+    '8/8/8/3k4/8/8/8/Q3K3 w - - 3 61',
+]
+
+@pytest.mark.parametrize('fen',FENS)
+def test_game_round_trip(fen):
+    data = Game(fen).to_packed()
+    assert len(data) == PACKED_SIZE == 32
+    game = Game.from_packed(data)
+    assert game.get_fen() == fen
+    assert game.current_board == Game(fen).current_board
+    assert game.current_board.mg_score == Game(fen).current_board.mg_score
+
+def test_board_round_trip():
+    game = Game(FENS[0])
+    for uci in ('e2e4','c7c5','e4e5','d7d5'):
+        game.play_uci_move(uci)
+    board,color,half,full = Board.from_packed(
+        game.current_board.to_packed(game._current_player,7,9)
+    )
+    assert board == game.current_board
+    assert board.squaresets['EN_PASSANT'] == game.current_board.squaresets['EN_PASSANT']
+    assert (color,half,full) == (core.Color.WHITE,7,9)
+
+def test_to_bitboards():
+    games = [Game(fen) for fen in FENS]
+    records = to_records(b''.join(g.to_packed() for g in games))
+    assert records.dtype == POSITION_DTYPE
+    assert list(records['side']) == [1,1,0,1]
+    assert list(records['full_move_counter']) == [1,2,40,61]
+    expected = pack_boards([g.current_board for g in games])
+    assert np.array_equal(to_bitboards(records),expected)
+
+def test_position_file(tmp_path):
+    path = str(tmp_path / 'positions.bin')
+    games = [Game(fen) for fen in FENS]
+    with PositionWriter(path) as writer:
+        for game in games[:2]:
+            writer.write_game(game)
+    with PositionWriter(path) as writer:
+        for game in games[2:]:
+            writer.write(
+                game.current_board,game._current_player,
+                game._half_move_clock,game._full_move_counter
+            )
+    positions = PositionFile(path)
+    assert len(positions) == len(FENS)
+    board,color,half,full = positions[2]
+    assert board == games[2].current_board
+    assert (color,half,full) == (core.Color.BLACK,17,40)
+    assert positions.game(3).get_fen() == FENS[3]
+    records = positions[1:3]
+    assert isinstance(records,np.ndarray) and len(records) == 2
+    assert np.array_equal(
+        to_bitboards(records),pack_boards([g.current_board for g in games[1:3]])
+    )
+    copy = str(tmp_path / 'copy.bin')
+    with PositionWriter(copy) as writer:
+        writer.write_records(records)
+    assert PositionFile(copy).game(0).get_fen() == FENS[1]
+    positions.close()
+
+def test_bad_file(tmp_path):
+    path = tmp_path / 'not_positions.bin'
+    path.write_bytes(b'x' * 48)
+    with pytest.raises(ValueError):
+        PositionFile(str(path))
@@ -0,0 +1,68 @@
+import pytest
+from bitchess import core, zobrist, pawns
+from bitchess.board import Board
+
+def side_terms(fen,piece_color):
+    '''squaresets of the pawn-structure terms of <piece_color>'''
+    board = Board(fen)
+    own = board.squaresets['PAWN'] & board.squaresets[piece_color]
+    enemy = board.squaresets['PAWN'] & board.squaresets[not(piece_color)]
+    return pawns.evaluate_side(own,enemy,piece_color)
+
+@pytest.mark.parametrize('fen,piece_color,expected',[
+    # connected passers on the second rank
+    ('4k3/8/8/8/8/8/PP6/4K3 w - - 0 1',core.Color.WHITE,(
+        2 * pawns.PASSED[1][0],2 * pawns.PASSED[1][1]
+    )),
+    # doubled and isolated, only the front pawn is passed
+    ('4k3/8/8/8/8/4P3/4P3/4K3 w - - 0 1',core.Color.WHITE,(
+        pawns.DOUBLED[0] + 2 * pawns.ISOLATED[0] + pawns.PASSED[2][0],
+        pawns.DOUBLED[1] + 2 * pawns.ISOLATED[1] + pawns.PASSED[2][1]
+    )),
+    # e3 can't advance past f5 and d4 can no longer cover e4; d4 is passed
+    ('4k3/8/8/5p2/3P4/4P3/8/4K3 w - - 0 1',core.Color.WHITE,(
+        pawns.BACKWARD[0] + pawns.PASSED[3][0],
+        pawns.BACKWARD[1] + pawns.PASSED[3][1]
+    )),
+    # isolated black passer on its sixth rank
+    ('4k3/8/8/8/8/1p6/7P/4K3 b - - 0 1',core.Color.BLACK,(
+        pawns.ISOLATED[0] + pawns.PASSED[5][0],
+        pawns.ISOLATED[1] + pawns.PASSED[5][1]
+    )),
+])
+def test_pawn_structure_terms(fen,piece_color,expected):
+    assert side_terms(fen,piece_color) == expected
+
+def test_mirrored_structures_negate():
+    white = Board('4k3/8/8/5p2/3P4/4P3/8/4K3 w - - 0 1')
+    black = Board('4k3/8/4p3/3p4/5P2/8/8/4K3 b - - 0 1')
+    mg,eg = pawns.evaluate_pawns(white)
+    assert pawns.evaluate_pawns(black) == (-mg,-eg)
+
+def test_pawn_key_updated_incrementally():
+    fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+    board = Board(fen=fen)
+    pawn_sets = lambda: [
+        board.squaresets['PAWN'] & board.squaresets[c]
+        for c in (core.Color.WHITE,core.Color.BLACK)
+    ]
+    key,before = board.pawn_key,pawn_sets()
+    assert key == zobrist.hash_pawns(board)
+    for move in board.get_pseudolegal_moves(core.Color.WHITE):
+        board.push(move)
+        assert board.pawn_key == zobrist.hash_pawns(board)
+        assert (board.pawn_key != key) == (pawn_sets() != before)
+        board.pop()
+    assert board.pawn_key == key
+
+def test_pawn_hash_table_reuses_scores():
+    table = pawns.PawnHashTable(size_kb=1)
+    assert table.n_entries == 64
+    board = Board()
+    assert table.probe(board) == pawns.evaluate_pawns(board)
+    board.push(board.get_move_from_uci('g1f3',core.Color.WHITE))
+    assert table.probe(board) == pawns.evaluate_pawns(board)
+    assert (table.probes,table.hits) == (2,1)
+    board.push(board.get_move_from_uci('e7e5',core.Color.BLACK))
+    table.probe(board)
+    assert table.hits == 1
@@ -0,0 +1,26 @@
+import pytest
+from bitchess.game import Game
+from bitchess.perft import perft, divide
+
+@pytest.mark.parametrize('fen,depth,expected',[
+    ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',2,400),
+    ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',1,48),
+    ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',2,2039),
+    ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',3,2812),
+    ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',2,264),
+    ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',2,1486),
+])
+def test_perft(fen,depth,expected):
+    '''leaf counts of well-known perft positions'''
+    game = Game(fen)
+    fen_before = game.get_fen()
+    assert perft(game.current_board,game._current_player,depth) == expected
+    # moves are taken back
+    assert game.get_fen() == fen_before
+
+def test_divide():
+    game = Game()
+    counts = dict(divide(game.current_board,game._current_player,2))
+    assert len(counts) == 20
+    assert counts['e2e4'] == 20
+    assert sum(counts.values()) == 400
@@ -0,0 +1,92 @@
+import io
+import random
+import pytest
+from bitchess import core
+from bitchess.board import Board
+from bitchess.game import Game
+from bitchess.polyglot import (
+    Book, Entry, polyglot_key, write_book, move_to_uci, uci_to_move
+)
+from bitchess.uci import UCIEngine
+
+# keys from the Polyglot format specification
+@pytest.mark.parametrize('moves,key',[
+    ([],0x463b96181691fc9c),
+    (['e2e4'],0x823c9b50fd114196),
+    (['e2e4','d7d5'],0x0756b94461c50fb0),
+    (['e2e4','d7d5','e4e5'],0x662fafb965db29d4),
+    (['e2e4','d7d5','e4e5','f7f5'],0x22a48b5a8e47ff78),
+    (['e2e4','d7d5','e4e5','f7f5','e1e2'],0x652a607ca3f242c1),
+    (['e2e4','d7d5','e4e5','f7f5','e1e2','e8f7'],0x00fdd303c946bdd9),
+    (['a2a4','b7b5','h2h4','b5b4','c2c4'],0x3c8123ea7b067637),
+    (['a2a4','b7b5','h2h4','b5b4','c2c4','b4c3','a1a3'],0x5c3f9b829b279560),
+])
+def test_polyglot_key(moves,key):
+    game = Game()
+    for uci in moves:
+        game.play_uci_move(uci)
+    assert polyglot_key(game.current_board,game._current_player) == key
+
+def test_move_codes():
+    assert move_to_uci(uci_to_move('g1f3')) == 'g1f3'
+    assert move_to_uci(uci_to_move('a7a8q')) == 'a7a8q'
+    assert move_to_uci(uci_to_move('e1g1',castling=True),castling=True) == 'e1g1'
+    # only a king's move from e1 to h1 is castling
+    assert move_to_uci(uci_to_move('e1h1')) == 'e1h1'
+    assert uci_to_move('e1g1',castling=True) == uci_to_move('e1h1')
+
+@pytest.fixture
+def book(tmp_path):
+    start = polyglot_key(Board(),core.Color.WHITE)
+    castle = Game('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+    castle_key = polyglot_key(castle.current_board,castle._current_player)
+    rook = Game('4k3/8/8/8/8/8/8/K3R3 w - - 0 1')
+    rook_key = polyglot_key(rook.current_board,rook._current_player)
+    path = tmp_path / 'book.bin'
+    write_book(path,[
+        Entry(start,uci_to_move('e2e4'),3,0),
+        Entry(start,uci_to_move('d2d4'),1,0),
+        Entry(start,uci_to_move('e2e5'),100,0), # not legal, skipped
+        Entry(castle_key,uci_to_move('e1g1',castling=True),1,0),
+        Entry(rook_key,uci_to_move('e1h1'),1,0),
+        Entry(1,uci_to_move('a2a3'),1,0),
+        Entry(2**64 - 1,uci_to_move('a2a3'),1,0),
+    ])
+    with Book(path) as book:
+        yield book
+
+def test_book_lookup(book):
+    assert len(book) == 7
+    board = Board()
+    assert [e.weight for e in book.entries(board,core.Color.WHITE)] == [100,3,1]
+    assert book.find(board,core.Color.WHITE,weighted=False).get_uci() == 'e2e4'
+    rng = random.Random(1)
+    picks = [
+        book.find(board,core.Color.WHITE,rng=rng).get_uci() for _ in range(200)
+    ]
+    assert 100 < picks.count('e2e4') < 200 and picks.count('d2d4') > 0
+    castle = Board('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+    assert book.find(castle,core.Color.WHITE).move_type == 'castle'
+    rook = Board('4k3/8/8/8/8/8/8/K3R3 w - - 0 1')
+    assert book.find(rook,core.Color.WHITE).get_uci() == 'e1h1'
+    assert book.find(Board(),core.Color.BLACK) is None
+
+def test_empty_book(tmp_path):
+    path = tmp_path / 'empty.bin'
+    path.write_bytes(b'')
+    with Book(path) as book:
+        assert book.find(Board(),core.Color.WHITE) is None
+
+def test_book_move_select(book):
+    game = Game()
+    select = book.move_select(game,game.move_select_random,weighted=False)
+    move,_ = select(game.current_board.get_legal_moves(game._current_player))
+    assert move.get_uci() == 'e2e4'
+
+def test_uci_book_move(book):
+    output = io.StringIO()
+    engine = UCIEngine(output)
+    engine.handle(f'setoption name BookFile value {book.path}')
+    engine.handle('position startpos')
+    engine.handle('go depth 3')
+    assert output.getvalue().splitlines()[-1] in ('bestmove e2e4','bestmove d2d4')
@@ -148,3 +148,23 @@ def test_king_pseudolegal_moves():
     if not(move_in_list(move,b.get_pseudolegal_moves(core.Color.WHITE))):
         errors.append('Kg2 not present')
     assert not errors, '\n'+'\n'.join(errors)
+
+def test_pseudolegal_bishop_long_diagonals():
+    '''bishops reach the far corner along both long diagonals'''
+    fen = '4k3/8/8/8/8/8/8/B3K2B w - - 0 1'
+    b = Board(fen=fen)
+    moves = b.get_pseudolegal_moves(core.Color.WHITE)
+    assert move_in_list(
+        Move('BISHOP',core.Color.WHITE,ss.SQUARES[0],ss.SQUARES[63],'quiet'),moves
+    )
+    assert move_in_list(
+        Move('BISHOP',core.Color.WHITE,ss.SQUARES[7],ss.SQUARES[56],'quiet'),moves
+    )
+    b = Board(fen='b3k2b/8/8/8/8/8/8/4K3 b - - 0 1')
+    moves = b.get_pseudolegal_moves(core.Color.BLACK)
+    assert move_in_list(
+        Move('BISHOP',core.Color.BLACK,ss.SQUARES[56],ss.SQUARES[7],'quiet'),moves
+    )
+    assert move_in_list(
+        Move('BISHOP',core.Color.BLACK,ss.SQUARES[63],ss.SQUARES[0],'quiet'),moves
+    )
@@ -0,0 +1,87 @@
+import pickle
+import random
+import pytest
+from bitchess import core
+from bitchess.game import Game
+from bitchess.records import (
+    RecordedGame, GameWriter, GameReader, read_varint, write_varint
+)
+
+# castling both ways, en passant, and a promotion with capture
+MOVES = [
+    'e2e4','d7d5','e4e5','f7f5','e5f6','g8h6','f6g7','b8c6','g7h8q','c8e6',
+    'g1f3','d8d7','f1e2','e8c8','e1g1','d5d4','c2c4','d4c3',
+]
+
+def played_game():
+    game = Game()
+    for uci in MOVES:
+        game.play_uci_move(uci)
+    return game
+
+@pytest.mark.parametrize('n',[0,1,127,128,300,2**16,2**40])
+def test_varint(n):
+    out = bytearray(b'x')
+    write_varint(out,n)
+    assert read_varint(out,1) == (n,len(out))
+
+def test_record_round_trip():
+    game = played_game()
+    evals = [random.randint(-3000,3000) for _ in MOVES]
+    record = RecordedGame.from_game(game,evals=evals)
+    data = record.to_bytes()
+    _,pos = read_varint(data,0)
+    decoded = RecordedGame.from_bytes(data[pos:])
+    assert decoded == record
+    assert decoded.result == '*'
+    # packed start, result, flags, length and 2 bytes per move and eval
+    assert len(data) < 40 + 4 * len(MOVES)
+    assert len(data) * 20 < len(pickle.dumps(game))
+
+def test_replay():
+    game = played_game()
+    record = RecordedGame.from_game(game)
+    positions = list(
+        (board.get_fen_board(),color,move) for board,color,move in record.replay()
+    )
+    boards = game.board_stack + [game.current_board]
+    assert [p[0] for p in positions] == [b.get_fen_board() for b in boards]
+    assert [p[2].get_uci() for p in positions[:-1]] == MOVES
+    assert positions[-1][1] == core.Color.WHITE
+
+def test_game():
+    game = played_game()
+    replayed = RecordedGame.from_game(game).game()
+    assert replayed.get_fen() == game.get_fen()
+    assert replayed.move_stack == game.move_stack
+    assert replayed.current_board == game.current_board
+
+def test_result():
+    game = Game()
+    for uci in ('f2f3','e7e5','g2g4','d8h4'):
+        game.play_uci_move(uci)
+    assert RecordedGame.from_game(game).result == '0-1'
+    assert RecordedGame.from_game(game,result='1/2-1/2').result == '1/2-1/2'
+
+def test_writer_and_reader(tmp_path):
+    path = str(tmp_path / 'games.bin')
+    game = played_game()
+    short = Game('8/8/8/3k4/8/8/8/Q3K3 w - - 3 61')
+    short.play_uci_move('a1a4')
+    with GameWriter(path) as writer:
+        writer.write_game(game)
+    with GameWriter(path) as writer:
+        writer.write_game(short,evals=[500])
+        writer.write(RecordedGame(short.to_packed()))
+    records = list(GameReader(path))
+    assert len(records) == 3
+    assert records[0].game().get_fen() == game.get_fen()
+    assert records[1].evals == [500]
+    assert records[1].game().get_fen() == short.get_fen()
+    assert Game.from_packed(records[2].start).get_fen() == short.get_fen()
+
+def test_bad_file(tmp_path):
+    path = tmp_path / 'games.bin'
+    path.write_bytes(b'not a game file')
+    with pytest.raises(ValueError):
+        GameReader(str(path))
@@ -0,0 +1,51 @@
+import json
+from bitchess.board import Board
+from bitchess.game import Game
+from bitchess.algorithms.negamax import Negamax, SearchConfig
+from bitchess.algorithms.deepening import IterativeDeepening, SearchLimits
+from bitchess.algorithms.stats import SearchStats, PHASES
+
+FEN = 'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4'
+
+def test_disabled_by_default():
+    search = Negamax(Game(FEN),depth=2)
+    result = search.search()
+    assert result.stats is None
+    assert type(search.board) is Board
+
+def test_negamax_stats():
+    plain = Negamax(Game(FEN),depth=3).search()
+    result = Negamax(Game(FEN),depth=3,config=SearchConfig(collect_stats=True)).search()
+    stats = result.stats
+    # collecting statistics doesn't change the search
+    assert (result.score,result.nodes,result.qnodes) == (plain.score,plain.nodes,plain.qnodes)
+    assert (stats.nodes,stats.qnodes) == (result.nodes,result.qnodes)
+    assert stats.makes == stats.unmakes > 0
+    assert 0 < stats.tt_hits <= stats.tt_probes
+    assert stats.cutoffs > 0 and stats.beta_cutoffs[0] > 0
+    assert stats.movegen_calls > 0
+    assert set(stats.times) == set(PHASES)
+    assert 0 < sum(stats.times.values()) <= stats.seconds
+
+def test_deepening_stats():
+    search = IterativeDeepening(
+        Game(FEN),SearchLimits(depth=3),config=SearchConfig(collect_stats=True)
+    )
+    result = search.search()
+    assert result.stats is search.stats
+    assert (result.stats.nodes,result.stats.qnodes) == (result.nodes,result.qnodes)
+    data = json.loads(json.dumps(result.stats.to_dict()))
+    assert data['nodes'] == result.nodes
+    assert 'first move' in result.stats.table()
+
+def test_merge():
+    a = SearchStats(nodes=3,beta_cutoffs=[2,1],makes=4)
+    b = SearchStats(nodes=2,beta_cutoffs=[1,0,5],unmakes=1)
+    b.times['tt'] = 0.5
+    a.merge(b)
+    assert (a.nodes,a.makes,a.unmakes) == (5,4,1)
+    assert a.beta_cutoffs == [3,1,5]
+    assert a.times['tt'] == 0.5
+    assert a.first_move_cutoff_rate == 3 / 9
+    copy = a.copy()
+    assert copy == a and copy is not a
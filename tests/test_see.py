@@ -0,0 +1,63 @@
+import pytest
+from bitchess.game import Game
+from bitchess.board import Board
+from bitchess.algorithms.negamax import Negamax, SearchConfig
+from bitchess.algorithms.ordering import MoveOrderer, see_loss
+
+def _move(game:Game,uci:str):
+    board = game.current_board
+    return next(
+        m for m in board.get_pseudolegal_moves(game._current_player) if m.get_uci() == uci
+    )
+
+@pytest.mark.parametrize('fen,uci,expected',[
+    # undefended pawn
+    ('1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1','e1e5',100),
+    # knight for pawn: the queen behind the bishop and the rook battery join in
+    ('1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1','d3e5',-200),
+    # quiet move onto an attacked square
+    ('k7/8/8/3p4/8/8/8/K1Q5 w - - 0 1','c1c4',-900),
+    # en passant
+    ('k7/8/8/3pP3/8/8/8/K7 w - d6 0 1','e5d6',100),
+    # doubled rooks on both sides: the defenders have the last word
+    ('k2r4/3r4/8/3p4/8/8/3R4/K2R4 w - - 0 1','d2d5',-400),
+    # capture with promotion
+    ('r6k/1P6/8/8/8/8/8/K7 w - - 0 1','b7a8q',1300),
+    # the king can't recapture on a square still covered by the x-ray rook
+    ('6kr/8/8/8/8/8/7R/K6R w - - 0 1','h2h8',500),
+    ('6kr/8/8/8/8/8/8/K6R w - - 0 1','h1h8',0),
+    # black to move: bishop takes a pawn defended by a pawn
+    ('4k3/8/3b4/8/5P2/6P1/8/4K3 b - - 0 1','d6f4',-200),
+    # defended pawn taken by a pawn
+    ('4k3/8/3p4/4p3/3P4/8/8/4K3 w - - 0 1','d4e5',0),
+])
+def test_see(fen,uci,expected):
+    game = Game(fen)
+    fen_before = game.get_fen()
+    assert game.current_board.see(_move(game,uci)) == expected
+    assert game.get_fen() == fen_before
+
+def test_attackers_to():
+    board = Board('1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1')
+    # e5: Nd3, Re2 (Qe1 is behind it), Nd7, Bf6 (Qh8 is behind it)
+    assert sorted(board.attackers_to(36).search(1)) == [12,19,45,51]
+
+def test_losing_captures_ordered_last():
+    game = Game('1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1')
+    board = game.current_board
+    moves = board.get_pseudolegal_moves(game._current_player)
+    scores = MoveOrderer().score_moves(board,moves,0,0)
+    losing = moves.index(_move(game,'d3e5'))
+    assert see_loss(board,moves[losing]) == -200
+    assert scores[losing] == -200
+    # below every quiet move, the rook capture (-400) below it
+    quiet = [s for m,s in zip(moves,scores) if m.move_type != 'attack']
+    assert min(quiet) > -200
+    assert scores[moves.index(_move(game,'e2e5'))] == -400
+
+def test_see_pruning():
+    fen = 'r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8'
+    full = Negamax(Game(fen),depth=3,config=SearchConfig(see_pruning=False)).search()
+    pruned = Negamax(Game(fen),depth=3,config=SearchConfig(see_pruning=True)).search()
+    assert pruned.best_move == full.best_move
+    assert pruned.qnodes < full.qnodes
@@ -0,0 +1,99 @@
+import asyncio
+import time
+import pytest
+from bitchess.game import Game
+from bitchess.algorithms.deepening import SearchLimits
+from bitchess.service import EngineService
+
+MATE_IN_ONE = 'k7/8/1K6/8/8/8/8/7R w - - 0 1'
+
+def test_analyse_and_play():
+    async def main():
+        async with EngineService(2) as service:
+            analysis = await service.analyse(MATE_IN_ONE,SearchLimits(depth=2))
+            game = Game(MATE_IN_ONE)
+            move = await service.play(game,SearchLimits(depth=2))
+            return analysis,move,game,service.metrics()
+    analysis,move,game,metrics = asyncio.run(main())
+    assert analysis.best_move == 'h1h8' and analysis.pv[0] == 'h1h8'
+    assert move.get_uci() == 'h1h8'
+    assert game.move_stack == []
+    assert (metrics.requests,metrics.completed,metrics.queued,metrics.running) == (2,2,0,0)
+
+def test_identical_requests_coalesce():
+    async def main():
+        async with EngineService(2) as service:
+            limit = SearchLimits(depth=3)
+            results = await asyncio.gather(
+                *(service.analyse(Game(),limit) for _ in range(3))
+            )
+            return results,service.metrics()
+    results,metrics = asyncio.run(main())
+    assert results[0] == results[1] == results[2]
+    assert (metrics.coalesced,metrics.completed) == (2,1)
+
+def test_cancel_and_queue_depth():
+    '''a cancelled infinite search frees its worker for queued requests'''
+    async def main():
+        async with EngineService(1) as service:
+            infinite = asyncio.ensure_future(
+                service.analyse(Game(),SearchLimits(infinite=True))
+            )
+            await asyncio.sleep(0.3)
+            queued = asyncio.ensure_future(
+                service.analyse(MATE_IN_ONE,SearchLimits(depth=2))
+            )
+            await asyncio.sleep(0.1)
+            depth = service.metrics().queued
+            start = time.monotonic()
+            infinite.cancel()
+            analysis = await queued
+            with pytest.raises(asyncio.CancelledError):
+                await infinite
+            return depth,time.monotonic() - start,analysis,service.metrics()
+    depth,elapsed,analysis,metrics = asyncio.run(main())
+    assert depth == 1
+    assert elapsed < 3
+    assert analysis.best_move == 'h1h8'
+    assert (metrics.cancelled,metrics.completed,metrics.running) == (1,1,0)
+
+def test_aclose_keeps_loop_running():
+    '''other coroutines run while the pool shuts down'''
+    async def main():
+        service = EngineService(1)
+        search = asyncio.ensure_future(
+            service.analyse(Game(),SearchLimits(infinite=True))
+        )
+        await asyncio.sleep(0.3)
+        # a slow shutdown, to see whether the loop keeps turning meanwhile
+        shutdown = service._executor.shutdown
+        def slow_shutdown(wait=True):
+            time.sleep(0.2)
+            shutdown(wait)
+        service._executor.shutdown = slow_shutdown
+        closing = asyncio.ensure_future(service.aclose())
+        ticks = 0
+        while not(closing.done()):
+            await asyncio.sleep(0.001)
+            ticks += 1
+        await closing
+        await search
+        return ticks
+    assert asyncio.run(main()) > 10
+
+def test_request_after_cancel_gets_new_search():
+    '''a request made while a cancelled search winds down doesn't join it'''
+    async def main():
+        async with EngineService(2) as service:
+            limit = SearchLimits(movetime=500)
+            first = asyncio.ensure_future(service.analyse(Game(),limit))
+            await asyncio.sleep(0.2)
+            first.cancel()
+            await asyncio.sleep(0)
+            analysis = await service.analyse(Game(),limit)
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return analysis,service.metrics()
+    analysis,metrics = asyncio.run(main())
+    assert analysis.best_move is not None
+    assert (metrics.coalesced,metrics.cancelled,metrics.completed) == (0,1,1)
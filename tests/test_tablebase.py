@@ -0,0 +1,124 @@
+import pytest
+from bitchess import core
+from bitchess.board import Board
+from bitchess.game import Game
+from bitchess.algorithms.negamax import Negamax, SearchConfig, MATE_SCORE
+from bitchess.tablebase import Tablebases, Table, Generator, generate, write_tables, parse_material
+
+@pytest.fixture(scope='module')
+def tb_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('tablebases')
+    write_tables(str(path),['KQK'])
+    return str(path)
+
+@pytest.fixture(scope='module')
+def krk():
+    return generate('KRK')
+
+@pytest.fixture
+def tablebases(tb_dir):
+    with Tablebases(tb_dir) as tablebases:
+        yield tablebases
+
+def probe(tablebases,fen):
+    game = Game(fen)
+    return tablebases.probe(game.current_board,game._current_player)
+
+def test_parse_material():
+    assert parse_material('KBNK') == ['BISHOP','KNIGHT']
+    with pytest.raises(ValueError):
+        parse_material('KQ')
+
+def test_open(tablebases):
+    assert set(tablebases.tables) == {'KQK'}
+    assert tablebases.max_pieces == 3
+
+@pytest.mark.parametrize('fen,dtm',[
+    ('7k/8/6K1/8/8/8/8/1Q6 w - - 0 1',1),
+    ('k7/8/1K6/8/8/8/8/7Q b - - 0 1',-2),
+    # the queen is lost
+    ('k7/1Q6/8/8/8/8/8/7K b - - 0 1',0),
+    # stalemate
+    ('k7/2Q5/1K6/8/8/8/8/8 b - - 0 1',0),
+])
+def test_probe(tablebases,fen,dtm):
+    assert probe(tablebases,fen) == dtm
+
+def test_longest_mate(tablebases):
+    '''KQK is won in at most 10 moves'''
+    table = tablebases.tables['KQK']
+    assert max(table.data[:table.size]) - 1 == 19
+
+def test_probe_checkmate_and_other_material(tablebases):
+    assert probe(tablebases,'7k/6Q1/6K1/8/8/8/8/8 b - - 0 1') is None
+    assert probe(tablebases,'7k/8/6K1/8/8/8/8/R7 w - - 0 1') is None
+    assert probe(tablebases,'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1') is None
+
+def test_probe_symmetries(tablebases):
+    '''mirrored positions, and colors swapped, have the same distance'''
+    fens = [
+        '8/8/3k4/8/8/8/1Q6/4K3 w - - 0 1',
+        '8/8/4k3/8/8/8/6Q1/3K4 w - - 0 1',
+        '4K3/1Q6/8/8/8/3k4/8/8 w - - 0 1',
+        '8/8/8/K7/5k2/8/1Q6/8 w - - 0 1',
+        '4k3/1q6/8/8/8/3K4/8/8 b - - 0 1',
+    ]
+    results = [probe(tablebases,fen) for fen in fens]
+    assert results[0] > 0
+    assert len(set(results)) == 1
+
+def test_table_values_are_consistent(tablebases):
+    '''a won position with white to move has a move to a position one ply closer'''
+    board = Board('8/8/8/3k4/8/8/8/Q3K3 w - - 0 1')
+    dtm = tablebases.probe(board,core.Color.WHITE)
+    best = None
+    for _,child in board.get_legal_moves(core.Color.WHITE):
+        if child.is_checkmate(core.Color.BLACK):
+            result = 0
+        else:
+            result = -tablebases.probe(child,core.Color.BLACK)
+        if result > 0 and (best is None or result < best):
+            best = result
+    assert dtm == best + 1
+
+def test_save_and_open(tmp_path,tb_dir,tablebases):
+    table = tablebases.tables['KQK']
+    copy = Table('KQK',bytearray(table.data))
+    path = str(tmp_path / 'KQK.btb')
+    copy.save(path)
+    opened = Table.open(path)
+    assert bytes(opened.data) == bytes(table.data)
+    opened.close()
+
+def test_search_with_tablebases(tb_dir):
+    '''the search scores a won ending as mate from the tables at shallow depth'''
+    game = Game('8/8/8/3k4/8/8/8/Q3K3 w - - 0 1')
+    config = SearchConfig(tablebase_dir=tb_dir)
+    search = Negamax(game,depth=2,config=config)
+    result = search.search()
+    dtm = search.tablebases.probe(game.current_board,core.Color.WHITE)
+    assert result.score == MATE_SCORE - dtm
+    assert search.tablebases.hits > 0
+
+def test_krk_longest_mate(krk):
+    '''KRK is won in at most 16 moves'''
+    assert max(krk.data[:krk.size]) - 1 == 31
+
+def test_capture_resolved_in_subtable(krk):
+    '''Kxg7 in KRRK leads to KRK, won for white: not a draw'''
+    # Kc3, Ra1 and Rg7 against Kh8, whose only move takes the rook
+    generator = Generator('KRRK',{'KRK':krk})
+    moves = list(generator._black_moves(18,63,[54,0]))
+    k = krk.index(18,54,[0])
+    assert moves == [(krk,k)]
+    v = krk.value(True,k)
+    assert v > 0
+    assert generator._capture_loss(18,63,[54,0]) == v
+    # defended by Rg1, the rook can't be taken: stalemate
+    assert list(generator._black_moves(18,63,[54,6])) == []
+    assert generator._capture_loss(18,63,[54,6]) is None
+
+def test_capture_of_last_piece_draws(krk):
+    generator = Generator('KRK')
+    assert list(generator._black_moves(0,63,[54])) == [(None,None)]
+    assert generator._capture_loss(0,63,[54]) == 0
@@ -0,0 +1,93 @@
+import os
+import random
+import subprocess
+import sys
+import pytest
+from bitchess import tables, squareset as ss
+from bitchess.tables import open_tables, generate, to_bytes, ZOBRIST_SEED, OFFSETS
+
+def test_tables_match_squareset():
+    '''the cached tables agree with the squareset shift and fill functions'''
+    t = open_tables()
+    for i in range(64):
+        square = ss.SQUARES[i]
+        assert ss.KNIGHT_ATTACKS[i] == ss.get_knight_targets(square,ss.EMPTY,ss.UNIVERSE)
+        assert ss.KING_ATTACKS[i] == ss.get_king_targets(square,ss.EMPTY,ss.UNIVERSE)
+        assert ss.PAWN_ATTACKS[True][i] == \
+            ss.shift_northeast_one(square) | ss.shift_northwest_one(square)
+        assert ss.PAWN_ATTACKS[False][i] == \
+            ss.shift_southeast_one(square) | ss.shift_southwest_one(square)
+        for direction,fill in (
+            ('N',ss.north_fill),('NE',ss.northeast_fill),('SW',ss.southwest_fill),
+            ('W',ss.west_fill)
+        ):
+            assert ss.RAYS[direction][i] == fill(square) ^ square
+    rng = random.Random(ZOBRIST_SEED)
+    assert list(t.ints('ZOBRIST')) == [rng.getrandbits(64) for _ in range(781)]
+
+def test_cache_file(tmp_path):
+    path = str(tmp_path / 'cache' / 'tables.bin')
+    t = open_tables(path)
+    assert t.mapped and os.path.exists(path)
+    mtime = os.stat(path).st_mtime_ns
+    squares = t.squaresets('SQUARES')
+    assert squares[5].readonly and list(squares[5].search(1)) == [5]
+    with pytest.raises(TypeError):
+        squares[5][6] = 1
+    # later opens map the existing file
+    again = open_tables(path)
+    assert again.mapped and os.stat(path).st_mtime_ns == mtime
+    assert list(again.ints('KNIGHT_ATTACKS')) == list(t.ints('KNIGHT_ATTACKS'))
+
+def test_stale_cache_regenerated(tmp_path):
+    path = str(tmp_path / 'tables.bin')
+    data = bytearray(to_bytes(generate()))
+    data[4] = tables.VERSION + 1
+    with open(path,'wb') as f:
+        f.write(data)
+    t = open_tables(path)
+    assert t.mapped
+    assert t.ints('SQUARES')[63] == 1 << 63
+    with open(path,'wb') as f:
+        f.write(b'garbage')
+    assert open_tables(path).ints('RANKS')[0] == 0xFF
+
+def test_unwritable_cache(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    t = open_tables(str(blocker / 'tables.bin'))
+    assert not(t.mapped)
+    assert t.ints('KING_ATTACKS')[0] == (1 << 1) | (1 << 8) | (1 << 9)
+    assert t.squaresets('FILES')[0] == ss.FILE[0]
+
+def test_shared_between_processes(tmp_path):
+    '''the first process writes the cache, later ones map it'''
+    code = (
+        'from bitchess.tables import TABLES\n'
+        'import bitchess.board\n'
+        'print(TABLES.path)\n'
+    )
+    env = dict(os.environ,BITCHESS_CACHE_DIR=str(tmp_path))
+    first = subprocess.run(
+        [sys.executable,'-c',code],env=env,capture_output=True,text=True,check=True
+    )
+    path = first.stdout.strip()
+    assert path == os.path.join(str(tmp_path),f'tables-v{tables.VERSION}.bin')
+    mtime = os.stat(path).st_mtime_ns
+    second = subprocess.run(
+        [sys.executable,'-c',code],env=env,capture_output=True,text=True,check=True
+    )
+    assert second.stdout.strip() == path
+    assert os.stat(path).st_mtime_ns == mtime
+    assert os.path.getsize(path) == tables.HEADER.size + 8 * tables.WORDS
+    assert OFFSETS['ZOBRIST'] + 781 == tables.WORDS
+
+@pytest.mark.skipif(sys.byteorder != 'little',reason='big-endian hosts copy the words')
+def test_int_tables_are_views():
+    '''the int tables index the mapped words instead of private copies'''
+    from bitchess import board, zobrist, tablebase
+    for table in (
+        board._KNIGHT_ATTACKS,board._PAWN_ATTACKS[0],board._RAYS[3],
+        zobrist.PIECE_KEYS[True]['PAWN'],zobrist.EN_PASSANT_KEYS,tablebase.KING_ATTACKS
+    ):
+        assert isinstance(table,memoryview) and table.obj is tables.TABLES._words.obj
@@ -0,0 +1,104 @@
+import pytest
+from bitchess import core, squareset as ss
+from bitchess.board import Board
+from bitchess.move import Move
+from bitchess.game import Game
+from bitchess.algorithms.transposition import TranspositionTable, Bound, ENTRY_SIZE
+from bitchess.algorithms.negamax import Negamax, SearchConfig
+
+def test_zobrist_hash_transposition():
+    '''different move orders reaching the same position hash the same'''
+    g1 = Game()
+    for m in ['Nf3','Nf6','Nc3']:
+        g1.play_str_move(m)
+    g2 = Game()
+    for m in ['Nc3','Nf6','Nf3']:
+        g2.play_str_move(m)
+    assert (
+        g1.current_board.get_zobrist_hash(g1._current_player) ==
+        g2.current_board.get_zobrist_hash(g2._current_player)
+    )
+
+def test_zobrist_hash_side_castling_en_passant():
+    h = Board().get_zobrist_hash(core.Color.WHITE)
+    assert h != Board().get_zobrist_hash(core.Color.BLACK)
+    no_castle = Board('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w Kkq - 0 1')
+    assert h != no_castle.get_zobrist_hash(core.Color.WHITE)
+    ep = Board('4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1')
+    no_ep = Board('4k3/8/8/3pP3/8/8/8/4K3 w - - 0 1')
+    assert ep.get_zobrist_hash(True) != no_ep.get_zobrist_hash(True)
+
+def test_zobrist_hash_restored_by_pop():
+    board = Board()
+    h = board.get_zobrist_hash(core.Color.WHITE)
+    for move in board.get_pseudolegal_moves(core.Color.WHITE):
+        board.push(move)
+        assert board.get_zobrist_hash(core.Color.BLACK) != h
+        board.pop()
+        assert board.get_zobrist_hash(core.Color.WHITE) == h
+
+def test_move_code_round_trip_fields():
+    m = Move('PAWN',core.Color.WHITE,ss.SQUARES[51],ss.SQUARES[59],'quiet','QUEEN')
+    code = m.get_code()
+    assert code & 0x3F == 51
+    assert code >> 6 & 0x3F == 59
+    assert core.PROMOTION_PIECES[(code >> 12) - 1] == 'QUEEN'
+
+def test_tt_size_from_megabytes():
+    tt = TranspositionTable(1)
+    assert tt.n_entries * ENTRY_SIZE == 2**20
+
+def test_tt_store_probe():
+    tt = TranspositionTable(1)
+    assert tt.probe(12345) is None
+    tt.store(12345,4,-37,Bound.LOWER,999)
+    entry = tt.probe(12345)
+    assert entry == (4,-37,Bound.LOWER,999)
+    assert (tt.probes,tt.hits,tt.stores) == (2,1,1)
+
+def test_tt_replacement_scheme():
+    '''a shallow entry goes to the always-replace slot, keeping the deep one'''
+    tt = TranspositionTable(1)
+    n_buckets = tt.n_entries // 2
+    deep,shallow,other = 7,7 + n_buckets,7 + 2 * n_buckets
+    tt.store(deep,8,10,Bound.EXACT,1)
+    tt.store(shallow,2,20,Bound.EXACT,2)
+    assert tt.probe(deep).depth == 8
+    assert tt.probe(shallow).depth == 2
+    tt.store(other,1,30,Bound.EXACT,3)
+    assert tt.probe(deep) is not None
+    assert tt.probe(shallow) is None
+    assert tt.collisions == 1
+    # entries from an earlier search give way to new ones
+    tt.new_search()
+    tt.store(shallow,1,40,Bound.EXACT,4)
+    assert tt.probe(deep) is None
+    assert tt.probe(shallow).score == 40
+
+def test_search_uses_tt():
+    game = Game(fen='4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    negamax = Negamax(game,3,SearchConfig(hash_mb=1))
+    first = negamax.search()
+    assert negamax.tt.stores > 0
+    second = negamax.search()
+    assert second.score == first.score
+    assert second.nodes < first.nodes
+    assert negamax.tt.hits > 0
+
+def test_tt_torn_entry_is_a_miss():
+    '''an entry whose data changed without its key reads as a miss'''
+    tt = TranspositionTable(1)
+    tt.store(12345,4,-37,Bound.LOWER,999)
+    i = (12345 & tt._mask) * 2
+    tt.data[i] ^= 1 << 20
+    assert tt.probe(12345) is None
+
+def test_shared_tt_attach():
+    tt = TranspositionTable.shared(1)
+    try:
+        other = TranspositionTable.attach(tt.shm_name,1)
+        tt.store(777,3,55,Bound.EXACT,12)
+        assert other.probe(777) == (3,55,Bound.EXACT,12)
+        other.close()
+    finally:
+        tt.close(unlink=True)
@@ -0,0 +1,94 @@
+import io
+import time
+import pytest
+from bitchess.uci import UCIEngine, format_score
+from bitchess.algorithms.negamax import MATE_SCORE
+
+def engine_with(*commands):
+    output = io.StringIO()
+    engine = UCIEngine(output)
+    for command in commands:
+        assert engine.handle(command)
+    return engine,output
+
+def lines(output):
+    return output.getvalue().splitlines()
+
+def test_handshake():
+    engine,output = engine_with('uci','isready')
+    assert lines(output)[0] == 'id name bitchess'
+    assert lines(output)[-2:] == ['uciok','readyok']
+    assert not(engine.handle('quit'))
+
+def test_go_depth_mate_in_one():
+    engine,output = engine_with(
+        'position fen k7/8/1K6/8/8/8/8/7R w - - 0 1','go depth 2'
+    )
+    engine.wait()
+    out = lines(output)
+    assert out[-1] == 'bestmove h1h8'
+    assert 'score mate 1' in out[-2]
+
+def test_position_moves_applied_incrementally():
+    engine,_ = engine_with('position startpos moves e2e4 e7e5')
+    game = engine.game
+    engine.handle('position startpos moves e2e4 e7e5 g1f3')
+    assert engine.game is game
+    assert engine.game.get_fen().startswith(
+        'rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq -'
+    )
+    engine.handle('position startpos moves d2d4')
+    assert engine.game is not game
+    assert engine._fen_moves[1] == ['d2d4']
+
+def test_stop_infinite_search():
+    engine,output = engine_with('position startpos','go infinite')
+    time.sleep(0.2)
+    assert not(any(l.startswith('bestmove') for l in lines(output)))
+    engine.handle('isready')
+    assert 'readyok' in lines(output)
+    start = time.monotonic()
+    engine.handle('stop')
+    assert time.monotonic() - start < 2
+    assert lines(output)[-1].startswith('bestmove')
+
+def test_ponderhit_starts_clock():
+    engine,output = engine_with(
+        'position startpos moves e2e4','go ponder wtime 1000 btime 1000'
+    )
+    time.sleep(0.1)
+    assert not(any(l.startswith('bestmove') for l in lines(output)))
+    engine.handle('ponderhit')
+    engine.wait()
+    assert lines(output)[-1].startswith('bestmove')
+
+def test_malformed_values_ignored():
+    '''bad numbers are reported and the command ignored, the loop keeps going'''
+    engine,output = engine_with(
+        'setoption name Hash value lots','go depth two','isready'
+    )
+    out = lines(output)
+    assert out[0].startswith('info string invalid setoption')
+    assert out[1].startswith('info string invalid go')
+    assert out[-1] == 'readyok'
+    assert engine.config.hash_mb == 16
+    assert engine._thread is None
+    engine.run(io.StringIO('go movetime x\nisready\nquit\n'))
+    assert lines(output)[-1] == 'readyok'
+
+def test_position_fen_without_clocks():
+    engine,_ = engine_with('position fen 4k3/8/8/8/8/8/3Q4/4K3 w - - moves d2d7')
+    assert engine.game.get_fen().startswith('4k3/3Q4/8/8/8/8/8/4K3 b - - 1 ')
+
+@pytest.mark.parametrize('fen',['garbage','4k3/8/8/8/8/8/3Q4/4K3 w - e9 0 1'])
+def test_invalid_position_keeps_game(fen):
+    engine,output = engine_with('position startpos moves e2e4',f'position fen {fen}','isready')
+    out = lines(output)
+    assert out[0].startswith('info string invalid position')
+    assert out[-1] == 'readyok'
+    assert engine.game.move_stack[0].get_uci() == 'e2e4'
+
+def test_format_score():
+    assert format_score(35) == 'cp 35'
+    assert format_score(MATE_SCORE - 3) == 'mate 2'
+    assert format_score(-(MATE_SCORE - 2)) == 'mate -1'